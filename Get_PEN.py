@@ -3,104 +3,463 @@
    and appends PEN or failure status back into the DataFrame.
 """
 
-import time
+import asyncio
 import os
-import pandas as pd
+from functools import partial
+from core.lazy import async_api, pd, sync_api
 from dotenv import load_dotenv
-from playwright.sync_api import TimeoutError, Error as PwError
 from core.browser_utils import safe_close, PAGE_TIMEOUT
 from core.navigation_pen import login_and_land
-from datetime import datetime
+from core.api_client import ApiMode
+from core.async_pool import run_async_pool, DEFAULT_PAGES, MAX_PAGES
+from core.dates import get_yob
+from core.dedup import DedupIndex, lookup_keys
+from core.frame_store import load_frame, save_frame, type_columns
+from core.lookup_cache import LookupCache, MISS
+from core.popups import POPUPS, dismiss, dismiss_async
+from core.run_journal import RunJournal, journal_path
+from core.readiness import READY
+from core.rate_limit import LIMITER
+from core.selectors import (
+    AADHAAR_INPUT, GET_PEN_LINK, PEN_CELL, PEN_DOB_CELL, PEN_SEARCH_BTN, POPUP,
+    POPUP_CONFIRM, YOB_INPUT, any_of,
+)
+from core.tracing import TRACER
+from core.validate import check_aadhaar_roster, is_dob_reason, pen_valid, report
+from core.worker_pool import (
+    snapshot_session, shard_rows, run_pool, DEFAULT_WORKERS, MAX_WORKERS,
+)
 
 
-def get_yob(value):
-    """
-    Accepts either pandas Timestamp, datetime, or string "DD/MM/YYYY".
-    Returns 4-digit year as str, or None if parse fails.
+IN_FILE = "students_extracted.xlsx"
+OUT_FILE = "students_extracted_with_PEN.xlsx"
+
+df = None    # roster being processed; set by open_and_get_student_pen()
+dobs = None  # its DD/MM/YYYY dates of birth, parsed once by the validation pass
+
+
+def load_roster(src=IN_FILE):
+    """Load Aadhaar data (*src* is a path or an in-memory DataFrame).  Rows
+    without a readable Aadhaar stay in; the pre-validation lists them."""
+    data = type_columns(src.copy()) if isinstance(src, pd.DataFrame) else load_frame(src)
+    return data.reset_index(drop=True)
+
+# ---------- single lookup ----------
+
+def lookup_pen(page, aadhar, yob):
+    """Run one Aadhaar + YOB search in the "Get PEN & DOB" modal.
+
+    Returns ``(pen, dob)``, or ``None`` when the portal says not found.
+    The modal is closed again before returning.
     """
-    if pd.isna(value):
+    page.click(GET_PEN_LINK)
+    page.wait_for_selector(AADHAAR_INPUT, timeout=5_000)
+    page.fill(AADHAAR_INPUT, aadhar)
+    page.fill(YOB_INPUT, str(yob))
+    with LIMITER.call():
+        with READY.step(page, "pen-search"):
+            page.click(PEN_SEARCH_BTN)
+
+        # Wait for result or failure popup – whichever renders first
+        result = None
+        try:
+            READY.wait_for(page, any_of(PEN_CELL, POPUP), "pen-result", 8_000)
+            if not page.locator(PEN_CELL).count():
+                raise sync_api.TimeoutError("failure popup instead of result")
+            pen = page.inner_text(PEN_CELL)
+            dob = page.inner_text(PEN_DOB_CELL)
+            result = (pen, dob)
+        except sync_api.TimeoutError:
+            if dismiss(page, classes=(POPUP_CONFIRM,)) is None:
+                raise sync_api.TimeoutError("No result and no popup appeared.")
+
+    # Close modal
+    page.press("body", "Escape")
+    page.wait_for_selector(GET_PEN_LINK, timeout=4_000)
+    return result
+
+
+async def lookup_pen_async(page, aadhar, yob):
+    """:func:`lookup_pen` on an async page (see :mod:`core.async_pool`)."""
+    await page.click(GET_PEN_LINK)
+    await page.wait_for_selector(AADHAAR_INPUT, timeout=5_000)
+    await page.fill(AADHAAR_INPUT, aadhar)
+    await page.fill(YOB_INPUT, str(yob))
+    async with LIMITER.call_async():
+        async with READY.step(page, "pen-search"):
+            await page.click(PEN_SEARCH_BTN)
+
+        result = None
+        try:
+            await READY.wait_for_async(page, any_of(PEN_CELL, POPUP), "pen-result", 8_000)
+            if not await page.locator(PEN_CELL).count():
+                raise async_api.TimeoutError("failure popup instead of result")
+            result = (await page.inner_text(PEN_CELL), await page.inner_text(PEN_DOB_CELL))
+        except async_api.TimeoutError:
+            if await dismiss_async(page, classes=(POPUP_CONFIRM,)) is None:
+                raise async_api.TimeoutError("No result and no popup appeared.")
+
+    await page.press("body", "Escape")
+    await page.wait_for_selector(GET_PEN_LINK, timeout=4_000)
+    return result
+
+
+def lookup_pen_api(page, api, aadhar, yob):
+    """Same contract as :func:`lookup_pen`, but goes through *api* (an
+    :class:`core.api_client.ApiMode`) which only falls back to the modal
+    until it has learned the endpoint."""
+    def via_form():
+        res = lookup_pen(page, aadhar, yob)
+        return {"pen": res[0], "dob": res[1]} if res else None
+
+    fields = api.lookup(via_form, {"aadhaar": aadhar, "yob": str(yob)})
+    if not fields:
         return None
-    if hasattr(value, "year"):
-        return str(value.year)
-    try:
-        return str(datetime.strptime(str(value).strip(), "%d/%m/%Y").year)
-    except ValueError:
+    return fields["pen"], fields.get("dob", "")
+
+
+def row_key(idx):
+    """Journal key for a roster row: ``aadhaar|DD/MM/YYYY``, the key repeats
+    are grouped on (:func:`core.dedup.lookup_keys`), so one Aadhaar typed
+    with two dates of birth is two lookups and two journal entries."""
+    aadhar = df.at[idx, "aadharId"]
+    if pd.isna(aadhar):
+        return f"row{idx}"
+    dob = dobs.get(idx) if dobs is not None else None
+    return aadhar if dob is None or pd.isna(dob) else f"{str(aadhar).strip()}|{str(dob).strip()}"
+
+
+def row_yob(idx):
+    """Year of birth of a roster row (None when its DOB is unreadable)."""
+    if dobs is None:
+        return get_yob(df.at[idx, "TxtDateOfBirth"])
+    dob = dobs.get(idx)
+    return None if pd.isna(dob) else dob[-4:]
+
+
+def cached_row(cache, idx):
+    """``(status, fields)`` from the lookup cache, or None on a miss."""
+    row = df.loc[idx]
+    yob = row_yob(idx)
+    if yob is None:
         return None
-# Load and filter Aadhaar data
-df = (
-    pd.read_excel("students_extracted.xlsx")
-      .query("aadharId.notnull() & aadharId != 0")
-      .reset_index(drop=True)
-)
+    hit = cache.get_pen(row["aadharId"], yob)
+    if hit is MISS:
+        return None
+    if hit is None:
+        print(f"✗ {row.TxtStudName} → not found (cached)")
+        return "not_found", {"student_pen": "Wrong Aadhaar/YOB"}
+    pen, dob = hit
+    print(f"✓ {row.TxtStudName} → PEN {pen} (cached)")
+    fields = {"student_pen": pen}
+    if dob:
+        fields["TxtDateOfBirth"] = dob
+    return "found", fields
+
+
+def process_row(page, idx, tag="", api=None, cache=None, journal=None, on_result=None):
+    """Look up one roster row and record it in *journal* unless it errored.
+    ``on_result(idx, fields)`` is called as soon as the row is done."""
+    with TRACER.span("pen.student", row=idx):
+        status, fields = _lookup_row(page, idx, tag, api, cache)
+    return _row_done(idx, status, fields, journal, on_result)
+
+
+async def process_row_async(page, idx, tag="", cache=None, journal=None, on_result=None):
+    """:func:`process_row` on an async page (``--pages``).  The journal write
+    and *on_result* run in a thread: a full :class:`core.streaming.Handoff`
+    blocks its ``put``, and that must not stall every page on the loop."""
+    with TRACER.span("pen.student", row=idx):
+        status, fields = await _lookup_row_async(page, idx, tag, cache)
+    return await asyncio.to_thread(_row_done, idx, status, fields, journal, on_result)
+
+
+def _row_done(idx, status, fields, journal, on_result):
+    if journal is not None and status != "error":
+        journal.record(row_key(idx), {"status": status, "cols": fields})
+    if on_result is not None:
+        on_result(idx, fields)
+    return status, fields
+
+
+def _lookup_row(page, idx, tag="", api=None, cache=None):
+    """Look up one roster row. Returns ``(status, fields)`` where status is
+    ``"found"``, ``"not_found"`` or ``"error"`` and fields are the columns
+    to write back into ``df``. Portal answers are stored in *cache*."""
+    row = df.loc[idx]
+    try:
+        aadhar = row["aadharId"]
+        yob = row_yob(idx)
+        if yob is None:
+            print(f"✗ {tag}{row.TxtStudName} → invalid DOB")
+            return "not_found", {"student_pen": "Bad DOB"}
+
+        if api is not None:
+            result = lookup_pen_api(page, api, aadhar, yob)
+        else:
+            result = lookup_pen(page, aadhar, yob)
+        return _pen_result(row, aadhar, yob, result, tag, cache)
 
-def open_and_get_student_pen():
+    except Exception as e:
+        print(f"‼ {tag}{row.TxtStudName} → ERROR → {e}")
+        page.press("body", "Escape")
+        try:
+            page.wait_for_selector(GET_PEN_LINK, timeout=4_000)
+        except sync_api.TimeoutError:
+            pass
+        return "error", {"student_pen": f"Error: {str(e)[:30]}"}
+
+
+async def _lookup_row_async(page, idx, tag="", cache=None):
+    """:func:`_lookup_row` on an async page (no API mode)."""
+    row = df.loc[idx]
+    try:
+        aadhar = row["aadharId"]
+        yob = row_yob(idx)
+        if yob is None:
+            print(f"✗ {tag}{row.TxtStudName} → invalid DOB")
+            return "not_found", {"student_pen": "Bad DOB"}
+        result = await lookup_pen_async(page, aadhar, yob)
+        return _pen_result(row, aadhar, yob, result, tag, cache)
+
+    except Exception as e:
+        print(f"‼ {tag}{row.TxtStudName} → ERROR → {e}")
+        try:
+            await page.press("body", "Escape")
+            await page.wait_for_selector(GET_PEN_LINK, timeout=4_000)
+        except async_api.Error:
+            pass
+        return "error", {"student_pen": f"Error: {str(e)[:30]}"}
+
+
+def _pen_result(row, aadhar, yob, result, tag, cache):
+    """``(status, fields)`` for a portal answer, which also goes into *cache*."""
+    if cache is not None:
+        cache.put_pen(aadhar, yob, result)
+    if result is None:
+        print(f"✗ {tag}{row.TxtStudName} → not found  [{LIMITER}]")
+        return "not_found", {"student_pen": "Wrong Aadhaar/YOB"}
+
+    pen, dob = result
+    print(f"✓ {tag}{row.TxtStudName} → PEN {pen}  [{LIMITER}]")
+    fields = {"student_pen": pen}
+    if dob:
+        fields["TxtDateOfBirth"] = dob
+    return "found", fields
+
+
+async def _form_ready(page):
+    await page.wait_for_selector(GET_PEN_LINK, timeout=PAGE_TIMEOUT)
+
+
+def apply_fields(idx, fields):
+    for col, val in fields.items():
+        df.at[idx, col] = val
+
+
+def fan_out_duplicates(dups):
+    """Copy every looked-up row's answer into its repeats; returns how many
+    of them that makes ``(found, not_found)`` (errors count as neither)."""
+    dups.fan_out(df, ["student_pen", "TxtDateOfBirth"])
+    pens = df.loc[list(dups.leader_of), "student_pen"].astype("string")
+    ok = pen_valid(pens)
+    failed = pens.notna() & ~ok & ~pens.str.startswith("Error", na=False)
+    return int(ok.sum()), int(failed.sum())
+
+
+# ---------- main ----------
+
+@TRACER.traced("stage.pen")
+def open_and_get_student_pen(workers=DEFAULT_WORKERS, api=False, use_cache=True, fresh=False,
+                             page=None, roster=None, write=True, excel=True, on_result=None,
+                             pages=DEFAULT_PAGES):
+    """Fetch PEN for every roster row.
+
+    With ``workers > 1`` the login page is only used to sign in: its session
+    is copied into that many extra browsers, each of which takes a round-robin
+    shard of the rows (see :mod:`core.worker_pool`).
+
+    With ``pages > 1`` the session goes instead into one async browser with
+    that many pages, whose lookups overlap under one event loop (see
+    :mod:`core.async_pool`); this takes precedence over *workers*.
+
+    With ``api=True`` the first successful modal search is recorded and every
+    later student is looked up with a direct JSON call (see
+    :mod:`core.api_client`); workers are not needed in that mode.
+
+    Rows that cannot succeed – unreadable DOB, Aadhaar failing its checksum
+    – are marked before login without a portal call and listed in
+    ``<OUT_FILE>.rejects.csv`` (see :mod:`core.validate`).
+
+    A student listed more than once (same Aadhaar and DOB) is looked up once;
+    the answer is copied to the other rows (:mod:`core.dedup`).
+
+    Rows already answered in the lookup cache (:mod:`core.lookup_cache`) are
+    filled in before login; the browser is only opened for the rest.
+
+    Every finished row is appended to a run journal (:mod:`core.run_journal`),
+    so an interrupted run resumes where it stopped; ``fresh=True`` ignores it.
+
+    Pass *page* (already on the Import Module, e.g. from run_pipeline.py) to
+    reuse a browser; it is then left open for the caller.
+
+    *roster* replaces ``students_extracted.xlsx`` with an in-memory frame;
+    ``write=False`` skips saving the result and ``excel=False`` keeps it to
+    the working copy (:mod:`core.frame_store`). The result is returned.
+
+    ``on_result(idx, fields)`` is called for every row the moment its columns
+    are known (journal, cache or portal), from whichever thread found it;
+    run_pipeline.py uses it to stream rows into the school lookup.
+    """
+    global df, dobs
     load_dotenv()
     user, pwd = os.getenv("SSG_USER"), os.getenv("SSG_PASS")
-    if not (user and pwd):
+    if page is None and not (user and pwd):
         raise SystemExit("Set SSG_USER & SSG_PASS in .env")
 
-    pw = browser = page = None
+    df = load_roster(IN_FILE if roster is None else roster)
+    pw = browser = api_mode = None
     found, not_found = 0, 0
+    if api and (workers > 1 or pages > 1):
+        print("ℹ API mode is single-page; ignoring --workers / --pages")
+        workers = pages = 1
+
+    check = check_aadhaar_roster(df)
+    report(check, OUT_FILE, "students")
+    dobs = check.dob
+    for idx, why in check.rejects["reason"].items():
+        fields = {"student_pen": "Bad DOB" if is_dob_reason(why) else "Wrong Aadhaar/YOB"}
+        apply_fields(idx, fields)
+        if on_result is not None:
+            on_result(idx, fields)
+        not_found += 1
+
+    # repeats of a student wait for its first row; on_result fires for all of them
+    dups = DedupIndex(lookup_keys(df.loc[check.good, "aadharId"], dobs[check.good]))
+    on_result = dups.fan(on_result)
+
+    journal = RunJournal(journal_path(OUT_FILE), fresh=fresh)
+    todo = []
+    for idx in dups.leaders(check.good):
+        rec = journal.get(row_key(idx))
+        if rec is None:
+            todo.append(idx)
+            continue
+        apply_fields(idx, rec["cols"])
+        if on_result is not None:
+            on_result(idx, rec["cols"])
+        if rec["status"] == "found":
+            found += 1
+        else:
+            not_found += 1
+
+    cache = LookupCache() if use_cache else None
+    if cache is not None:
+        pending, todo = todo, []
+        for idx in pending:
+            hit = cached_row(cache, idx)
+            if hit is None:
+                todo.append(idx)
+                continue
+            status, fields = hit
+            apply_fields(idx, fields)
+            if on_result is not None:
+                on_result(idx, fields)
+            if status == "found":
+                found += 1
+            else:
+                not_found += 1
+        print(f"→ {len(pending) - len(todo)} students from cache, {len(todo)} to look up")
+
+    completed = False
 
     try:
-        pw, browser, page = login_and_land(user, pwd)
-
-        for idx, row in df.iterrows():
-            try:
-                aadhar = str(int(row["aadharId"])).zfill(12)
-                yob = get_yob(row["TxtDateOfBirth"])
-                if yob is None:
-                    df.at[idx, "student_pen"] = "Bad DOB"
-                    print(f"✗ {row.TxtStudName} → invalid DOB")
-                    not_found += 1
-                    continue
-
-                # Open modal
-                # time.sleep(1)
-                page.click("a:has-text('Get PEN & DOB')")
-                # time.sleep(3)
-                page.wait_for_selector("input[name='aadhaar']", timeout=5_000)
-                page.fill("input[name='aadhaar']", aadhar)
-                page.fill("input[name='dob']", str(yob))
-                page.click("button:has-text('Search')")
-
-                # Wait for result or failure popup
-                try:
-                    page.wait_for_selector(
-                        "table.table tbody tr td:nth-child(1)", timeout=8_000
-                    )
-                    pen = page.inner_text("table.table tbody tr td:nth-child(1)")
-                    dob = page.inner_text("table.table tbody tr td:nth-child(2)")
-                    df.at[idx, "student_pen"] = pen
-                    df.at[idx, "TxtDateOfBirth"] = dob
-                    print(f"✓ {row.TxtStudName} → PEN {pen}")
-                    found += 1
+        if todo and page is None:
+            pw, browser, page = login_and_land(user, pwd)
+        if todo and api:
+            api_mode = ApiMode("pen", page)
 
-                except TimeoutError:
-                    if page.is_visible("div.swal2-popup"):
-                        page.click("button.swal2-confirm")
-                        df.at[idx, "student_pen"] = "Wrong Aadhaar/YOB"
-                        print(f"✗ {row.TxtStudName} → not found")
-                        not_found += 1
-                    else:
-                        raise TimeoutError("No result and no popup appeared.")
-
-                # Close modal
-                page.press("body", "Escape")
-                page.wait_for_selector("a:has-text('Get PEN & DOB')", timeout=4_000)
-
-            except Exception as e:
-                df.at[idx, "student_pen"] = f"Error: {str(e)[:30]}"
-                print(f"‼ {row.TxtStudName} → ERROR → {e}")
-                page.press("body", "Escape")
-                time.sleep(1)
+        if todo and (workers > 1 or pages > 1):
+            session = snapshot_session(page)
+            if pages > 1:
+                print(f"→ {len(todo)} students on {min(pages, len(todo))} pages of one browser")
+                results, stats = run_async_pool(session, todo,
+                                                partial(process_row_async, cache=cache,
+                                                        journal=journal, on_result=on_result),
+                                                prepare=_form_ready, pages=pages)
+            else:
+                shards = shard_rows(todo, workers)
+                print(f"→ {len(todo)} students across {len(shards)} workers")
+                results, stats = run_pool(session, shards,
+                                          partial(process_row, cache=cache, journal=journal,
+                                                  on_result=on_result),
+                                          max_workers=workers)
+            for idx in todo:
+                fields = results.get(idx)
+                if fields is None:
+                    fields = {"student_pen": "Error: not processed"}
+                    if on_result is not None:
+                        on_result(idx, fields)
+                apply_fields(idx, fields)
+            found += sum(s.counts.get("found", 0) for s in stats)
+            not_found += sum(s.counts.get("not_found", 0) for s in stats)
+            print(f"\n–––– {'PAGE' if pages > 1 else 'WORKER'} THROUGHPUT ––––")
+            for s in stats:
+                print(s.line())
+        else:
+            for idx in todo:
+                status, fields = process_row(page, idx, api=api_mode, cache=cache, journal=journal,
+                                             on_result=on_result)
+                apply_fields(idx, fields)
+                if status == "found":
+                    found += 1
+                elif status == "not_found":
+                    not_found += 1
+        completed = True
 
     finally:
+        if api_mode is not None:
+            api_mode.close()
         safe_close(browser, pw)
-        df.to_excel("students_extracted_with_PEN.xlsx", index=False)
+        dup_found, dup_not_found = fan_out_duplicates(dups)
+        found += dup_found
+        not_found += dup_not_found
+        if write:
+            save_frame(df, OUT_FILE, excel=excel)
+        if completed:
+            journal.finish()
+        journal.close()
         print(f"\n🟢 Done → {found} PEN found, 🔴 {not_found} not found")
-        print("📄 File saved as: students_extracted_with_PEN.xlsx")
+        print(f"   {dups.line()}")
+        READY.report()
+        LIMITER.report()
+        POPUPS.report()
+        if cache is not None:
+            print(cache.summary())
+            cache.close()
+        if write:
+            print(f"📄 File saved as: {OUT_FILE}")
+    return df
 
 
 if __name__ == "__main__":
-    open_and_get_student_pen()
+    import argparse
+
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--workers", type=int, default=int(os.getenv("PEN_WORKERS", DEFAULT_WORKERS)),
+                    help=f"parallel browser workers (capped at {MAX_WORKERS})")
+    ap.add_argument("--pages", type=int, default=int(os.getenv("UDISE_PAGES", DEFAULT_PAGES)),
+                    help=f"concurrent pages in one async browser (capped at {MAX_PAGES})")
+    ap.add_argument("--api", action="store_true",
+                    help="call the portal's JSON endpoint directly after the first lookup")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="ignore the lookup cache and query the portal for every student")
+    ap.add_argument("--fresh", action="store_true",
+                    help="ignore the run journal of an interrupted run and start over")
+    ap.add_argument("--trace", action="store_true", help="write a timing report + Chrome trace")
+    args = ap.parse_args()
+    if args.trace:
+        TRACER.enable()
+    open_and_get_student_pen(workers=max(1, min(args.workers, MAX_WORKERS)), api=args.api,
+                             use_cache=not args.no_cache, fresh=args.fresh,
+                             pages=max(1, min(args.pages, MAX_PAGES)))
@@ -9,13 +9,22 @@
 
     2.  **generate_release_requests()**
         • Loads *students_extracted_with_PEN_school.xlsx*.
-        • Drops rows where `school_name == "SMT. SAROJINI NAIDU GIRLS HIGH SCHOOL"`.
+        • Drops rows where `school_name == TARGET_SCHOOL` (env `UDISE_TARGET_SCHOOL`,
+          default "SMT. SAROJINI NAIDU GIRLS HIGH SCHOOL").
         • For each remaining student:
             ─ Fill PEN & DOB → *Get Details*
             ─ If current school is Sarojini Naidu → skip
             ─ Else select remark **Please release …** and click *Generate Student Release Request*.
             ─ Handles SweetAlert (success / already‑raised) and writes outcome to `release_status`.
-        • Saves checkpoints every 20 students and final XLSX `students_release_requests.xlsx`.
+        • Appends every outcome to a run journal (resumes after a crash without
+          re-submitting) and writes the final XLSX `students_release_requests.xlsx` once.
+        • `--pages K` works K students at a time on K pages of one async browser
+          (core/async_pool.py).
+        • A student listed twice (same PEN + DOB) gets one request; the other
+          row copies its outcome (core/dedup.py).
+        • `--trust-hours H` skips the portal for students whose school the status
+          stage saw at most H hours ago (ours / just imported / not found) and
+          for requests the previous run saw raised within H hours.
 
     Run standalone:
         python release_request_combined.py
@@ -23,187 +32,381 @@
 
 import os
 import re
-import time
-from datetime import datetime
-import pandas as pd
+from core.lazy import async_api, sync_api
 from dotenv import load_dotenv
-from playwright.sync_api import TimeoutError
 
-from core.browser_utils import safe_close
-from core.navigation_pen import login_and_land
+from core.async_pool import run_async_pool, DEFAULT_PAGES, MAX_PAGES
+from core.browser_utils import safe_close, PAGE_TIMEOUT
+from core.dates import is_recent, normalize_ddmmyyyy, stamp
+from core.dedup import DedupIndex, lookup_keys
+from core.frame_store import load_frame, save_frame, type_columns, work_path
+from core.popups import POPUPS, resolve, resolve_async
+from core.session import login_and_land_with, land_release_request
+from core.run_journal import RunJournal, journal_path
+from core.readiness import READY
+from core.rate_limit import LIMITER
+from core.selectors import (
+    GEN_REQ_BTN, GET_DETAILS_BTN, POPUP_CONFIRM, REL_DOB_INPUT, REL_PEN_INPUT, REMARK_SELECT,
+    SCHOOL_NAME_SPAN,
+)
+from core.tracing import TRACER
+from core.validate import check_pen_roster, is_dob_reason, report
+from core.worker_pool import snapshot_session
 
 # -------------------------------------------------------------------------
 # CONSTANTS / SELECTORS
 # -------------------------------------------------------------------------
-TARGET_SCHOOL = "SMT. SAROJINI NAIDU GIRLS HIGH SCHOOL"
+# our own school – students already here need no release request
+TARGET_SCHOOL = os.getenv("UDISE_TARGET_SCHOOL", "SMT. SAROJINI NAIDU GIRLS HIGH SCHOOL")
+# how old (hours) a status-stage school / earlier release outcome may be and
+# still be trusted without "Get Details"; 0 re-checks every student
+TRUST_HOURS = float(os.getenv("UDISE_TRUST_HOURS", "0"))
 
-# --- navigation selectors ---
-MENU_SPAN   = "span.HideMobile:has-text('Student Release Request Management')"
-CARD_GO_BTN = "li.cardIcon:has(h2:has-text('Student Release Request Management')) button:has-text('Go')"
-GEN_BTN_TOP = "button:has-text('Generate Student Release Request')"
-
-# --- form selectors ---
-PEN_INPUT  = "input[placeholder='Enter PEN']"
-DOB_INPUT  = "input[placeholder='DD/MM/YYYY']"
-GET_BTN    = "button:has-text('Get Details')"
-
-SCHOOL_NAME_SPAN = "li:has(span.title:has-text('School Name')) span.vlause"
-REMARK_SELECT = "div:has(p:has-text('Select Remark')) select.form-select"
-GEN_REQ_BTN      = "button:has-text('Generate Student Release Request')"
-
-# --- SweetAlert selectors ---
-POPUP_ANY   = "div.swal2-popup.swal2-show"
-OK_BTN_POP  = "div.swal2-popup.swal2-show button.swal2-confirm"
-SUCCESS_TTL = "div.swal2-popup.swal2-icon-success h2.swal2-title"
-ERROR_TTL   = "div.swal2-popup.swal2-icon-error   h2.swal2-title"
+# page selectors live in core.selectors
 
 # -------------------------------------------------------------------------
 # Helper functions
 # -------------------------------------------------------------------------
 
-def normalize_ddmmyyyy(val):
-    if pd.isna(val):
+@TRACER.traced("popup.release")
+def handle_popup(page):
+    """Return status string from SweetAlert (success / already raised); the
+    popup is closed with its OK button (:func:`core.popups.resolve`)."""
+    popup = resolve(page, "release", 10_000, classes=(POPUP_CONFIRM,), required=True)
+    if popup is None:
+        raise sync_api.TimeoutError("no popup after Generate")
+    return popup_status(popup)
+
+
+@TRACER.traced("popup.release")
+async def handle_popup_async(page):
+    """:func:`handle_popup` on an async page."""
+    popup = await resolve_async(page, "release", 10_000, classes=(POPUP_CONFIRM,), required=True)
+    if popup is None:
+        raise async_api.TimeoutError("no popup after Generate")
+    return popup_status(popup)
+
+
+def popup_status(popup):
+    """Status string for the success or the error popup (a
+    :class:`core.popups.Popup`)."""
+    if popup.icon == "success":
+        m = re.search(r"Request No: (\S+)", popup.title)
+        return f"Request Raised {m.group(1)}" if m else "Request Raised"
+    if popup.icon == "error":
+        return "Already Raised" if "already pending" in popup.title.lower() else popup.title[:60]
+    return "Unknown"
+
+
+def is_our_school(school):
+    return school.upper().replace(" ", "") == TARGET_SCHOOL.upper().replace(" ", "")
+
+
+def is_raised(status):
+    """A request for the student is pending on the portal."""
+    status = str(status)
+    return status == "Already Raised" or status.startswith("Request Raised")
+
+
+def load_prior(out_xlsx):
+    """Output of the previous release run, or None."""
+    if not (os.path.exists(out_xlsx) or os.path.exists(work_path(out_xlsx))):
+        return None
+    try:
+        return load_frame(out_xlsx)
+    except Exception as err:
+        print(f"⚠ could not read the previous {out_xlsx}: {err}")
         return None
-    if hasattr(val, "strftime"):
-        return val.strftime("%d/%m/%Y")
-    s = str(val).strip()
-    if re.fullmatch(r"\d{2}/\d{2}/\d{4}", s):
-        return s
-    for fmt in ("%Y-%m-%d", "%d-%m-%Y", "%m/%d/%Y"):
+
+
+def trusted_rows(df, rows, out_xlsx, hours):
+    """``{orig_idx: (release_status, checked_at)}`` for the *rows* that need
+    no "Get Details": the status stage saw their school at most *hours* ago
+    (ours, just imported into ours, or not found), or the previous release
+    run found their request raised within *hours*."""
+    sub = df.loc[rows]
+    out = {}
+    if "school_checked_at" in sub.columns and len(sub):
+        fresh = is_recent(sub["school_checked_at"], hours)
+        school = sub["school_name"].astype("string").fillna("").str.strip()
+        ours = school.map(is_our_school).astype(bool)
+        if "import_status" in sub.columns:
+            ours |= sub["import_status"].astype("string").str.startswith("Imported", na=False)
+        for idx in sub.index[fresh & ours]:
+            out[idx] = ("School is our school—skip", sub.at[idx, "school_checked_at"])
+        for idx in sub.index[fresh & ~ours & school.eq("Not Found")]:
+            out[idx] = ("Skipped (no school)", sub.at[idx, "school_checked_at"])
+
+    prior = load_prior(out_xlsx)
+    if prior is None or not {"student_pen", "release_status", "release_checked_at"} <= set(prior.columns):
+        return out
+    prior = prior[is_recent(prior["release_checked_at"], hours) & prior["release_status"].map(is_raised)]
+    raised = dict(zip(prior["student_pen"].astype(str).str.strip(),
+                      zip(prior["release_status"], prior["release_checked_at"])))
+    for idx in sub.index:
+        hit = raised.get(str(sub.at[idx, "student_pen"]).strip())
+        if hit is not None and idx not in out:
+            out[idx] = hit
+    return out
+
+
+# outcomes of release_row(); "done" and "bad_dob" are final and go into the journal
+FINAL = ("done", "bad_dob")
+
+
+def release_row(page, df, orig_idx, tag=""):
+    """Raise the release request of one row and set its ``release_status``.
+    Returns ``"done"``, ``"bad_dob"``, ``"remark_disabled"`` or ``"error"``."""
+    pen = str(df.at[orig_idx, "student_pen"]).strip()
+    dob = normalize_ddmmyyyy(df.at[orig_idx, "TxtDateOfBirth"])
+    if not dob:
+        df.at[orig_idx, "release_status"] = "Skipped (bad DOB)"
+        return "bad_dob"
+
+    print(f"→ {tag}{pen} …", end="")
+    try:
+        page.fill(REL_PEN_INPUT, pen)
+        page.fill(REL_DOB_INPUT, dob)
+        # wait for the details XHR, then the school span
+        with LIMITER.call():
+            with READY.step(page, "release-details", selector=SCHOOL_NAME_SPAN,
+                            baseline_ms=1_000, required=False, timeout_ms=6_000):
+                page.click(GET_DETAILS_BTN)
+            school = page.inner_text(SCHOOL_NAME_SPAN).strip()
+        print(school, end=f" [{LIMITER}] | ")
+
+        if is_our_school(school):
+            df.at[orig_idx, "release_status"] = "School is our school—skip"
+            df.at[orig_idx, "release_checked_at"] = stamp()
+            print("skip")
+            return "done"
+
+        # --- select remark + generate request ------------------------
         try:
-            return datetime.strptime(s, fmt).strftime("%d/%m/%Y")
-        except ValueError:
-            pass
-    return None
+            page.select_option(
+                REMARK_SELECT,
+                value="1",  # Please release the student…
+                timeout=10_000  # waits until enabled
+            )
+        except sync_api.TimeoutError:
+            print("   ↳ Remark dropdown never became enabled; skipping")
+            df.at[orig_idx, "release_status"] = "Skip (remark disabled)"
+            return "remark_disabled"
 
+        with LIMITER.call():
+            page.click(GEN_REQ_BTN)
+            status = handle_popup(page)
+        df.at[orig_idx, "release_status"] = status
+        df.at[orig_idx, "release_checked_at"] = stamp()
+        print(status)
+        return "done"
+    except Exception as e:
+        df.at[orig_idx, "release_status"] = f"Error: {str(e)[:40]}"
+        print("ERR", e)
+        return "error"
 
-def handle_popup(page):
-    """Return status string from SweetAlert (success / already raised)."""
-    status = "Unknown"
-    sr_no  = ""
+
+async def release_row_async(page, df, orig_idx, tag=""):
+    """:func:`release_row` on an async page; prints one line per student."""
+    pen = str(df.at[orig_idx, "student_pen"]).strip()
+    dob = normalize_ddmmyyyy(df.at[orig_idx, "TxtDateOfBirth"])
+    if not dob:
+        df.at[orig_idx, "release_status"] = "Skipped (bad DOB)"
+        return "bad_dob"
+
+    school = ""
     try:
-        page.wait_for_selector(POPUP_ANY, timeout=10_000)
-        if page.is_visible(SUCCESS_TTL):
-            ttl = page.inner_text(SUCCESS_TTL).strip()
-            m = re.search(r"Request No: (\S+)", ttl)
-            if m:
-                sr_no = m.group(1)
-            status = f"Request Raised {sr_no}" if sr_no else "Request Raised"
-        elif page.is_visible(ERROR_TTL):
-            ttl = page.inner_text(ERROR_TTL).strip()
-            if "already pending" in ttl.lower():
-                status = "Already Raised"
+        await page.fill(REL_PEN_INPUT, pen)
+        await page.fill(REL_DOB_INPUT, dob)
+        async with LIMITER.call_async():
+            async with READY.step(page, "release-details", selector=SCHOOL_NAME_SPAN,
+                                  baseline_ms=1_000, required=False, timeout_ms=6_000):
+                await page.click(GET_DETAILS_BTN)
+            school = (await page.inner_text(SCHOOL_NAME_SPAN)).strip()
+
+        if is_our_school(school):
+            status, outcome = "School is our school—skip", "done"
+        else:
+            try:
+                await page.select_option(REMARK_SELECT, value="1", timeout=10_000)
+            except async_api.TimeoutError:
+                status, outcome = "Skip (remark disabled)", "remark_disabled"
             else:
-                status = ttl[:60]
-    finally:
-        if page.is_visible(OK_BTN_POP):
-            page.click(OK_BTN_POP)
-            page.wait_for_selector(POPUP_ANY, state="detached", timeout=5_000)
-    return status
+                async with LIMITER.call_async():
+                    await page.click(GEN_REQ_BTN)
+                    status = await handle_popup_async(page)
+                outcome = "done"
+    except Exception as e:
+        status, outcome = f"Error: {str(e)[:40]}", "error"
+    df.at[orig_idx, "release_status"] = status
+    if outcome == "done":
+        df.at[orig_idx, "release_checked_at"] = stamp()
+    print(f"→ {tag}{pen} … {school} [{LIMITER}] | {status}")
+    return outcome
 
 # -------------------------------------------------------------------------
 # Stage 1 – landing helper
 # -------------------------------------------------------------------------
 
 def open_release_request_module():
-    """Login + navigate to Generate Student Release Request page."""
+    """Login (or reuse the saved session) + navigate to Generate Student Release Request page."""
     load_dotenv()
     user, pwd = os.getenv("SSG_USER"), os.getenv("SSG_PASS")
     if not user or not pwd:
         raise SystemExit("Set SSG_USER & SSG_PASS in .env")
 
-    pw = browser = page = None
     try:
-        pw, browser, page = login_and_land(user, pwd)
-        # menu → go card
-        page.click(MENU_SPAN)
-        time.sleep(0.5)
-        page.click(CARD_GO_BTN)
-        page.wait_for_load_state("networkidle")
-        # generate button
-        page.click(GEN_BTN_TOP)
-        page.wait_for_load_state("networkidle")
+        pw, browser, page = login_and_land_with(user, pwd, land_release_request)
         return page, browser, pw
     except Exception as err:
-        safe_close(browser, pw)
         raise RuntimeError(f"Navigation failed: {err}")
 
 # -------------------------------------------------------------------------
 # Stage 2 – main loop
 # -------------------------------------------------------------------------
 
+@TRACER.traced("stage.release")
 def get_student_school_request(
     in_xlsx="students_extracted_with_PEN_school.xlsx",
     out_xlsx="students_release_requests.xlsx",
+    fresh=False,
+    page=None,
+    df=None,
+    write=True,
+    excel=True,
+    pages=DEFAULT_PAGES,
+    trust_hours=TRUST_HOURS,
 ):
+    """Raise release requests. Pass *page* (already on the Generate Student
+    Release Request form, e.g. from run_pipeline.py) to reuse a browser; it
+    is then left open for the caller. *df* replaces reading *in_xlsx*;
+    ``write=False`` skips saving the result and ``excel=False`` keeps it to
+    the working copy (:mod:`core.frame_store`). The result is returned.
+    ``pages > 1`` raises that many requests at a time on pages of one async
+    browser (:mod:`core.async_pool`). Rows whose PEN or DOB the portal would
+    refuse are skipped up front (:mod:`core.validate`) and listed in
+    ``<out_xlsx>.rejects.csv``. A student listed more than once (same PEN
+    and DOB) is only raised once (:mod:`core.dedup`).
 
-    df = pd.read_excel(in_xlsx)
+    ``trust_hours > 0`` takes the school recorded by the status stage
+    (``school_checked_at``) and the requests the previous run of this stage
+    saw raised (``release_checked_at`` in *out_xlsx*) as settled while they
+    are at most that old; those students never reach the portal.  Everyone
+    else still gets "Get Details" right before the request, which the form
+    needs anyway and which re-checks the school."""
+
+    df = load_frame(in_xlsx) if df is None else type_columns(df.copy())
     if "release_status" not in df.columns:
         df["release_status"] = ""
+    if "release_checked_at" not in df.columns:
+        df["release_checked_at"] = ""  # when the portal gave release_status
 
     todo_mask = df["school_name"].str.strip().ne(TARGET_SCHOOL)
     df_todo = df[todo_mask].reset_index(drop=False)
     idx_map = dict(zip(df_todo.index, df_todo["index"]))
     print(f"→ {len(df_todo)} students to process (after filter).")
 
-    page, browser, pw = open_release_request_module()
+    # Resume: anything already in the journal was submitted (or settled) before
+    journal = RunJournal(journal_path(out_xlsx), fresh=fresh)
+    for row_idx, orig_idx in list(idx_map.items()):
+        rec = journal.get(str(df.at[orig_idx, "student_pen"]).strip())
+        if rec is not None:
+            for col, val in rec.items():
+                df.at[orig_idx, col] = val
+            del idx_map[row_idx]
 
-    processed = 0
-    for row_idx, orig_idx in idx_map.items():
-        pen = str(df.at[orig_idx, "student_pen"]).strip()
-        dob = normalize_ddmmyyyy(df.at[orig_idx, "TxtDateOfBirth"])
-        if not dob:
-            df.at[orig_idx, "release_status"] = "Skipped (bad DOB)"
-            continue
+    def journal_row(orig_idx):
+        journal.record(str(df.at[orig_idx, "student_pen"]).strip(),
+                       {c: df.at[orig_idx, c] for c in ("release_status", "release_checked_at")})
 
-        print(f"→ ({processed+1}/{len(df_todo)}) {pen} …", end="")
-        try:
-            page.fill(PEN_INPUT, pen)
-            page.fill(DOB_INPUT, dob)
-            page.click(GET_BTN)
-            # wait for school
-            try:
-                page.wait_for_selector(SCHOOL_NAME_SPAN, timeout=6_000)
-            except TimeoutError:
-                pass
-            school = page.inner_text(SCHOOL_NAME_SPAN).strip()
-            print(school, end=" | ")
+    if trust_hours > 0 and idx_map:
+        trusted = trusted_rows(df, list(idx_map.values()), out_xlsx, trust_hours)
+        for orig_idx, (status, checked_at) in trusted.items():
+            df.at[orig_idx, "release_status"] = status
+            df.at[orig_idx, "release_checked_at"] = checked_at
+        idx_map = {row_idx: orig_idx for row_idx, orig_idx in idx_map.items() if orig_idx not in trusted}
+        print(f"→ {len(trusted)} settled from the last {trust_hours:g} h without Get Details, "
+              f"{len(idx_map)} to check on the portal.")
 
-            if school.upper().replace(" ","") == TARGET_SCHOOL.upper().replace(" ",""):
-                df.at[orig_idx, "release_status"] = "School is our school—skip"
-                print("skip")
-            else:
-                # --- select remark + generate request ------------------------
-                try:
-                    time.sleep(1)
-                    page.select_option(
-                        "div:has(p:has-text('Select Remark')) select.form-select",
-                        value="1",  # Please release the student…
-                        timeout=10_000  # waits until enabled
-                    )
-                except TimeoutError:
-                    print("   ↳ Remark dropdown never became enabled; skipping")
-                    df.at[orig_idx, "release_status"] = "Skip (remark disabled)"
-                    continue
-
-                page.click(GEN_REQ_BTN)
-                status = handle_popup(page)
-                df.at[orig_idx, "release_status"] = status
-                print(status)
-        except Exception as e:
-            df.at[orig_idx, "release_status"] = f"Error: {str(e)[:40]}"
-            print("ERR", e)
-
-        processed += 1
-        if processed % 20 == 0:
-            df.to_excel(out_xlsx, index=False)
-            print("  (checkpoint saved)")
-        page.wait_for_timeout(250)
-
-    df.to_excel(out_xlsx, index=False)
-    print(f"✔ Done. Saved → {out_xlsx}")
-    safe_close(browser, pw)
+    # rows the portal would refuse never reach it (recomputed each run, not journaled)
+    check = check_pen_roster(df.loc[list(idx_map.values())])
+    report(check, out_xlsx, "students")
+    for orig_idx, why in check.rejects["reason"].items():
+        df.at[orig_idx, "release_status"] = "Skipped (bad DOB)" if is_dob_reason(why) else "Skipped (bad PEN)"
+    # a repeated student must not get a second request: only its first row goes
+    dups = DedupIndex(lookup_keys(df.loc[check.good, "student_pen"], check.dob[check.good]))
+    good = set(dups.leaders(check.good))
+    idx_map = {row_idx: orig_idx for row_idx, orig_idx in idx_map.items() if orig_idx in good}
+
+    settled = set()  # rows with a FINAL outcome; the journal is only finished when all are
+
+    def settle(orig_idx, outcome):
+        if outcome in FINAL:
+            journal_row(orig_idx)
+            settled.add(orig_idx)
+
+    browser = pw = None
+    try:
+        if page is None and idx_map:
+            page, browser, pw = open_release_request_module()
+
+        if pages > 1 and len(idx_map) > 1:
+            async def work(apage, orig_idx, tag):
+                with TRACER.span("release.student"):
+                    outcome = await release_row_async(apage, df, orig_idx, tag)
+                settle(orig_idx, outcome)
+                return outcome, None
+
+            async def form_ready(apage):
+                await apage.wait_for_selector(REL_PEN_INPUT, timeout=PAGE_TIMEOUT)
+
+            _results, stats = run_async_pool(snapshot_session(page), list(idx_map.values()), work,
+                                             prepare=form_ready, pages=pages)
+            print("\n–––– PAGE THROUGHPUT ––––")
+            for s in stats:
+                print(s.line())
+        else:
+            processed = 0
+            for orig_idx in idx_map.values():
+                with TRACER.span("release.student"):
+                    outcome = release_row(page, df, orig_idx, f"({processed+1}/{len(idx_map)}) ")
+                settle(orig_idx, outcome)
+                if outcome in ("done", "error"):
+                    processed += 1
+    finally:
+        # whatever was raised so far is saved, even when the loop broke off
+        dups.fan_out(df, ["release_status", "release_checked_at"])
+        if write:
+            save_frame(df, out_xlsx, excel=excel)
+        if settled >= set(idx_map.values()):
+            journal.finish()
+        else:
+            print(f"⚠ {len(set(idx_map.values()) - settled)} students without a final outcome – "
+                  f"the journal stays open, so the next run retries only them")
+        journal.close()
+        safe_close(browser, pw)
+    print(f"✔ Done. Saved → {out_xlsx}" if write else "✔ Done.")
+    print(dups.line())
+    READY.report()
+    LIMITER.report()
+    POPUPS.report()
+    return df
 
 
 if __name__ == "__main__":
-    get_student_school_request()
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Generate release requests for students of other schools.")
+    ap.add_argument("--fresh", action="store_true",
+                    help="ignore the run journal of an interrupted run and start over")
+    ap.add_argument("--pages", type=int, default=int(os.getenv("UDISE_PAGES", DEFAULT_PAGES)),
+                    help=f"concurrent pages in one async browser (capped at {MAX_PAGES})")
+    ap.add_argument("--trust-hours", type=float, default=TRUST_HOURS,
+                    help="reuse status-stage schools and earlier 'raised' outcomes at most this "
+                         "old instead of re-checking them (default $UDISE_TRUST_HOURS or 0 = off)")
+    ap.add_argument("--trace", action="store_true", help="write a timing report + Chrome trace")
+    args = ap.parse_args()
+    if args.trace:
+        TRACER.enable()
+    get_student_school_request(fresh=args.fresh, pages=max(1, min(args.pages, MAX_PAGES)),
+                               trust_hours=args.trust_hours)
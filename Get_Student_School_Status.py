@@ -7,181 +7,448 @@
 
 import os
 import time
-from datetime import datetime
-import pandas as pd
+from collections import Counter
+from core.lazy import async_api, sync_api
 from dotenv import load_dotenv
-from playwright.sync_api import TimeoutError
 from core.browser_utils import safe_close, PAGE_TIMEOUT
 from core.navigation_pen import login_and_land
-
-
-
-def wait_for_student_refresh(page, pen: str, stud_name: str = "", timeout=15_000):
+from core.api_client import ApiMode
+from core.async_pool import run_async_pool, DEFAULT_PAGES, MAX_PAGES
+from core.dates import normalize_ddmmyyyy, stamp
+from core.dedup import DedupIndex, lookup_keys
+from core.frame_store import load_frame, save_frame, type_columns
+from core.lookup_cache import LookupCache, MISS
+from core.popups import (
+    CONFIRM_LABELS, DISMISS_LABELS, POPUPS, dismiss, dismiss_async, resolve,
+)
+from core.run_journal import RunJournal, journal_path
+from core.readiness import READY
+from core.rate_limit import LIMITER
+from core.selectors import (
+    DOB_INPUT_LOC, GO_BTN_LOC, IMPORT_BTN_SEL, IMPORT_DATE_SEL, IMPORT_SECTION_SEL,
+    PEN_INPUT_LOC, POPUP, POPUP_CANCEL, POPUP_CONFIRM, SCHOOL_NAME_LOC,
+)
+from core.tracing import TRACER
+from core.validate import check_pen_roster, is_dob_reason, is_pen, report
+from core.worker_pool import snapshot_session
+
+
+REFRESH_TIMEOUT = 15_000  # ms, ceiling for the searched student to show up
+
+# the student has loaded once the body text shows the PEN (or the name)
+_REFRESHED_JS = """
+(args) => {
+    const body = document.body ? document.body.innerText : '';
+    if (!body) return false;
+    if (args.pen && body.includes(args.pen)) return true;
+    if (args.name && body.includes(args.name)) return true;
+    return false;
+}"""
+
+
+def wait_for_student_refresh(page, pen: str, stud_name: str = "", timeout=REFRESH_TIMEOUT):
     """
     Wait until the page finishes loading the requested student.
     We treat the load as done when the body text contains the new PEN
     (preferred) or, if that never shows, when it contains the student name.
+    The wait is learned from the refreshes seen so far (never above *timeout*).
     """
-    expr = """
-    (args) => {
-        const body = document.body ? document.body.innerText : '';
-        if (!body) return false;
-        if (args.pen && body.includes(args.pen)) return true;
-        if (args.name && body.includes(args.name)) return true;
-        return false;
-    }"""
+    timer = READY.timer("school-refresh", timeout)
+    t0 = time.perf_counter()
     try:
-        page.wait_for_function(expr, arg={"pen": pen, "name": stud_name}, timeout=timeout)
-    except TimeoutError:
+        page.wait_for_function(_REFRESHED_JS, arg={"pen": pen, "name": stud_name}, timeout=timer.value)
+    except sync_api.TimeoutError:
         # fallthrough—best effort; caller will still try to read
-        pass
-    # small settle for DOM paints
-    page.wait_for_timeout(500)
-
-# ---------- date helpers ----------
-
-def normalize_ddmmyyyy(value):
-    """Return DD/MM/YYYY from mixed inputs; None if can't parse."""
-    if pd.isna(value):
-        return None
-    if hasattr(value, "strftime"):
-        return value.strftime("%d/%m/%Y")
-    s = str(value).strip()
-    if len(s) == 10 and s[2] == "/" and s[5] == "/":  # already good
-        return s
-    for fmt in ("%Y-%m-%d", "%d-%m-%Y", "%m/%d/%Y"):
-        try:
-            return datetime.strptime(s, fmt).strftime("%d/%m/%Y")
-        except ValueError:
-            continue
-    return None
+        return
+    timer.observe((time.perf_counter() - t0) * 1000)
 
 
-# ---------- selectors ----------
-# Top search inputs
-PEN_INPUT_LOC = "ul.SerachBoxus input.mat-mdc-input-element"
-DOB_INPUT_LOC = "ul.SerachBoxus input.mat-mdc-input-element"
-GO_BTN_LOC    = "ul.SerachBoxus button:has-text('Go')"
+async def wait_for_student_refresh_async(page, pen, stud_name="", timeout=REFRESH_TIMEOUT):
+    """:func:`wait_for_student_refresh` on an async page."""
+    timer = READY.timer("school-refresh", timeout)
+    t0 = time.perf_counter()
+    try:
+        await page.wait_for_function(_REFRESHED_JS, arg={"pen": pen, "name": stud_name}, timeout=timer.value)
+    except async_api.TimeoutError:
+        return  # best effort, as in the sync version
+    timer.observe((time.perf_counter() - t0) * 1000)
 
-# Current + previous school name spans (we'll take first)
-SCHOOL_NAME_LOC = "li:has(> span.titleUser:has-text('School Name')) span.userValue"
 
-# Import panel (shown only when student is UN-TAGGED)
-IMPORT_SECTION_SEL = "ul.existingSchool1 li:has(label:has-text('Import Section')) select"
-IMPORT_DATE_SEL    = "ul.existingSchool1 li:has(label:has-text('Date of Admission')) input"
-IMPORT_BTN_SEL     = "ul.existingSchool1 button:has-text('IMPORT')"
+# columns restored from the run journal on resume
+JOURNAL_COLS = ("school_name", "prev_school_name", "import_status", "school_checked_at")
 
 
 # ---------- SweetAlert helper ----------
 
-def handle_import_popups(page,
-                         confirm_timeout=15_000,
-                         success_timeout=10_000,
-                         settle_ms=300):
+@TRACER.traced("popup.import")
+def handle_import_popups(page, confirm_timeout=15_000, success_timeout=10_000):
     """
-    Handle the two-step SweetAlert sequence after clicking IMPORT:
+    Handle the two-step SweetAlert sequence after clicking IMPORT
+    (see :func:`core.popups.resolve`):
 
     1) Confirm dialog:  Cancel (red, class=swal2-confirm) + Confirm (blue, class=swal2-cancel).
-       We must click the *Confirm* button (blue).
-    2) Success dialog:  'Okay' (class=swal2-confirm). Click to dismiss.
+       We must click the *Confirm* button (blue): by label, else by class,
+       else the last button.
+    2) Success dialog:  'Okay' (class=swal2-confirm). Click to dismiss;
+       best effort, it does not always come.
 
     Returns True if we clicked Confirm (i.e., attempted import), else False.
     """
-
-    # --- wait for confirm popup ---
-    try:
-        page.wait_for_selector("div.swal2-popup.swal2-show", timeout=confirm_timeout)
-    except TimeoutError:
+    confirm = resolve(page, "import-confirm", confirm_timeout, press=CONFIRM_LABELS,
+                      classes=(POPUP_CANCEL,), last=True, required=True)
+    if confirm is None or not confirm.pressed:
         return False
+    resolve(page, "import-success", success_timeout, press=DISMISS_LABELS, classes=(POPUP_CONFIRM,))
+    return True
 
-    # scope to the currently visible popup
-    popup = page.locator("div.swal2-popup.swal2-show").last
-
-    # find buttons in confirm popup
-    btns = popup.locator("button.swal2-styled")
-    clicked_confirm = False
-
-    # try explicit text match first (more robust than class)
-    for label in ("Confirm", "Yes", "OK", "Okey", "Okay"):
-        loc = popup.locator(f"button.swal2-styled:has-text('{label}')")
-        if loc.count():
-            try:
-                loc.click()
-                clicked_confirm = True
-                break
-            except Exception:
-                pass
-
-    if not clicked_confirm:
-        # known class inversion: blue Confirm carries class swal2-cancel
-        if popup.locator("button.swal2-cancel").count():
-            try:
-                popup.locator("button.swal2-cancel").click()
-                clicked_confirm = True
-            except Exception:
-                pass
-
-    if not clicked_confirm:
-        # fallback: click the *last* styled button (visually Confirm in your screenshots)
-        try:
-            btns.last.click()
-            clicked_confirm = True
-        except Exception:
-            pass
+# ---------- per-student steps ----------
 
-    # give the request a beat to fire
-    page.wait_for_timeout(settle_ms)
+def fetch_school(page, pen, dob, stud_name=""):
+    """Search PEN + DOB in the Import Module.
 
-    # --- wait for success popup (best-effort) ---
-    if clicked_confirm:
+    Returns ``{"school": current, "prev_school": previous}`` or ``None`` when
+    no school panel appears (error popup is dismissed).
+    """
+    # Locate PEN & DOB inputs fresh each loop to avoid stale handles
+    pen_input = page.locator(PEN_INPUT_LOC).nth(0)
+    dob_input = page.locator(DOB_INPUT_LOC).nth(1)
+
+    # fill
+    pen_input.scroll_into_view_if_needed()
+    pen_input.click()
+    pen_input.fill("")
+    pen_input.fill(pen)
+
+    dob_input.click()
+    dob_input.fill("")
+    dob_input.fill(dob)
+
+    with LIMITER.call():
+        # submit; the search XHR has answered by the time the step exits
+        with READY.step(page, "school-search", baseline_ms=500):
+            page.click(GO_BTN_LOC)
+        wait_for_student_refresh(page, pen, stud_name)
+
+        # wait for school name(s) or popup – whichever renders first
         try:
-            page.wait_for_selector("div.swal2-popup.swal2-icon-success.swal2-show",
-                                   timeout=success_timeout)
-            success_pop = page.locator("div.swal2-popup.swal2-icon-success.swal2-show").last
-
-            # buttons: Usually only 'Okay' (swal2-confirm)
-            ok_clicked = False
-            for label in ("Okay", "Ok", "Okey", "Close"):
-                loc = success_pop.locator(f"button.swal2-styled:has-text('{label}')")
-                if loc.count():
-                    try:
-                        loc.click()
-                        ok_clicked = True
-                        break
-                    except Exception:
-                        pass
-
-            if not ok_clicked and success_pop.locator("button.swal2-confirm").count():
-                try:
-                    success_pop.locator("button.swal2-confirm").click()
-                except Exception:
-                    pass
-
-            # wait for it to vanish (don’t block too long)
-            try:
-                page.wait_for_selector("div.swal2-popup.swal2-icon-success.swal2-show",
-                                       state="detached", timeout=5_000)
-            except TimeoutError:
-                pass
-
-        except TimeoutError:
-            # no success popup? ignore
-            pass
-
-    return clicked_confirm
+            READY.wait_for(page, f"{SCHOOL_NAME_LOC}, div.swal2-popup", "school-result", 10_000)
+            if not page.locator(SCHOOL_NAME_LOC).count():
+                raise sync_api.TimeoutError("error popup instead of school")
+        except sync_api.TimeoutError:
+            # close the error popup, if that is what came
+            dismiss(page, classes=(POPUP_CONFIRM,))
+            return None
+
+    school_locator = page.locator(SCHOOL_NAME_LOC)
+    count = school_locator.count()
+    current_school = school_locator.first.inner_text().strip()
+    prev_school = school_locator.nth(1).inner_text().strip() if count > 1 else ""
+    return {"school": current_school, "prev_school": prev_school}
+
+
+async def fetch_school_async(page, pen, dob, stud_name=""):
+    """:func:`fetch_school` on an async page (see :mod:`core.async_pool`)."""
+    pen_input = page.locator(PEN_INPUT_LOC).nth(0)
+    dob_input = page.locator(DOB_INPUT_LOC).nth(1)
+    await pen_input.fill(pen)
+    await dob_input.fill(dob)
+
+    async with LIMITER.call_async():
+        async with READY.step(page, "school-search", baseline_ms=500):
+            await page.click(GO_BTN_LOC)
+        await wait_for_student_refresh_async(page, pen, stud_name)
+
+        try:
+            await READY.wait_for_async(page, f"{SCHOOL_NAME_LOC}, {POPUP}", "school-result", 10_000)
+            if not await page.locator(SCHOOL_NAME_LOC).count():
+                raise async_api.TimeoutError("error popup instead of school")
+        except async_api.TimeoutError:
+            await dismiss_async(page, classes=(POPUP_CONFIRM,))
+            return None
+
+    names = [n.strip() for n in await page.locator(SCHOOL_NAME_LOC).all_inner_texts()]
+    return {"school": names[0], "prev_school": names[1] if len(names) > 1 else ""}
+
+
+def fetch_school_api(page, api, pen, dob, stud_name=""):
+    """:func:`fetch_school` through API mode (see :mod:`core.api_client`).
+
+    The import panel is only rendered by the form, so callers that need to
+    import an UN-TAGGED student must still run :func:`fetch_school` first.
+    """
+    return api.lookup(lambda: fetch_school(page, pen, dob, stud_name), {"pen": pen, "dob": dob})
+
+
+def is_untagged(school):
+    return school.replace(" ", "").upper() == "UN-TAGGED"
+
+
+@TRACER.traced("school.import")
+def import_student(page, df, idx, dob):
+    """Import an UN-TAGGED student into our school using the row's
+    ddlSection + TxtDateOfAddmission. Returns ``(status_text, imported)``
+    where imported is True/False, or None when skipped."""
+    # Which section to import?
+    sec_letter_raw = str(df.at[idx, "ddlSection"]).strip().upper()
+    sec_letter = ""
+    if sec_letter_raw.startswith("A"): sec_letter = "A"
+    elif sec_letter_raw.startswith("B"): sec_letter = "B"
+    # Map letter -> value in dropdown
+    sec_val = "1" if sec_letter == "A" else "2" if sec_letter == "B" else "-1"
+
+    adm_raw = df.at[idx, "TxtDateOfAddmission"]
+    adm_date = normalize_ddmmyyyy(adm_raw) or dob  # fallback to DOB if blank
+
+    if sec_val not in ("1", "2"):
+        print("   ↳ Import skipped: no ddlSection in file")
+        return "Skipped (no section)", None
+
+    try:
+        # select section
+        page.wait_for_selector(IMPORT_SECTION_SEL, timeout=5_000)
+        page.select_option(IMPORT_SECTION_SEL, value=sec_val)
+
+        # date of admission
+        if adm_date:
+            page.fill(IMPORT_DATE_SEL, "")
+            page.fill(IMPORT_DATE_SEL, adm_date)
+
+        with LIMITER.call():
+            page.click(IMPORT_BTN_SEL)
+
+            # 2‑step SweetAlert (Confirm -> Okay)
+            confirmed = handle_import_popups(page)
+        if not confirmed:
+            print("   ↳ WARN: import confirm popup not detected.")
+
+        print(f"   ↳ Imported section {sec_letter} on {adm_date}")
+        return f"Imported ({sec_letter}/{adm_date})", True
+    except Exception as imp_err:
+        print(f"   ↳ IMPORT ERROR: {imp_err}")
+        return f"Import FAIL: {imp_err}", False
+
+
+def has_usable_pen(pen):
+    """False for the failure markers Get_PEN.py writes instead of a PEN
+    (anything that is not the portal's 11 digits)."""
+    return is_pen(pen)
+
+
+def set_col(df, idx, col, val):
+    if col not in df.columns:
+        df[col] = ""
+    df.at[idx, col] = val
+
+
+def cached_school(df, idx, cache):
+    """Fill the row from *cache*. Returns ``"tagged"`` / ``"not_found"``, or
+    None on a miss."""
+    dob = normalize_ddmmyyyy(df.at[idx, "TxtDateOfBirth"]) if "TxtDateOfBirth" in df.columns else None
+    hit = cache.get_school(str(df.at[idx, "student_pen"]).strip(), dob) if dob else MISS
+    if hit is MISS:
+        return None
+    if hit is None:
+        df.at[idx, "school_name"] = "Not Found"
+        df.at[idx, "import_status"] = "Skipped (no school)"
+        return "not_found"
+    df.at[idx, "school_name"] = hit["school"]
+    df.at[idx, "school_checked_at"] = stamp(hit["ts"])
+    if hit["prev_school"]:
+        set_col(df, idx, "prev_school_name", hit["prev_school"])
+    df.at[idx, "import_status"] = "No Import (tagged)"
+    return "tagged"
+
+
+@TRACER.traced("school.student")
+def lookup_school_row(page, df, idx, api_mode=None, cache=None, tag=""):
+    """Look up one row's school (importing it when UN-TAGGED) and write the
+    result into *df*. Returns one of ``"bad_dob"``, ``"not_found"``,
+    ``"tagged"``, ``"imported"``, ``"import_fail"``, ``"import_skipped"``,
+    ``"error"``."""
+    pen, dob, stud_name = school_inputs(df, idx, tag)
+    if dob is None:
+        return "bad_dob"
+
+    try:
+        if api_mode is not None:
+            result = fetch_school_api(page, api_mode, pen, dob, stud_name)
+        else:
+            result = fetch_school(page, pen, dob, stud_name)
+        status = record_school(df, idx, result, pen, dob, stud_name, cache, tag)
+        if status != "untagged":
+            return status
+
+        # ---------- Auto-import when UN-TAGGED ----------
+        if api_mode is not None:
+            # API answer has no import panel; render it via the form
+            fetch_school(page, pen, dob, stud_name)
+        status, imported = import_student(page, df, idx, dob)
+        df.at[idx, "import_status"] = status
+        return {True: "imported", False: "import_fail", None: "import_skipped"}[imported]
+
+    except Exception as e:
+        return school_error(df, idx, e, pen, stud_name, tag)
+
+
+@TRACER.traced("school.student")
+async def lookup_school_row_async(page, df, idx, cache=None, tag=""):
+    """:func:`lookup_school_row` on an async page. An UN-TAGGED student is
+    not imported here but returned as ``"untagged"``; the caller imports it
+    on its own page afterwards (imports change portal data, so they stay
+    one at a time)."""
+    pen, dob, stud_name = school_inputs(df, idx, tag)
+    if dob is None:
+        return "bad_dob"
+    try:
+        result = await fetch_school_async(page, pen, dob, stud_name)
+        return record_school(df, idx, result, pen, dob, stud_name, cache, tag)
+    except Exception as e:
+        return school_error(df, idx, e, pen, stud_name, tag)
+
+
+def school_inputs(df, idx, tag=""):
+    """``(pen, dob, name)`` of a row; dob is None (and the row marked) when
+    it cannot be parsed."""
+    pen = str(df.at[idx, "student_pen"]).strip()
+    raw_dob = df.at[idx, "TxtDateOfBirth"] if "TxtDateOfBirth" in df.columns else ""
+    dob = normalize_ddmmyyyy(raw_dob)
+    stud_name = str(df.at[idx, "TxtStudName"]) if "TxtStudName" in df.columns else pen
+    if dob is None:
+        mark_bad_dob(df, idx)
+        print(f"✗ {tag}{stud_name} → bad DOB ({raw_dob})")
+    return pen, dob, stud_name
+
+
+def mark_bad_dob(df, idx):
+    df.at[idx, "school_name"] = "DOB Parse Fail"
+    df.at[idx, "import_status"] = "Skipped (DOB)"
+
+
+def record_school(df, idx, result, pen, dob, stud_name, cache=None, tag=""):
+    """Write a search *result* into the row. Returns ``"not_found"``,
+    ``"tagged"`` or ``"untagged"`` (import still to do)."""
+    if cache is not None and not (result and is_untagged(result["school"])):
+        cache.put_school(pen, dob, result)
+    df.at[idx, "school_checked_at"] = stamp()
+
+    if result is None:
+        df.at[idx, "school_name"] = "Not Found"
+        df.at[idx, "import_status"] = "Skipped (no school)"
+        print(f"→ {tag}{stud_name} (PEN {pen}) … NOT FOUND  [{LIMITER}]")
+        return "not_found"
+
+    current_school = result["school"]
+    df.at[idx, "school_name"] = current_school
+    if result.get("prev_school"):
+        set_col(df, idx, "prev_school_name", result["prev_school"])
+    print(f"→ {tag}{stud_name} (PEN {pen}) … {current_school}  [{LIMITER}]")
+    if not is_untagged(current_school):
+        df.at[idx, "import_status"] = "No Import (tagged)"
+        return "tagged"
+    return "untagged"
+
+
+def school_error(df, idx, e, pen, stud_name, tag=""):
+    df.at[idx, "school_name"] = f"Error: {str(e)[:30]}"
+    df.at[idx, "import_status"] = f"Error: {str(e)[:30]}"
+    print(f"→ {tag}{stud_name} (PEN {pen}) … ERROR ({e})")
+    return "error"
+
+
+def search_on_pages(page, df, todo, cache, journal_row, counts, pages, admit=None):
+    """Search every row of *todo* on *pages* async pages; returns the
+    UN-TAGGED rows, which still need the import on *page*.
+
+    *admit(idx)*, when given, is called first for each row – on the event
+    loop's thread, like every other write to *df* here – and returns False
+    for a row that needs no search after all."""
+    untagged = []
+
+    async def work(apage, idx, tag):
+        if admit is not None and not admit(idx):
+            return "settled", None
+        status = await lookup_school_row_async(apage, df, idx, cache, tag)
+        if status == "untagged":
+            untagged.append(idx)
+        elif status != "error":
+            journal_row(idx)
+        return status, None
+
+    async def form_ready(apage):
+        await apage.wait_for_selector(GO_BTN_LOC, timeout=PAGE_TIMEOUT)
+
+    _results, stats = run_async_pool(snapshot_session(page), todo, work,
+                                     prepare=form_ready, pages=pages)
+    print("\n–––– PAGE THROUGHPUT ––––")
+    for s in stats:
+        print(s.line())
+        counts.update({k: v for k, v in s.counts.items() if k not in ("untagged", "settled")})
+    if untagged:
+        print(f"→ {len(untagged)} UN-TAGGED students to import")
+    return untagged
+
 
 # ---------- main ----------
+@TRACER.traced("stage.status")
 def get_school_by_pen(
     in_xlsx="students_extracted_with_PEN.xlsx",
     out_xlsx="students_extracted_with_PEN_school.xlsx",
+    api=False,
+    use_cache=True,
+    fresh=False,
+    page=None,
+    df=None,
+    write=True,
+    excel=True,
+    stream=None,
+    pages=DEFAULT_PAGES,
 ):
+    """Look up the current school of every student with a usable PEN and
+    import the UN-TAGGED ones. ``api=True`` switches the lookup (not the
+    import) to direct JSON calls after the first form search.
+
+    Without *stream*, rows whose PEN is not 11 digits or whose DOB cannot
+    be used are sorted out before login in one pass (:mod:`core.validate`);
+    they are listed in ``<out_xlsx>.rejects.csv``.
+
+    A student listed more than once (same PEN and DOB) is searched once and
+    the answer copied to the other rows (:mod:`core.dedup`); in stream mode
+    the index grows as the rows arrive.
+
+    Tagged / not-found answers are kept in the lookup cache for
+    ``SCHOOL_TTL_HOURS`` (:mod:`core.lookup_cache`); cached rows are filled
+    in before login.
+    UN-TAGGED answers are never cached since they still need an import.
+    Every answer stamps ``school_checked_at`` (the cache's own time for a
+    cached one), which the release stage's trust window reads.
+
+    Each finished student is appended to a run journal; a crashed run picks
+    up where it stopped (``fresh=True`` starts over) and the workbook is
+    written once at the end.
+
+    Pass *page* (already on the Import Module, e.g. from run_pipeline.py) to
+    reuse a browser; it is then left open for the caller.
+
+    *df* replaces reading *in_xlsx* with an in-memory frame; ``write=False``
+    skips saving the result and ``excel=False`` keeps it to the working copy
+    (:mod:`core.frame_store`). The result is returned.
+
+    *stream* is an iterable of ``(idx, fields)`` from the PEN lookup (see
+    :class:`core.streaming.Handoff`): *df* is then the roster and each row is
+    looked up as soon as its PEN arrives instead of after the whole file.
+
+    With ``pages > 1`` the searches run on that many pages of one async
+    browser (:mod:`core.async_pool`); UN-TAGGED students are imported on
+    *page* once they are done. API mode keeps to the single page."""
     load_dotenv()
     user, pwd = os.getenv("SSG_USER"), os.getenv("SSG_PASS")
-    if not (user and pwd):
+    if page is None and not (user and pwd):
         raise SystemExit("Set SSG_USER & SSG_PASS in .env")
 
     # Load data
-    df = pd.read_excel(in_xlsx)
+    df = load_frame(in_xlsx) if df is None else type_columns(df.copy())
+    if stream is not None and "student_pen" not in df.columns:
+        df["student_pen"] = ""  # filled in as PEN results stream in
 
     # Ensure required cols
     if "student_pen" not in df.columns:
@@ -194,156 +461,158 @@ def get_school_by_pen(
         df["ddlSection"] = ""     # fallback
     if "TxtDateOfAddmission" not in df.columns:  # note user spelled Addmission
         df["TxtDateOfAddmission"] = ""
+    if "school_checked_at" not in df.columns:
+        df["school_checked_at"] = ""  # when the portal gave school_name
+    if pages > 1 and "prev_school_name" not in df.columns:
+        df["prev_school_name"] = ""  # no column added while other pages write rows
+
+    pw = browser = api_mode = None
+    counts = Counter()
+    dups = DedupIndex()
+
+    journal = RunJournal(journal_path(out_xlsx), fresh=fresh)
+    cache = LookupCache() if use_cache else None
+
+    def journal_row(idx):
+        journal.record(str(df.at[idx, "student_pen"]).strip(),
+                       {c: df.at[idx, c] for c in JOURNAL_COLS if c in df.columns})
+
+    def needs_portal(idx):
+        """False when the row is settled without the portal; journal and
+        cache answers are filled in here."""
+        if not has_usable_pen(df.at[idx, "student_pen"]):
+            return False
+        counts["eligible"] += 1
+        if stream is not None:
+            dob = normalize_ddmmyyyy(df.at[idx, "TxtDateOfBirth"]) if "TxtDateOfBirth" in df.columns else None
+            dups.add(idx, f"{str(df.at[idx, 'student_pen']).strip()}|{dob}" if dob else None)
+        if idx in dups.leader_of:
+            counts["duplicate"] += 1  # filled from its first row at the end
+            return False
+        rec = journal.get(str(df.at[idx, "student_pen"]).strip())
+        if rec is not None:
+            for col, val in rec.items():
+                set_col(df, idx, col, val)
+            counts["journal"] += 1
+            return False
+        status = cached_school(df, idx, cache) if cache is not None else None
+        if status is None:
+            return True
+        counts[status] += 1
+        counts["cache"] += 1
+        return False
+
+    def triage(indices):
+        """Rows that still need the portal."""
+        return (idx for idx in indices if needs_portal(idx))
 
-    # Filter: only rows with usable PEN
-    bad_markers = {"Wrong Aadhaar/YOB", "Bad DOB", "No Aadhaar", "", None, pd.NA}
-    eligible_idx = []
-    for i, pen in enumerate(df["student_pen"]):
-        p = str(pen).strip() if not pd.isna(pen) else ""
-        if p and p not in bad_markers and not p.startswith("Error"):
-            eligible_idx.append(i)
+    arrived = {}  # idx -> fields from the PEN lookup, until the row is taken up
 
-    print(f"→ {len(eligible_idx)} students eligible for school lookup.")
+    def arrivals():
+        """Indices as the PEN lookup hands them over.  Nothing is written to
+        *df* here: the async pages advance this in a worker thread."""
+        for idx, fields in stream:
+            arrived[idx] = fields
+            yield idx
 
-    pw = browser = page = None
-    found_schl = not_found_schl = imported_cnt = import_fail = 0
+    def take_up(idx):
+        """Write a streamed row's fields into *df* and triage it."""
+        for col, val in arrived.pop(idx).items():
+            set_col(df, idx, col, val)
+        return needs_portal(idx)
+
+    completed = False
 
     try:
-        pw, browser, page = login_and_land(user, pwd)  # lands on Import Module search page
-        print("✓ Landed on Import Module Go page.")
-
-        for n, idx in enumerate(eligible_idx, start=1):
-            pen = str(df.at[idx, "student_pen"]).strip()
-            raw_dob = df.at[idx, "TxtDateOfBirth"] if "TxtDateOfBirth" in df.columns else ""
-            dob = normalize_ddmmyyyy(raw_dob)
-            stud_name = str(df.at[idx, "TxtStudName"]) if "TxtStudName" in df.columns else pen
-
-            if dob is None:
-                df.at[idx, "school_name"] = "DOB Parse Fail"
-                df.at[idx, "import_status"] = "Skipped (DOB)"
-                print(f"✗ [{n}] {stud_name} → bad DOB ({raw_dob})")
-                not_found_schl += 1
-                continue
-
-            print(f"→ [{n}/{len(eligible_idx)}] {stud_name} (PEN {pen}) …", end="")
-
-            try:
-                # Locate PEN & DOB inputs fresh each loop to avoid stale handles
-                pen_input = page.locator(PEN_INPUT_LOC).nth(0)
-                dob_input = page.locator(DOB_INPUT_LOC).nth(1)
-
-                # fill
-                pen_input.scroll_into_view_if_needed()
-                pen_input.click()
-                pen_input.fill("")
-                pen_input.fill(pen)
-
-                dob_input.click()
-                dob_input.fill("")
-                dob_input.fill(dob)
-
-                # submit
-                page.click(GO_BTN_LOC)
-                wait_for_student_refresh(page, pen, stud_name)
-
-                # wait for school name(s) or popup
-                try:
-                    page.wait_for_selector(SCHOOL_NAME_LOC, timeout=10_000)
-                    school_locator = page.locator(SCHOOL_NAME_LOC)
-                    count = school_locator.count()
-                    current_school = school_locator.first.inner_text().strip()
-                    prev_school = school_locator.nth(1).inner_text().strip() if count > 1 else ""
-
-                    df.at[idx, "school_name"] = current_school
-                    if prev_school:
-                        col = "prev_school_name"
-                        if col not in df.columns:
-                            df[col] = ""
-                        df.at[idx, col] = prev_school
-
-                    found_schl += 1
-                    print(f" {current_school}")
-
-                    # ---------- Auto-import when UN-TAGGED ----------
-                    if current_school.replace(" ", "").upper() == "UN-TAGGED":
-                        # Which section to import?
-                        sec_letter_raw = str(df.at[idx, "ddlSection"]).strip().upper()
-                        sec_letter = ""
-                        if sec_letter_raw.startswith("A"): sec_letter = "A"
-                        elif sec_letter_raw.startswith("B"): sec_letter = "B"
-                        # Map letter -> value in dropdown
-                        sec_val = "1" if sec_letter == "A" else "2" if sec_letter == "B" else "-1"
-
-                        adm_raw = df.at[idx, "TxtDateOfAddmission"]
-                        adm_date = normalize_ddmmyyyy(adm_raw) or dob  # fallback to DOB if blank
-
-                        if sec_val in ("1","2"):
-                            try:
-                                # select section
-                                page.wait_for_selector(IMPORT_SECTION_SEL, timeout=5_000)
-                                page.select_option(IMPORT_SECTION_SEL, value=sec_val)
-
-                                # date of admission
-                                if adm_date:
-                                    page.fill(IMPORT_DATE_SEL, "")
-                                    page.fill(IMPORT_DATE_SEL, adm_date)
-
-                                page.click(IMPORT_BTN_SEL)
-
-                                # 2‑step SweetAlert (Confirm -> Okay)
-                                confirmed = handle_import_popups(page)
-                                if not confirmed:
-                                    print("   ↳ WARN: import confirm popup not detected.")
-
-                                df.at[idx, "import_status"] = f"Imported ({sec_letter}/{adm_date})"
-                                imported_cnt += 1
-                                print(f"   ↳ Imported section {sec_letter} on {adm_date}")
-                            except Exception as imp_err:
-                                df.at[idx, "import_status"] = f"Import FAIL: {imp_err}"
-                                import_fail += 1
-                                print(f"   ↳ IMPORT ERROR: {imp_err}")
-                        else:
-                            df.at[idx, "import_status"] = "Skipped (no section)"
-                            print("   ↳ Import skipped: no ddlSection in file")
-
-                    else:
-                        df.at[idx, "import_status"] = "No Import (tagged)"
-
-                except TimeoutError:
-                    # see if there's an error popup
-                    if page.is_visible("div.swal2-popup"):
-                        click_any_swal_confirm(page)
-                    df.at[idx, "school_name"] = "Not Found"
-                    df.at[idx, "import_status"] = "Skipped (no school)"
-                    not_found_schl += 1
-                    print(" NOT FOUND")
-
-            except Exception as e:
-                df.at[idx, "school_name"] = f"Error: {str(e)[:30]}"
-                df.at[idx, "import_status"] = f"Error: {str(e)[:30]}"
-                not_found_schl += 1
-                print(f" ERROR ({e})")
-
-            # Friendly pacing
-            page.wait_for_timeout(250)
-
-            # Checkpoint autosave
-            if n % 25 == 0:
-                df.to_excel(out_xlsx, index=False)
-                print(f"   (checkpoint saved @ {n})")
+        if stream is None:
+            # PEN format and DOB checked for the whole file before any search
+            check = check_pen_roster(df)
+            report(check, out_xlsx, "students")
+            for idx, why in check.rejects["reason"].items():
+                if is_dob_reason(why):
+                    mark_bad_dob(df, idx)
+                    counts["eligible"] += 1
+                    counts["bad_dob"] += 1
+            dups = DedupIndex(lookup_keys(df.loc[check.good, "student_pen"], check.dob[check.good]))
+            todo = list(triage(check.good))
+            print(f"→ {counts['eligible']} students eligible for school lookup.")
+            if counts["journal"]:
+                print(f"→ {counts['journal']} restored from journal (not counted below).")
+            if counts["duplicate"]:
+                print(f"→ {counts['duplicate']} repeat an earlier row (not counted below).")
+            if cache is not None:
+                print(f"→ {counts['cache']} answered from cache, {len(todo)} to look up.")
+        else:
+            # on async pages each row is taken up by its worker, on the loop thread
+            on_pages = pages > 1 and not api
+            todo = arrivals() if on_pages else (idx for idx in arrivals() if take_up(idx))
+
+        if todo and page is None:
+            pw, browser, page = login_and_land(user, pwd)  # lands on Import Module search page
+            print("✓ Landed on Import Module Go page.")
+        if todo and api:
+            api_mode = ApiMode("school", page)
+        elif todo and pages > 1:
+            todo = search_on_pages(page, df, todo, cache, journal_row, counts, pages,
+                                   admit=take_up if stream is not None else None)
+
+        for n, idx in enumerate(todo, start=1):
+            tag = f"[{n}/{len(todo)}] " if stream is None else f"[school {n}] "
+            status = lookup_school_row(page, df, idx, api_mode, cache, tag)
+            counts[status] += 1
+            if status != "error":
+                journal_row(idx)
+        completed = True
 
     finally:
+        if api_mode is not None:
+            api_mode.close()
+        dups.fan_out(df, JOURNAL_COLS)
         # Always persist
         try:
-            df.to_excel(out_xlsx, index=False)
+            if write:
+                save_frame(df, out_xlsx, excel=excel)
         except Exception as e:
             print(f"⚠ could not write {out_xlsx}: {e}")
+            completed = False  # keep the journal so the next run can rebuild it
+        if completed:
+            journal.finish()
+        journal.close()
         safe_close(browser, pw)
+        found_schl = sum(counts[k] for k in ("tagged", "imported", "import_fail", "import_skipped"))
+        not_found_schl = sum(counts[k] for k in ("bad_dob", "not_found", "error"))
         print("\n–––– SCHOOL LOOKUP + IMPORT SUMMARY ––––")
+        if stream is not None:
+            print(f"eligible: {counts['eligible']} | from journal: {counts['journal']} "
+                  f"| from cache: {counts['cache']}")
         print(f"school found: {found_schl} | not found/error: {not_found_schl}")
-        print(f"imported: {imported_cnt} | import fail: {import_fail}")
-        print(f"Saved → {out_xlsx}")
-
+        print(f"imported: {counts['imported']} | import fail: {counts['import_fail']}")
+        print(dups.line())
+        READY.report()
+        LIMITER.report()
+        POPUPS.report()
+        if cache is not None:
+            print(cache.summary())
+            cache.close()
+        if write:
+            print(f"Saved → {out_xlsx}")
+    return df
 
 if __name__ == "__main__":
-    get_school_by_pen()
+    import argparse
+
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--api", action="store_true",
+                    help="call the portal's JSON endpoint directly after the first lookup")
+    ap.add_argument("--pages", type=int, default=int(os.getenv("UDISE_PAGES", DEFAULT_PAGES)),
+                    help=f"concurrent pages in one async browser (capped at {MAX_PAGES})")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="ignore the lookup cache and query the portal for every student")
+    ap.add_argument("--fresh", action="store_true",
+                    help="ignore the run journal of an interrupted run and start over")
+    ap.add_argument("--trace", action="store_true", help="write a timing report + Chrome trace")
+    args = ap.parse_args()
+    if args.trace:
+        TRACER.enable()
+    get_school_by_pen(api=args.api, use_cache=not args.no_cache, fresh=args.fresh,
+                      pages=max(1, min(args.pages, MAX_PAGES)))
@@ -1,95 +1,81 @@
-"""Navigate to each pending grade/section and open the student table.
-   Actual per‑student update logic will be plugged in later.
+"""Navigate to each pending grade/section and progress its Pending students.
+
+   Each section is updated as one batch (core.dom_extractors.update_section):
+   values are planned up front, filled in with one evaluate (row by row for
+   any row it cannot fill), saved with the portal's bulk save when it has
+   one and checked with one re-read.
 
    Reuses core modules so nothing is duplicated.
 """
 
-import time
 import os
 from dotenv import load_dotenv
-from playwright.sync_api import TimeoutError
-from core.browser_utils import safe_close, PAGE_TIMEOUT
+from core.browser_utils import safe_close
 from core.navigation import login_and_land
-from core.dom_extractors import robust_click_view_update
+from core.dom_extractors import update_section
+from core.popups import POPUPS
+from core.run_journal import RunJournal
+from core.readiness import READY
+from core.rate_limit import LIMITER
+from core.tracing import TRACER
+from core.section_queue import run_sections
+
+JOURNAL_FILE = "update_pending.journal.jsonl"
+
 
+@TRACER.traced("stage.update")
+def open_pending_detail_pages(fresh=False, page=None):
+    """Iterate over every *Pending* row, open its detail table and update it.
 
-def open_pending_detail_pages():
-    """Iterate over every *Pending* row and simply open its detail table."""
+    Finished sections are journaled so a crashed run does not re-open (and
+    re-submit) them; ``fresh=True`` ignores the journal. Pass *page* (already
+    on the Progression Summary) to reuse a browser; it is left open."""
     load_dotenv()
     user, pwd = os.getenv("SSG_USER"), os.getenv("SSG_PASS")
-    if not (user and pwd):
+    if page is None and not (user and pwd):
         raise SystemExit("Set SSG_USER & SSG_PASS in .env")
 
-    pw, browser, page = login_and_land(user, pwd)
-
-    processed = set()
-
-    while True:
-        rows = page.query_selector_all("div.example-container table[mat-table] tbody tr")
-        pending_rows = [
-            r
-            for r in rows
-            if r.query_selector("td.cdk-column-status")
-            and r.query_selector("td.cdk-column-status").inner_text().strip() == "Pending"
-        ]
-        pending_rows = [
-            r
-            for r in pending_rows
-            if (
-                r.query_selector("td.cdk-column-className").inner_text().strip(),
-                r.query_selector("td.cdk-column-sectionName").inner_text().strip(),
-            )
-            not in processed
-        ]
-        if not pending_rows:
-            break
-
-        for row in pending_rows:
-            grade = row.query_selector("td.cdk-column-className").inner_text().strip()
-            section = row.query_selector("td.cdk-column-sectionName").inner_text().strip()
-            key = (grade, section)
-            print(f"→ Opening detail for {grade}_{section} …")
-            # time.sleep(3)
-            if not robust_click_view_update(row, grade, section, page):
-                print(f"⚠ click failed for {grade}_{section}")
-                processed.add(key)
-                continue
-
-            try:
-                page.wait_for_selector("table.mat-mdc-table", timeout=PAGE_TIMEOUT)
-            except TimeoutError:
-                print(f"⚠ detail table timeout for {grade}_{section}")
-                processed.add(key)
-                page.go_back()
-                page.wait_for_selector(
-                    "div.example-container table[mat-table] button.btn-primary", timeout=PAGE_TIMEOUT
-                )
-                continue
-
-            # ------- YOU WILL ADD UPDATE LOGIC HERE --------
-            time.sleep(3)
-            student_count = len(page.query_selector_all("table.mat-mdc-table tbody tr"))
-            print(f"   ✓ loaded table ({student_count} rows) → ready for updates")
-            # ------------------------------------------------
-            from core.dom_extractors import update_student_row
-
-            updated = 0
-            for tr in page.query_selector_all("table.mat-mdc-table tbody tr"):
-                if update_student_row(tr, section, page):  # add page param
-                    updated += 1
-            print(f"   ✓ updated {updated} pending students")
-            page.wait_for_timeout(500)
-
-
-            processed.add(key)
-            page.go_back()
-            page.wait_for_selector(
-                "div.example-container table[mat-table] button.btn-primary", timeout=PAGE_TIMEOUT
-            )
-
+    journal = RunJournal(JOURNAL_FILE, fresh=fresh)
+    processed = {tuple(rec["key"]) for rec in journal.done.values()}
+
+    pw = browser = None
+    try:
+        if page is None:
+            pw, browser, page = login_and_land(user, pwd)
+
+        def update(page, info):
+            updated, unfilled, failed, mode = update_section(page, info.section)
+            print(f"   ✓ updated {updated} pending students" + (f" ({mode} save)" if mode else ""))
+            for name in unfilled:
+                print(f"   ⚠ no inputs to fill, left Pending: {name}")
+            for name in failed:
+                print(f"   ⚠ still Pending: {name}")
+            if failed:
+                raise RuntimeError(f"{len(failed)} students still Pending")  # queued again
+            if not unfilled:  # otherwise the next run opens the section again
+                journal.record(f"{info.grade}_{info.section}", {"key": info.key, "updated": updated})
+
+        # summary read once, sections queued with retries (core.section_queue)
+        run = run_sections(page, update, done=processed, name="update")
+        journal.finish()  # not reached when interrupted: the next run resumes from the journal
+    finally:
+        journal.close()
+        safe_close(browser, pw)
     print("✔ All pending sections opened (Pending Students Updated ;)")
-    safe_close(browser, pw)
+    run.report()
+    READY.report()
+    LIMITER.report()
+    POPUPS.report()
 
 
 if __name__ == "__main__":
-    open_pending_detail_pages()
+    import argparse
+
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--fresh", action="store_true",
+                    help="ignore the run journal of an interrupted run and start over")
+    ap.add_argument("--trace", action="store_true", help="write a timing report + Chrome trace")
+    args = ap.parse_args()
+    if args.trace:
+        TRACER.enable()
+    open_pending_detail_pages(fresh=args.fresh)
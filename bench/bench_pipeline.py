@@ -0,0 +1,122 @@
+"""Benchmark: run each script against the portal simulator, students/minute.
+
+Starts :mod:`bench.portal_sim` in-process on a free port, writes the matching
+``students_extracted.xlsx`` into a scratch folder and runs the scripts there
+one after another, exactly as an operator would, pointed at the simulator
+(``UDISE_PORTAL``, a canned CAPTCHA answer, headless).  Each script's
+output goes to ``<script>.log`` in the scratch folder.
+
+    python -m bench.bench_pipeline --students 200 --latency 300 --jitter 100
+    python -m bench.bench_pipeline --students 500 --fail-rate 0.02 --workers 4 --api
+    python -m bench.bench_pipeline --pipeline --stream     # run_pipeline.py instead
+    python -m bench.bench_pipeline --pages 4               # async engine, 4 pages per lookup stage
+
+``--no-lean`` turns off request blocking and the asset cache (see
+core.browser_utils) to compare against; each script's log ends with its
+network totals.  ``--keep`` leaves the scratch folder (workbooks, journals,
+logs) behind.
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from bench.portal_sim import start, write_roster_xlsx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (label, script, output workbook whose rows are the students handled;
+#  None = count what the simulator saw progressed)
+SCRIPTS = [
+    ("extract", "main_extractor.py", "UDISE.xlsx"),
+    ("update", "Update_Pending.py", None),
+    ("pen", "Get_PEN.py", "students_extracted_with_PEN.xlsx"),
+    ("status", "Get_Student_School_Status.py", "students_extracted_with_PEN_school.xlsx"),
+    ("release", "Get_Student_School_Request.py", "students_release_requests.xlsx"),
+]
+
+
+def count_rows(path):
+    """Rows over every sheet of *path*; 0 when the script wrote nothing."""
+    if not os.path.exists(path):
+        return 0
+    return sum(len(df) for df in pd.read_excel(path, sheet_name=None).values())
+
+
+def run_script(label, cmd, workdir, env):
+    with open(os.path.join(workdir, f"{label}.log"), "w", encoding="utf-8") as log:
+        t0 = time.perf_counter()
+        proc = subprocess.run(cmd, cwd=workdir, env=env,
+                              stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT)
+    return time.perf_counter() - t0, proc.returncode
+
+
+def main(args):
+    srv, portal, url = start(args.students, args.latency, args.jitter, args.fail_rate, args.seed,
+                             bulk_update=not args.no_bulk)
+    workdir = tempfile.mkdtemp(prefix="udise_bench_")
+    write_roster_xlsx(portal.students, os.path.join(workdir, "students_extracted.xlsx"))
+
+    env = dict(os.environ, UDISE_PORTAL=url, UDISE_CAPTCHA="static:SIM", UDISE_HEADLESS="1",
+               SSG_USER="bench", SSG_PASS="bench", PYTHONPATH=ROOT,
+               PYTHONUNBUFFERED="1", PYTHONIOENCODING="utf-8")
+    if args.no_lean:
+        env.update(UDISE_BLOCK="0", UDISE_ASSET_CACHE="0")
+    if args.pages > 1:
+        env["UDISE_PAGES"] = str(args.pages)  # default of every script's --pages
+    pen_flags = [f"--workers={args.workers}"] + (["--api"] if args.api else []) + ["--no-cache", "--fresh"]
+    status_flags = (["--api"] if args.api else []) + ["--no-cache", "--fresh"]
+
+    if args.pipeline:
+        runs = [("pipeline", ["run_pipeline.py", "--stages", "pen", "status", "release"]
+                 + (["--stream"] if args.stream else []), "students_release_requests.xlsx")]
+    else:
+        runs = [(label, [script] + {"pen": pen_flags, "status": status_flags}.get(label, ["--fresh"]), out)
+                for label, script, out in SCRIPTS]
+
+    print(f"simulator {url}: {args.students} students, {args.latency:.0f}±{args.jitter:.0f} ms, "
+          f"{args.fail_rate:.0%} failures | scratch {workdir}")
+    print(f"{'script':<10} {'students':>9} {'seconds':>9} {'per min':>9}  exit")
+    results = []
+    try:
+        for label, (script, *flags), out in runs:
+            before = portal.progressed
+            secs, code = run_script(label, [sys.executable, os.path.join(ROOT, script), *flags], workdir, env)
+            n = count_rows(os.path.join(workdir, out)) if out else portal.progressed - before
+            results.append((label, n, secs, code))
+            print(f"{label:<10} {n:>9} {secs:>9.1f} {n / secs * 60 if secs else 0:>9.1f}  {code}")
+    finally:
+        srv.shutdown()
+        stats = portal.stats({})[1]
+        print(f"portal: {stats['progressed']} progressed, {stats['imports']} imports, {stats['releases']} release requests, "
+              f"calls {stats['calls']}")
+        if args.keep:
+            print(f"kept {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--students", type=int, default=200)
+    ap.add_argument("--latency", type=float, default=300, help="mean API latency in ms")
+    ap.add_argument("--jitter", type=float, default=100, help="latency standard deviation in ms")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="share of API calls answered with HTTP 500")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--workers", type=int, default=1, help="passed on to Get_PEN.py")
+    ap.add_argument("--api", action="store_true", help="passed on to Get_PEN.py / Get_Student_School_Status.py")
+    ap.add_argument("--pages", type=int, default=1,
+                    help="async pages for the PEN / status / release lookups (UDISE_PAGES)")
+    ap.add_argument("--pipeline", action="store_true", help="time run_pipeline.py pen→status→release instead")
+    ap.add_argument("--stream", action="store_true", help="with --pipeline: passed on to run_pipeline.py")
+    ap.add_argument("--no-bulk", action="store_true", help="simulator without the Update All bulk save")
+    ap.add_argument("--no-lean", action="store_true", help="no request blocking / asset cache (baseline)")
+    ap.add_argument("--keep", action="store_true", help="keep the scratch folder")
+    main(ap.parse_args())
@@ -0,0 +1,70 @@
+"""Benchmark: load/save time of a roster in Excel vs the working formats.
+
+Builds a synthetic roster shaped like ``students_extracted_with_PEN.xlsx``
+(Aadhaar, names, dates, PEN, school columns) with N rows and times
+:func:`core.frame_store.write_frame` / :func:`read_frame` for each format.
+Parquet is skipped when pyarrow is not installed.
+
+    python -m bench.bench_storage --rows 1000 10000 50000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+from core.frame_store import HAVE_PARQUET, read_frame, write_frame
+
+
+def fixture_roster(n, seed=7):
+    rnd = random.Random(seed)
+    return pd.DataFrame({
+        "TxtStudName": [f"STUDENT {i}" for i in range(n)],
+        "aadharId": [rnd.randrange(10**11, 10**12) for _ in range(n)],
+        "TxtDateOfBirth": pd.to_datetime("2010-01-01")
+                          + pd.to_timedelta([rnd.randrange(3650) for _ in range(n)], unit="D"),
+        "ddlSection": [rnd.choice("AB") for _ in range(n)],
+        "TxtDateOfAddmission": [f"{rnd.randrange(1, 29):02d}/04/2025" for _ in range(n)],
+        "student_pen": [str(rnd.randrange(10**10, 10**11)) for _ in range(n)],
+        "school_name": [f"GOVT SCHOOL {rnd.randrange(200)}" for _ in range(n)],
+        "import_status": [rnd.choice(["No Import (tagged)", "Imported (A/01/04/2025)"]) for _ in range(n)],
+    })
+
+
+def _time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main(sizes, repeat):
+    formats = [".xlsx", ".sqlite"] + ([".parquet"] if HAVE_PARQUET else [])
+    print(f"{'rows':>7} {'format':<8} {'save ms':>10} {'load ms':>10} {'size KB':>9} {'vs xlsx':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            df = fixture_roster(n)
+            base = None
+            for ext in formats:
+                path = os.path.join(tmp, f"roster_{n}{ext}")
+                t_save = _time(lambda: write_frame(df, path), repeat)
+                t_load = _time(lambda: read_frame(path), repeat)
+                back = read_frame(path)
+                assert len(back) == n and back["aadharId"].str.len().eq(12).all()
+                total = t_save + t_load
+                base = base or total
+                print(f"{n:>7} {ext[1:]:<8} {t_save:>10.0f} {t_load:>10.0f} "
+                      f"{os.path.getsize(path) / 1024:>9.0f} {base / total:>7.1f}x")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    main(args.rows, args.repeat)
@@ -0,0 +1,96 @@
+"""Micro-benchmark: per-cell ``query_selector`` vs one ``page.evaluate``.
+
+Renders a static copy of the Progression Summary + section detail
+mat-tables (same classes the portal uses) with N rows each, then times the
+old per-row readers against :mod:`core.table_reader`.
+
+    python -m bench.bench_table_extract --rows 50 200 1000
+"""
+
+import argparse
+import time
+
+from playwright.sync_api import sync_playwright
+
+from core.table_reader import SUMMARY_ROWS, DETAIL_ROWS, read_summary, read_detail
+
+
+def fixture_html(n):
+    summary = "".join(
+        f"<tr><td class='cdk-column-className'>Class {i % 12 + 1}</td>"
+        f"<td class='cdk-column-sectionName'>{'AB'[i % 2]}{i}</td>"
+        f"<td class='cdk-column-status'>{'Pending' if i % 3 else 'Done'}</td>"
+        f"<td><button class='btn-primary'>View/Update</button></td></tr>"
+        for i in range(n)
+    )
+    detail = "".join(
+        f"<tr><td class='cdk-column-studentName'><span class='fw-bold'>Student {i}</span></td>"
+        f"<td class='cdk-column-status'>{'Pending' if i % 3 else 'Done'}</td>"
+        f"<td class='cdk-column-updateDetails'><span class='fw-bold'>01/04/2025</span></td></tr>"
+        for i in range(n)
+    )
+    return (
+        "<html><body>"
+        f"<div class='example-container'><table mat-table><tbody>{summary}</tbody></table></div>"
+        f"<table class='mat-mdc-table'><tbody>{detail}</tbody></table>"
+        "</body></html>"
+    )
+
+
+# ---------- the readers as they were before core.table_reader ----------
+
+def old_summary(page):
+    out = []
+    for r in page.query_selector_all(SUMMARY_ROWS):
+        if r.query_selector("td.cdk-column-status") and r.query_selector("td.cdk-column-status").inner_text().strip() == "Pending":
+            out.append((r.query_selector("td.cdk-column-className").inner_text().strip(),
+                        r.query_selector("td.cdk-column-sectionName").inner_text().strip()))
+    return out
+
+
+def old_detail(page):
+    out = []
+    for tr in page.query_selector_all(DETAIL_ROWS):
+        try:
+            out.append((
+                tr.query_selector("td.cdk-column-studentName span.fw-bold").inner_text().strip(),
+                tr.query_selector("td.cdk-column-status").inner_text().strip(),
+                tr.query_selector("td.cdk-column-updateDetails span.fw-bold").inner_text().strip(),
+            ))
+        except Exception:
+            continue
+    return out
+
+
+def _time(fn, page, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(page)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main(sizes, repeat):
+    with sync_playwright() as pw:
+        browser = pw.chromium.launch(headless=True)
+        page = browser.new_page()
+        print(f"{'rows':>6} {'table':<8} {'per-cell ms':>12} {'evaluate ms':>12} {'speed-up':>9}")
+        for n in sizes:
+            page.set_content(fixture_html(n))
+            new_pending = [r.key for r in read_summary(page) if r.status == "Pending"]
+            assert new_pending == old_summary(page)
+            assert [tuple(r[1:]) for r in read_detail(page)] == old_detail(page)
+            for label, old, new in (("summary", old_summary, read_summary),
+                                    ("detail", old_detail, read_detail)):
+                t_old, t_new = _time(old, page, repeat), _time(new, page, repeat)
+                print(f"{n:>6} {label:<8} {t_old:>12.1f} {t_new:>12.1f} {t_old / t_new:>8.0f}x")
+        browser.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, nargs="+", default=[50, 200, 1000])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    main(args.rows, args.repeat)
@@ -0,0 +1,526 @@
+"""Offline stand-in for the UDISE+ portal, for tests and benchmarks.
+
+A small single-page app that renders the same elements the scripts target –
+login form, ``Go to 2025-26`` year button, the side menus, the Progression
+Summary mat-table and section detail table (with the per-row progression
+inputs and an "Update All" bulk save, ``--no-bulk`` hides it), the Import
+Module with the
+"Get PEN & DOB" modal and ``ul.SerachBoxus`` PEN + DOB search (including
+the UN-TAGGED import panel), the Student Release Request form and swal2
+popups – backed by a JSON API so every lookup is a real XHR, just like the
+Angular front-end.
+
+Latency (mean ± jitter) and the share of failing calls (HTTP 500, shown as
+an error popup) are configurable, and the roster is generated from a seed:
+
+    python -m bench.portal_sim --students 500 --latency 300 --fail-rate 0.02
+    UDISE_PORTAL=http://127.0.0.1:8800 UDISE_CAPTCHA=static:SIM python Get_PEN.py
+
+``--roster`` also writes the matching ``students_extracted.xlsx``.  The
+CAPTCHA is a fixed image and any answer is accepted, so
+``UDISE_CAPTCHA=static:SIM`` (or ``none``) logs in unattended.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from core.validate import verhoeff_digit
+
+OUR_SCHOOL = "SMT. SAROJINI NAIDU GIRLS HIGH SCHOOL"
+OTHER_SCHOOLS = [f"GOVT PRIMARY SCHOOL NO. {n}" for n in range(1, 21)]
+UNTAGGED = "UN-TAGGED"
+
+
+# ---------- synthetic roster ----------
+
+def make_roster(n, seed=1, wrong_aadhaar=0.05, untagged=0.2, ours=0.3, pending=0.6):
+    """``n`` students with everything the portal knows about them.
+
+    Aadhaar numbers carry a valid Verhoeff check digit.
+    ``aadhaar_in_roster`` differs from the portal's Aadhaar for a
+    *wrong_aadhaar* share: half of them are typos (one digit changed, which
+    core.validate catches offline), half another valid number that the PEN
+    search does not find.
+    """
+    rnd = random.Random(seed)
+
+    def new_aadhaar():
+        body = str(rnd.randrange(2 * 10**10, 10**11))
+        return body + verhoeff_digit(body)
+
+    def wrong(aadhaar):
+        if rnd.random() < 0.5:
+            return new_aadhaar()
+        pos = rnd.randrange(1, 12)
+        return aadhaar[:pos] + str((int(aadhaar[pos]) + rnd.randrange(1, 10)) % 10) + aadhaar[pos + 1:]
+
+    students = []
+    for i in range(n):
+        dob = date(2010, 1, 1) + timedelta(days=rnd.randrange(3650))
+        aadhaar = new_aadhaar()
+        r = rnd.random()
+        school = UNTAGGED if r < untagged else OUR_SCHOOL if r < untagged + ours else rnd.choice(OTHER_SCHOOLS)
+        students.append({
+            "name": f"STUDENT {i:05d}",
+            "aadhaar": aadhaar,
+            "aadhaar_in_roster": aadhaar if rnd.random() >= wrong_aadhaar else wrong(aadhaar),
+            "dob": dob.strftime("%d/%m/%Y"),
+            "pen": str(20_000_000_000 + i),
+            "school": school,
+            "prev_school": rnd.choice(OTHER_SCHOOLS),
+            "grade": f"Class {i % 8 + 1}",
+            "section": "AB"[(i // 8) % 2],
+            "status": "Pending" if rnd.random() < pending else "Done",
+            "progressed": "",
+        })
+    return students
+
+
+def write_roster_xlsx(students, path="students_extracted.xlsx"):
+    """The school's own roster, as Get_PEN.py expects it."""
+    import pandas as pd
+
+    pd.DataFrame({
+        "TxtStudName": [s["name"] for s in students],
+        "aadharId": [int(s["aadhaar_in_roster"]) for s in students],
+        "TxtDateOfBirth": pd.to_datetime([s["dob"] for s in students], format="%d/%m/%Y"),
+        "ddlSection": [s["section"] for s in students],
+        "TxtDateOfAddmission": ["01/04/2025"] * len(students),
+    }).to_excel(path, index=False)
+
+
+# ---------- portal state + JSON API ----------
+
+class Portal:
+    def __init__(self, students, latency_ms=300, jitter_ms=100, fail_rate=0.0, seed=1, bulk_update=True):
+        self.students = students
+        self.by_aadhaar = {s["aadhaar"]: s for s in students}
+        self.by_pen = {s["pen"]: s for s in students}
+        self.latency_ms, self.jitter_ms, self.fail_rate = latency_ms, jitter_ms, fail_rate
+        self.rnd = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.imports = []
+        self.progressed = 0
+        self.bulk_update = bulk_update
+        self.releases = {}
+        self.sessions = set()
+
+    def delay(self):
+        with self.lock:
+            ms = max(0.0, self.rnd.gauss(self.latency_ms, self.jitter_ms))
+            fail = self.rnd.random() < self.fail_rate
+        time.sleep(ms / 1000)
+        return fail
+
+    def count(self, name):
+        with self.lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    # each handler returns (status, payload)
+
+    def login(self, body):
+        token = f"sim-{self.rnd.randrange(10**9)}"
+        with self.lock:
+            self.sessions.add(token)
+        return 200, {"token": token}
+
+    def menu(self, body):
+        return 200, {"items": ["Progression Summary Section Wise"]}
+
+    def summary(self, body):
+        sections = {}
+        for s in self.students:
+            sec = sections.setdefault((s["grade"], s["section"]), {"pending": 0, "total": 0})
+            sec["total"] += 1
+            sec["pending"] += s["status"] == "Pending"
+        return 200, {"rows": [
+            {"className": g, "sectionName": sec, "status": "Pending" if v["pending"] else "Done",
+             "total": v["total"], "pending": v["pending"]}
+            for (g, sec), v in sorted(sections.items())
+        ]}
+
+    def section(self, body):
+        return 200, {"bulk": self.bulk_update, "rows": [
+            {"pen": s["pen"], "studentName": s["name"], "status": s["status"],
+             "updateDetails": s["progressed"] or "-"}
+            for s in self.students if (s["grade"], s["section"]) == (body["className"], body["sectionName"])
+        ]}
+
+    def section_update(self, body):
+        today = date.today().strftime("%d/%m/%Y")
+        with self.lock:
+            for u in body["updates"]:
+                s = self.by_pen.get(u["pen"])
+                if s is not None and s["status"] == "Pending":
+                    s["status"], s["progressed"] = "Done", today
+                    self.progressed += 1
+        return 200, {"updated": len(body["updates"])}
+
+    def pen(self, body):
+        s = self.by_aadhaar.get(str(body.get("aadhaar")))
+        if s is None or s["dob"][-4:] != str(body.get("yob")):
+            return 200, {"status": False, "message": "No record found"}
+        return 200, {"status": True, "data": {"studentPen": s["pen"], "dob": s["dob"]}}
+
+    def school(self, body):
+        s = self.by_pen.get(str(body.get("pen")))
+        if s is None or s["dob"] != body.get("dob"):
+            return 200, {"status": False, "message": "Student not found"}
+        return 200, {"status": True, "data": {
+            "pen": s["pen"], "name": s["name"], "schoolName": s["school"], "prevSchoolName": s["prev_school"]}}
+
+    def import_(self, body):
+        s = self.by_pen.get(str(body.get("pen")))
+        if s is None or s["school"] != UNTAGGED:
+            return 200, {"status": False, "message": "Student is not un-tagged"}
+        with self.lock:
+            s["school"] = OUR_SCHOOL
+            self.imports.append(s["pen"])
+        return 200, {"status": True}
+
+    def release_details(self, body):
+        return self.school(body)
+
+    def release_raise(self, body):
+        pen = str(body.get("pen"))
+        with self.lock:
+            if pen in self.releases:
+                return 200, {"status": False, "message": "Release request already pending for this student"}
+            self.releases[pen] = f"RR{len(self.releases) + 1:06d}"
+            return 200, {"status": True, "requestNo": self.releases[pen]}
+
+    def stats(self, body):
+        with self.lock:
+            return 200, {"calls": dict(self.calls), "progressed": self.progressed, "imports": len(self.imports),
+                         "releases": len(self.releases), "students": len(self.students)}
+
+    ROUTES = {
+        "login": login, "menu": menu, "summary": summary, "section": section, "section/update": section_update,
+        "pen": pen, "school": school, "import": import_,
+        "release/details": release_details, "release/raise": release_raise, "_stats": stats,
+    }
+    NO_DELAY = {"login", "_stats"}
+
+
+# ---------- front-end ----------
+
+APP_HTML = r"""<!doctype html>
+<html><head><meta charset="utf-8"><title>UDISE+ (simulator)</title>
+<style>
+ body { font-family: sans-serif; }
+ .modal, .swal2-popup { position: fixed; background: #fff; border: 1px solid #666; padding: 1em; }
+ .modal { top: 10%; left: 20%; z-index: 5; }
+ .swal2-popup { top: 30%; left: 35%; z-index: 10; }
+</style></head>
+<body><div id="app"></div>
+<script>
+const BASE = "/p2/v1";
+const app = document.getElementById("app");
+const esc = (s) => String(s).replace(/[&<>"]/g, (c) => ({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"}[c]));
+const $ = (sel) => document.querySelector(sel);
+
+async function api(path, body) {
+  const r = await fetch("/api/" + path, {
+    method: "POST",
+    headers: {"Content-Type": "application/json", "Authorization": "Bearer " + (sessionStorage.getItem("token") || "")},
+    body: JSON.stringify(body || {}),
+  });
+  if (r.status === 401) { location.href = BASE + "/login?state-id=124"; throw new Error("401"); }
+  if (!r.ok) throw new Error("Server error (HTTP " + r.status + ")");
+  return r.json();
+}
+
+function swal(kind, title, buttons) {
+  return new Promise((resolve) => {
+    const box = document.createElement("div");
+    box.className = "swal2-container";
+    box.innerHTML = `<div class="swal2-popup swal2-show swal2-icon-${kind}"><h2 class="swal2-title">${esc(title)}</h2>` +
+      `<div class="swal2-actions">` +
+      buttons.map(([cls, label], i) => `<button class="swal2-styled ${cls}" data-i="${i}">${label}</button>`).join("") +
+      `</div></div>`;
+    box.querySelectorAll("button").forEach((b) => b.onclick = () => { box.remove(); resolve(+b.dataset.i); });
+    document.body.appendChild(box);
+  });
+}
+const fail = (msg) => swal("error", msg, [["swal2-confirm", "OK"]]);
+
+function go(path) { history.pushState({}, "", BASE + path); render(); }
+window.onpopstate = () => render();
+document.addEventListener("keydown", (e) => { if (e.key === "Escape" && $("#penm")) $("#penm").remove(); });
+
+function shell(inner) {
+  app.innerHTML = `
+  <header><div class="filter2" onclick="go('/home')">Go to 2025-26</div></header>
+  <nav>
+    <span class="HideMobile" onclick="$('#mv').style.display='block'">Student Movement and Progression</span>
+    <div id="mv" style="display:none">
+      <span class="HideMobile" onclick="progressionMenu()">Progression Activity</span>
+      <span class="HideMobile" onclick="go('/import')">Import Module</span>
+      <div id="pm"></div>
+    </div>
+    <span class="HideMobile" onclick="go('/release')">Student Release Request Management</span>
+  </nav>
+  <main>${inner}</main>`;
+}
+
+async function progressionMenu() {
+  await api("menu");
+  $("#pm").innerHTML = `<a class="AnText" onclick="go('/summary')">Progression Summary Section Wise</a>`;
+}
+
+// ---- login ----
+function loginPage() {
+  app.innerHTML = `<form id="login">
+    <input name="username"><input name="password" type="password">
+    <div><img alt="captcha" src="data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='90' height='30'%3E%3Ctext x='10' y='22' font-size='20'%3ESIM%3C/text%3E%3C/svg%3E">
+      <input name="captcha"></div>
+    <button type="submit">Login</button></form>`;
+  $("#login").onsubmit = async (e) => {
+    e.preventDefault();
+    const res = await api("login", {user: e.target.username.value});
+    sessionStorage.setItem("token", res.token);
+    document.cookie = "sim_session=" + res.token + "; path=/";
+    go("/home");
+  };
+}
+
+// ---- progression ----
+async function summaryPage() {
+  const res = await api("summary");
+  shell(`<div class="example-container"><table mat-table><tbody id="rows"></tbody></table></div>`);
+  $("#rows").innerHTML = res.rows.map((r) => `<tr>
+    <td class="cdk-column-className">${esc(r.className)}</td>
+    <td class="cdk-column-sectionName">${esc(r.sectionName)}</td>
+    <td class="cdk-column-status">${r.status}</td>
+    <td class="cdk-column-totalStudent">${r.total}</td>
+    <td class="cdk-column-pendingStudent">${r.pending}</td>
+    <td><button class="btn btn-primary" onclick="go('/section?c=${encodeURIComponent(r.className)}&s=${r.sectionName}')">View/Update</button></td>
+  </tr>`).join("");
+}
+
+async function sectionPage(q) {
+  const res = await api("section", {className: q.get("c"), sectionName: q.get("s")});
+  const edit = (r) => r.status !== "Pending" ? "<td></td><td></td><td></td><td></td>" : `
+    <td class="cdk-column-progressionStatus"><select><option value="">Select</option>
+      <option value="1">Promoted/Passed</option><option value="2">Detained/Failed</option></select></td>
+    <td class="cdk-column-marks"><input></td>
+    <td class="cdk-column-attendance"><input></td>
+    <td class="cdk-column-section"><select><option value="1">A</option><option value="2">B</option></select></td>`;
+  shell(`<table class="mat-mdc-table"><tbody id="rows"></tbody></table>` +
+        (res.bulk ? `<button onclick="saveRows(null)">Update All</button>` : ""));
+  $("#rows").innerHTML = res.rows.map((r) => `<tr data-pen="${r.pen}">
+    <td class="cdk-column-studentName"><span class="fw-bold">${esc(r.studentName)}</span></td>
+    <td class="cdk-column-status">${r.status}</td>${edit(r)}
+    <td class="cdk-column-updateDetails"><span class="fw-bold">${esc(r.updateDetails)}</span>` +
+    (r.status === "Pending" ? `<button onclick="saveRows(this.closest('tr'))">Update</button>` : "") + `</td>
+  </tr>`).join("");
+}
+
+async function saveRows(only) {
+  const rows = only ? [only] : Array.from(document.querySelectorAll("#rows tr"));
+  const updates = rows.filter((tr) => tr.querySelector("select")).map((tr) => ({
+    pen: tr.dataset.pen,
+    progression: tr.querySelector(".cdk-column-progressionStatus select").value,
+    marks: tr.querySelector(".cdk-column-marks input").value,
+    days: tr.querySelector(".cdk-column-attendance input").value,
+  })).filter((u) => u.progression && u.marks && u.days);
+  let res;
+  try { res = await api("section/update", {updates}); }
+  catch (e) { return fail(e.message); }
+  await render();
+  await swal("success", `${res.updated} student(s) updated`, [["swal2-confirm", "OK"]]);
+}
+
+// ---- import module ----
+function importPage() {
+  shell(`<a onclick="penModal()">Get PEN &amp; DOB</a>
+    <ul class="SerachBoxus">
+      <li><input class="mat-mdc-input-element" placeholder="Enter PEN"></li>
+      <li><input class="mat-mdc-input-element" placeholder="DD/MM/YYYY"></li>
+      <li><button onclick="searchSchool()">Go</button></li>
+    </ul><div id="res"></div>`);
+}
+
+function penModal() {
+  const m = document.createElement("div");
+  m.className = "modal"; m.id = "penm";
+  m.innerHTML = `<input name="aadhaar" placeholder="Aadhaar"><input name="dob" placeholder="YOB">
+    <button onclick="searchPen()">Search</button><div id="penres"></div>`;
+  document.body.appendChild(m);
+}
+
+async function searchPen() {
+  $("#penres").innerHTML = "";
+  let res;
+  try { res = await api("pen", {aadhaar: $("input[name=aadhaar]").value, yob: $("input[name=dob]").value}); }
+  catch (e) { return fail(e.message); }
+  if (!res.status) return fail(res.message);
+  $("#penres").innerHTML = `<table class="table"><tbody><tr><td>${res.data.studentPen}</td><td>${res.data.dob}</td></tr></tbody></table>`;
+}
+
+async function searchSchool() {
+  const [pen, dob] = document.querySelectorAll("ul.SerachBoxus input");
+  $("#res").innerHTML = "";
+  let res;
+  try { res = await api("school", {pen: pen.value, dob: dob.value}); }
+  catch (e) { return fail(e.message); }
+  if (!res.status) return fail(res.message);
+  const d = res.data;
+  let html = `<p>PEN ${d.pen} – ${esc(d.name)}</p><ul>
+    <li><span class="titleUser">School Name</span><span class="userValue">${esc(d.schoolName)}</span></li>
+    <li><span class="titleUser">Previous School Name</span><span class="userValue">${esc(d.prevSchoolName)}</span></li></ul>`;
+  if (d.schoolName === "UN-TAGGED") {
+    html += `<ul class="existingSchool1">
+      <li><label>Import Section</label><select><option value="-1">Select</option><option value="1">A</option><option value="2">B</option></select></li>
+      <li><label>Date of Admission</label><input></li>
+      <li><button onclick="doImport('${d.pen}')">IMPORT</button></li></ul>`;
+  }
+  $("#res").innerHTML = html;
+}
+
+async function doImport(pen) {
+  // the portal's confirm dialog has the button classes swapped
+  const choice = await swal("question", "Are you sure?", [["swal2-confirm", "Cancel"], ["swal2-cancel", "Confirm"]]);
+  if (choice !== 1) return;
+  let res;
+  try { res = await api("import", {pen, section: $("ul.existingSchool1 select").value, date: $("ul.existingSchool1 input").value}); }
+  catch (e) { return fail(e.message); }
+  if (!res.status) return fail(res.message);
+  await swal("success", "Student imported successfully", [["swal2-confirm", "Okay"]]);
+}
+
+// ---- release requests ----
+function releasePage() {
+  shell(`<ul><li class="cardIcon"><h2>Student Release Request Management</h2><button onclick="go('/release/home')">Go</button></li></ul>`);
+}
+function releaseHome() {
+  shell(`<button onclick="go('/release/form')">Generate Student Release Request(s) Within State</button>`);
+}
+function releaseForm() {
+  shell(`<input placeholder="Enter PEN"><input placeholder="DD/MM/YYYY"><button onclick="details()">Get Details</button>
+    <ul id="det"></ul>
+    <div><p>Select Remark</p><select class="form-select" disabled><option value="">--</option><option value="1">Please release the student</option></select></div>
+    <button onclick="raiseRequest()">Generate Student Release Request</button>`);
+}
+
+async function details() {
+  $("#det").innerHTML = "";
+  $("select.form-select").disabled = true;
+  let res;
+  try { res = await api("release/details", {pen: $("input[placeholder='Enter PEN']").value, dob: $("input[placeholder='DD/MM/YYYY']").value}); }
+  catch (e) { return fail(e.message); }
+  if (!res.status) return fail(res.message);
+  $("#det").innerHTML = `<li><span class="title">School Name</span><span class="vlause">${esc(res.data.schoolName)}</span></li>`;
+  $("select.form-select").disabled = false;
+}
+
+async function raiseRequest() {
+  let res;
+  try { res = await api("release/raise", {pen: $("input[placeholder='Enter PEN']").value, remark: $("select.form-select").value}); }
+  catch (e) { return fail(e.message); }
+  if (res.status) await swal("success", "Request raised successfully. Request No: " + res.requestNo, [["swal2-confirm", "OK"]]);
+  else await fail(res.message);
+}
+
+// ---- router ----
+function render() {
+  const path = location.pathname.slice(BASE.length);
+  const q = new URLSearchParams(location.search);
+  if (path.startsWith("/login")) return loginPage();
+  if (!sessionStorage.getItem("token")) {
+    const m = document.cookie.match(/sim_session=([^;]+)/);
+    if (!m) return go("/login?state-id=124");
+    sessionStorage.setItem("token", m[1]);
+  }
+  if (path === "/summary") return summaryPage();
+  if (path === "/section") return sectionPage(q);
+  if (path === "/import") return importPage();
+  if (path === "/release") return releasePage();
+  if (path === "/release/home") return releaseHome();
+  if (path === "/release/form") return releaseForm();
+  shell(`<h3>Dashboard</h3>`);
+}
+render();
+</script></body></html>
+"""
+
+
+# ---------- server ----------
+
+def make_server(portal, host="127.0.0.1", port=8800):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body, ctype="application/json"):
+            data = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", ctype + "; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            path = urlsplit(self.path).path
+            if path.startswith("/p2/v1"):
+                return self._send(200, APP_HTML, "text/html")
+            if path == "/api/_stats":
+                return self._send(*portal.stats({}))
+            self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            name = urlsplit(self.path).path[len("/api/"):]
+            handler = Portal.ROUTES.get(name)
+            if handler is None:
+                return self._send(404, {"error": "not found"})
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if name not in Portal.NO_DELAY:
+                token = (self.headers.get("Authorization") or "").replace("Bearer ", "")
+                if token not in portal.sessions:
+                    return self._send(401, {"error": "session expired"})
+                portal.count(name)
+                if portal.delay():
+                    return self._send(500, {"error": "injected failure"})
+            self._send(*handler(portal, body))
+
+        def log_message(self, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def start(students=200, latency_ms=300, jitter_ms=100, fail_rate=0.0, seed=1, port=0, bulk_update=True):
+    """Start the simulator in a background thread; returns ``(server, portal, base_url)``."""
+    portal = Portal(make_roster(students, seed), latency_ms, jitter_ms, fail_rate, seed, bulk_update)
+    srv = make_server(portal, port=port)
+    threading.Thread(target=srv.serve_forever, daemon=True, name="portal-sim").start()
+    return srv, portal, f"http://127.0.0.1:{srv.server_address[1]}"
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--students", type=int, default=200)
+    ap.add_argument("--latency", type=float, default=300, help="mean API latency in ms")
+    ap.add_argument("--jitter", type=float, default=100, help="latency standard deviation in ms")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="share of API calls answered with HTTP 500")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--no-bulk", action="store_true", help="section pages without the Update All button")
+    ap.add_argument("--port", type=int, default=8800)
+    ap.add_argument("--roster", action="store_true", help="write students_extracted.xlsx for this roster")
+    args = ap.parse_args()
+    portal = Portal(make_roster(args.students, args.seed), args.latency, args.jitter, args.fail_rate, args.seed,
+                    bulk_update=not args.no_bulk)
+    if args.roster:
+        write_roster_xlsx(portal.students)
+        print("roster → students_extracted.xlsx")
+    srv = make_server(portal, port=args.port)
+    print(f"UDISE+ simulator on http://127.0.0.1:{args.port}/p2/v1/login?state-id=124  (Ctrl+C to stop)")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
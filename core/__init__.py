@@ -0,0 +1,6 @@
+"""Shared helpers for the UDISE+ automation scripts.
+
+Page selectors are in :mod:`core.selectors`, date parsing in
+:mod:`core.dates`; pandas and Playwright are imported on first use
+(:mod:`core.lazy`) so that ``--help`` and argument errors come back at once.
+"""
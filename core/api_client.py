@@ -0,0 +1,315 @@
+"""Optional "API mode": call the portal's JSON endpoints directly.
+
+The Angular front-end answers every lookup with one XHR.  The first time a
+lookup succeeds through the normal form we record the XHRs it fired, find the
+one whose request carries our inputs (Aadhaar/YOB or PEN/DOB) and whose
+response carries the values the page displayed, and turn it into a template:
+
+    request  → inputs replaced by ``{{name}}`` placeholders
+    response → JSON path of every displayed value
+
+Later lookups fill the template and send it through ``page.context.request``,
+which shares the browser's cookie jar and keeps connections alive, so no
+rendering or selector waits are involved.  Learned endpoints and every call
+made are written to ``api_capture.json``; :mod:`core.api_fixtures` replays that
+file as a local server for offline checks.
+
+Headers that carry the login (``Authorization`` & co.) are used for this
+run's calls but never written to the file.  A stored endpoint is therefore
+sent without them, and when the portal answers 401/403 the endpoint is
+forgotten and learned again from the next form lookup, with the live
+session's headers.
+"""
+
+import json
+import os
+from urllib.parse import urlsplit, urlunsplit
+
+from core.rate_limit import LIMITER
+from core.tracing import TRACER
+
+CAPTURE_FILE = "api_capture.json"
+MAX_API_FAILURES = 3  # consecutive failures before falling back to the form for good
+
+# headers the request context sets itself (or must not be replayed)
+_DROP_HEADERS = {"content-length", "cookie", "host", "connection", "accept-encoding"}
+# headers of the login session: replayed while it lasts, never saved
+_SESSION_HEADERS = {"authorization", "x-xsrf-token", "x-csrf-token"}
+
+
+class ApiError(Exception):
+    """Direct call failed (HTTP error, non-JSON body, …) – caller falls back to DOM."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status  # HTTP status, when the portal answered
+
+
+def _split_headers(headers):
+    """``(template headers, session headers)`` of a recorded request."""
+    keep = {k: v for k, v in headers.items() if k.lower() not in _DROP_HEADERS and not k.startswith(":")}
+    session = {k: v for k, v in keep.items() if k.lower() in _SESSION_HEADERS}
+    return {k: v for k, v in keep.items() if k not in session}, session
+
+
+# ---------- JSON helpers ----------
+
+def _same(a, b):
+    return str(a).strip() == str(b).strip()
+
+
+def _find_path(obj, value, path=()):
+    """First JSON path whose leaf equals *value*, or None."""
+    if isinstance(obj, dict):
+        items = obj.items()
+    elif isinstance(obj, list):
+        items = enumerate(obj)
+    else:
+        return path if _same(obj, value) else None
+    for k, v in items:
+        found = _find_path(v, value, path + (k,))
+        if found is not None:
+            return found
+    return None
+
+
+def _get_path(obj, path):
+    for k in path:
+        try:
+            obj = obj[k]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return obj
+
+
+def _templatize(obj, values):
+    """Replace leaves equal to an input value with ``{{name}}``."""
+    if isinstance(obj, dict):
+        return {k: _templatize(v, values) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_templatize(v, values) for v in obj]
+    for name, val in values.items():
+        if _same(obj, val):
+            # keep numeric inputs numeric when the template is filled again
+            return "{{%s|int}}" % name if isinstance(obj, int) else "{{%s}}" % name
+    return obj
+
+
+def _fill(obj, values):
+    if isinstance(obj, dict):
+        return {k: _fill(v, values) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_fill(v, values) for v in obj]
+    if isinstance(obj, str):
+        for name, val in values.items():
+            if obj == "{{%s|int}}" % name:
+                return int(val)
+            obj = obj.replace("{{%s}}" % name, str(val))
+    return obj
+
+
+def _rebase(url, base_url):
+    if not base_url:
+        return url
+    u, b = urlsplit(url), urlsplit(base_url)
+    return urlunsplit((b.scheme, b.netloc, u.path, u.query, u.fragment))
+
+
+# ---------- endpoint ----------
+
+class Endpoint:
+    """One learned request template + where the answers live in its response."""
+
+    def __init__(self, method, url, headers, body, result_paths, session_headers=None):
+        self.source_response = None
+        self.method = method
+        self.url = url
+        self.headers = headers
+        self.session_headers = session_headers or {}  # in memory only, see to_dict
+        self.body = body                  # JSON object, raw string or None
+        self.result_paths = result_paths  # {field: [path…]}
+
+    @classmethod
+    def learn(cls, exchanges, request_values, response_values):
+        """Pick the exchange that carries all inputs and the first output."""
+        required = next(iter(response_values))
+        for ex in exchanges:
+            raw = (ex["url"] or "") + (ex["post_data"] or "")
+            if not all(str(v) in raw for v in request_values.values()):
+                continue
+            paths = {}
+            for name, val in response_values.items():
+                p = _find_path(ex["response"], val) if val not in (None, "") else None
+                if p is not None:
+                    paths[name] = list(p)
+            if required not in paths:
+                continue
+
+            url = ex["url"]
+            for name, val in request_values.items():
+                url = url.replace(f"={val}", "={{%s}}" % name)
+            try:
+                body = _templatize(json.loads(ex["post_data"]), request_values)
+            except (TypeError, ValueError):
+                body = ex["post_data"]
+                for name, val in request_values.items():
+                    if body:
+                        body = body.replace(str(val), "{{%s}}" % name)
+            headers, session = _split_headers(ex["headers"])
+            ep = cls(ex["method"], url, headers, body, paths, session)
+            ep.source_response = ex["response"]
+            return ep
+        return None
+
+    def call(self, request_ctx, values, base_url=None):
+        """Issue the request. Returns ``(fields, raw_json)``; fields is None when
+        the response does not contain the first (required) field."""
+        url = _rebase(_fill(self.url, values), base_url)
+        body = _fill(self.body, values)
+        kwargs = {"method": self.method, "headers": {**self.headers, **self.session_headers}}
+        if body is not None:
+            kwargs["data"] = json.dumps(body) if isinstance(body, (dict, list)) else body
+        try:
+            resp = request_ctx.fetch(url, **kwargs)
+        except Exception as err:
+            raise ApiError(f"request failed: {err}")
+        if not resp.ok:
+            raise ApiError(f"HTTP {resp.status}", resp.status)
+        try:
+            data = resp.json()
+        except Exception:
+            raise ApiError("response is not JSON")
+
+        fields = {}
+        for name, path in self.result_paths.items():
+            val = _get_path(data, path)
+            if val is not None:
+                fields[name] = str(val).strip()
+        required = next(iter(self.result_paths))
+        return (fields if required in fields else None), data
+
+    def to_dict(self):
+        return {"method": self.method, "url": self.url, "headers": self.headers,
+                "body": self.body, "result_paths": self.result_paths}
+
+    @classmethod
+    def from_dict(cls, d):
+        headers, _session = _split_headers(d["headers"])  # files written before headers were split
+        return cls(d["method"], d["url"], headers, d["body"], d["result_paths"])
+
+
+# ---------- capture file ----------
+
+def load_capture(path=CAPTURE_FILE):
+    if not os.path.exists(path):
+        return {"endpoints": {}, "fixtures": []}
+    with open(path, encoding="utf-8") as fh:
+        data = json.load(fh)
+    for name, ep in data["endpoints"].items():
+        data["endpoints"][name] = Endpoint.from_dict(ep).to_dict()  # an older file's token is not saved again
+    return data
+
+
+def save_capture(data, path=CAPTURE_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, indent=1, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+class _Recorder:
+    """Collect every JSON XHR/fetch the page completes while active."""
+
+    def __init__(self, page):
+        self.page = page
+        self.exchanges = []
+
+    def _on_response(self, resp):
+        req = resp.request
+        if req.resource_type not in ("xhr", "fetch"):
+            return
+        try:
+            body = resp.json()
+        except Exception:
+            return
+        self.exchanges.append({
+            "method": req.method, "url": req.url, "headers": req.headers,
+            "post_data": req.post_data, "response": body,
+        })
+
+    def __enter__(self):
+        self.page.on("response", self._on_response)
+        return self
+
+    def __exit__(self, *exc):
+        self.page.remove_listener("response", self._on_response)
+
+
+# ---------- API mode ----------
+
+class ApiMode:
+    """Per-lookup-type switch between direct calls and the DOM form.
+
+    ``lookup(dom_fn, values)`` returns a dict of displayed fields or None
+    (portal says not found), exactly like ``dom_fn()`` would.
+    """
+
+    def __init__(self, name, page, capture_file=CAPTURE_FILE, base_url=None, record=True):
+        self.name = name
+        self.page = page
+        self.capture_file = capture_file
+        self.base_url = base_url or os.getenv("UDISE_API_BASE")
+        self.record = record
+        self.capture = load_capture(capture_file)
+        ep = self.capture["endpoints"].get(name)
+        self.endpoint = Endpoint.from_dict(ep) if ep else None
+        self.failures = 0
+        self.relearned = 0  # endpoints dropped after a 401/403
+        self.api_calls = self.dom_calls = 0
+
+    @property
+    def active(self):
+        return self.endpoint is not None and self.failures < MAX_API_FAILURES
+
+    def lookup(self, dom_fn, values):
+        if self.active:
+            try:
+                with LIMITER.call(), TRACER.span("api." + self.name):
+                    fields, raw = self.endpoint.call(self.page.context.request, values, self.base_url)
+                self.failures = 0
+                self.api_calls += 1
+                if self.record:
+                    self.capture["fixtures"].append(
+                        {"endpoint": self.name, "values": values, "response": raw})
+                return fields
+            except ApiError as err:
+                if err.status in (401, 403) and self.relearned < MAX_API_FAILURES:
+                    # the endpoint was learned in another session: learn it again below
+                    self.endpoint = None
+                    self.failures = 0
+                    self.relearned += 1
+                else:
+                    self.failures += 1
+                print(f"   ↳ API {self.name} failed ({err}); using form")
+
+        self.dom_calls += 1
+        if self.endpoint is not None:
+            return dom_fn()
+
+        with _Recorder(self.page) as rec:
+            result = dom_fn()
+        if result:
+            ep = Endpoint.learn(rec.exchanges, values, result)
+            if ep is not None:
+                self.endpoint = ep
+                self.capture["endpoints"][self.name] = ep.to_dict()
+                self.capture["fixtures"].append(
+                    {"endpoint": self.name, "values": values, "response": ep.source_response})
+                save_capture(self.capture, self.capture_file)
+                print(f"   ↳ API {self.name} learned: {ep.method} {ep.url}")
+        return result
+
+    def close(self):
+        if self.record:
+            save_capture(self.capture, self.capture_file)
+        print(f"API {self.name}: {self.api_calls} direct calls, {self.dom_calls} via form")
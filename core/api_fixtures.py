@@ -0,0 +1,113 @@
+"""Replay ``api_capture.json`` as a local HTTP server.
+
+Every fixture recorded by :class:`core.api_client.ApiMode` is turned back into
+the exact request the learned endpoint would send, so pointing API mode at
+this server (``UDISE_API_BASE=http://127.0.0.1:8765``) reproduces the portal's
+answers offline.  ``--check`` starts the server, re-issues every fixture
+through :class:`core.api_client.Endpoint` and verifies the parsed fields.
+
+    python -m core.api_fixtures api_capture.json --port 8765
+    python -m core.api_fixtures api_capture.json --check
+"""
+
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from core.api_client import CAPTURE_FILE, Endpoint, load_capture, _fill, _get_path
+
+
+def _canon(body):
+    if body in (None, ""):
+        return ""
+    if isinstance(body, (bytes, bytearray)):
+        body = body.decode("utf-8", "replace")
+    if isinstance(body, str):
+        try:
+            body = json.loads(body)
+        except ValueError:
+            return body
+    return json.dumps(body, sort_keys=True)
+
+
+def _request_key(method, url, body):
+    u = urlsplit(url)
+    return method.upper(), u.path + (f"?{u.query}" if u.query else ""), _canon(body)
+
+
+def build_routes(capture):
+    endpoints = {n: Endpoint.from_dict(d) for n, d in capture["endpoints"].items()}
+    routes = {}
+    for fx in capture["fixtures"]:
+        ep = endpoints.get(fx["endpoint"])
+        if ep is None:
+            continue
+        key = _request_key(ep.method, _fill(ep.url, fx["values"]), _fill(ep.body, fx["values"]))
+        routes[key] = fx["response"]
+    return routes
+
+
+def make_server(capture, host="127.0.0.1", port=8765):
+    routes = build_routes(capture)
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else None
+            data = routes.get(_request_key(self.command, self.path, body))
+            payload = json.dumps(data if data is not None else {}).encode()
+            self.send_response(200 if data is not None else 404)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = do_POST = do_PUT = _reply
+
+        def log_message(self, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def check(capture):
+    """Replay every fixture through the learned endpoints; return mismatch count."""
+    from playwright.sync_api import sync_playwright
+
+    srv = make_server(capture, port=0)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{srv.server_address[1]}"
+    endpoints = {n: Endpoint.from_dict(d) for n, d in capture["endpoints"].items()}
+    bad = 0
+    with sync_playwright() as pw:
+        ctx = pw.request.new_context()
+        for fx in capture["fixtures"]:
+            ep = endpoints[fx["endpoint"]]
+            fields, _ = ep.call(ctx, fx["values"], base_url=base)
+            want = {k: str(_get_path(fx["response"], p)).strip()
+                    for k, p in ep.result_paths.items()
+                    if _get_path(fx["response"], p) is not None}
+            ok = (fields or {}) == want or (fields is None and not want)
+            bad += not ok
+            print(f"{'✓' if ok else '✗'} {fx['endpoint']} {fx['values']} → {fields}")
+        ctx.dispose()
+    srv.shutdown()
+    print(f"{len(capture['fixtures']) - bad}/{len(capture['fixtures'])} fixtures match")
+    return bad
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("capture", nargs="?", default=CAPTURE_FILE)
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--check", action="store_true", help="replay fixtures and verify parsing")
+    args = ap.parse_args()
+
+    cap = load_capture(args.capture)
+    if args.check:
+        raise SystemExit(1 if check(cap) else 0)
+    server = make_server(cap, port=args.port)
+    print(f"Serving {len(cap['fixtures'])} fixtures on http://127.0.0.1:{args.port}")
+    server.serve_forever()
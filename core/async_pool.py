@@ -0,0 +1,117 @@
+"""Run a per-row lookup on K pages of one browser, under one event loop.
+
+:mod:`core.worker_pool` gives every worker its own thread, Playwright and
+browser, and each of them idles through every server wait.  Here a single
+thread runs an asyncio loop with one browser: the caller's session snapshot
+is restored into one context, K pages are opened in it, and every row
+becomes a task.  An ``asyncio.Semaphore`` lets K tasks run at once, each on
+a page taken from the pool, so while one page waits for the portal the
+others keep working.
+
+    results, stats = run_async_pool(session, todo, process_row_async, pages=4)
+
+*work_fn* is ``async def work_fn(page, idx, tag) -> (status, fields)`` – the
+coroutine twin of a script's per-row function.  The return value has the
+shape of :func:`core.worker_pool.run_pool` (one
+:class:`~core.worker_pool.WorkerStats` per page), so callers merge it the
+same way.  *indices* may also be a blocking iterator such as a
+:class:`core.streaming.Handoff`; it is read off the event loop.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.browser_utils import launch_async, safe_close_async, PAGE_TIMEOUT
+from core.worker_pool import MAX_WORKERS, WorkerStats, session_script
+
+DEFAULT_PAGES = 1   # 1 = the scripts' usual single-page loop
+MAX_PAGES = MAX_WORKERS  # same default cap: concurrent requests, whatever carries them
+
+
+async def open_pages(browser, session, n, prepare=None):
+    """One context restored from :func:`core.worker_pool.snapshot_session`
+    with *n* pages on the session's URL; ``await prepare(page)`` runs on each."""
+    ctx = await browser.new_context(storage_state=session["storage_state"])
+    script = session_script(session)
+    if script:
+        await ctx.add_init_script(script)
+
+    async def one():
+        page = await ctx.new_page()
+        await page.goto(session["url"], timeout=PAGE_TIMEOUT)
+        await page.wait_for_load_state("networkidle", timeout=PAGE_TIMEOUT)
+        if prepare:
+            await prepare(page)
+        return page
+
+    return ctx, await asyncio.gather(*(one() for _ in range(n)))
+
+
+async def _feed(indices):
+    """Yield *indices*; an iterator that may block is advanced in a thread."""
+    if isinstance(indices, (list, tuple, range)):
+        for idx in indices:
+            yield idx
+        return
+    it, done = iter(indices), object()
+    loop = asyncio.get_running_loop()
+    while True:
+        idx = await loop.run_in_executor(None, next, it, done)
+        if idx is done:
+            return
+        yield idx
+
+
+async def _run(session, indices, work_fn, prepare, n):
+    results = {}
+    stats = [WorkerStats(worker=i) for i in range(1, n + 1)]
+    pw = browser = None
+    t0 = time.perf_counter()
+    try:
+        pw, browser = await launch_async()
+        _ctx, pages = await open_pages(browser, session, n, prepare)
+        free = asyncio.Queue()
+        for st, page in zip(stats, pages):
+            free.put_nowait((st, page))
+        slots = asyncio.Semaphore(len(pages))
+
+        async def row(idx):
+            async with slots:
+                st, page = free.get_nowait()  # a slot always comes with a free page
+                tag = f"[p{st.worker}] "
+                try:
+                    status, fields = await work_fn(page, idx, tag)
+                    results[idx] = fields
+                    st.rows += 1
+                    st.counts[status] = st.counts.get(status, 0) + 1
+                except Exception as err:
+                    st.errors.append(str(err))
+                    print(f"‼ {tag}row {idx} → {err}")
+                finally:
+                    free.put_nowait((st, page))
+
+        tasks = [asyncio.create_task(row(idx)) async for idx in _feed(indices)]
+        await asyncio.gather(*tasks)
+    except Exception as err:
+        stats[0].errors.append(str(err))
+        print(f"‼ async pages died → {err}")
+    finally:
+        for st in stats:
+            st.elapsed = time.perf_counter() - t0
+        await safe_close_async(browser, pw)
+    return results, stats
+
+
+def run_async_pool(session, indices, work_fn, prepare=None, pages=DEFAULT_PAGES):
+    """Run ``await work_fn(page, idx, tag)`` for every index on up to *pages*
+    concurrent pages; returns ``(results, stats)`` like ``run_pool``.
+
+    The loop gets its own thread: the caller usually still holds a sync
+    Playwright page, and the sync API refuses to share a thread with a
+    running event loop."""
+    n = max(1, min(pages, MAX_PAGES))
+    if isinstance(indices, (list, tuple, range)):
+        n = max(1, min(n, len(indices)))
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="async-pages") as ex:
+        return ex.submit(asyncio.run, _run(session, indices, work_fn, prepare, n)).result()
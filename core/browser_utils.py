@@ -0,0 +1,268 @@
+"""Browser launch / teardown helpers shared by every script.
+
+Browsers from :func:`launch_pw` are kept lean, since the scripts only read
+text off the portal's pages:
+
+* Chromium starts with ``LEAN_ARGS`` (no extensions, sync, translate,
+  background networking or throttling of hidden tabs).
+* Every context gets a route that aborts the request kinds in
+  ``UDISE_BLOCK`` (default ``image,font,media,third-party``; ``0`` turns it
+  off).  Anything whose URL contains an ``UDISE_BLOCK_ALLOW`` word
+  (default ``captcha``) still loads.
+* Versioned JS/CSS bundles of the portal (``main.3f9a1c….js``) are kept in
+  ``UDISE_ASSET_CACHE`` (default ``.udise_cache/assets``, ``0`` = off) and
+  served from disk on the next run.
+
+Requests, bytes received and page-load times are counted in :data:`NET`
+and printed when the script exits; run once with ``UDISE_BLOCK=0
+UDISE_ASSET_CACHE=0`` to see the difference.
+
+:func:`launch_async` is the same for the async API (:mod:`core.async_pool`).
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+from core.lazy import async_api, sync_api
+
+# CONFIG
+MAX_BROWSER_RETRIES = 3
+MAX_NAV_RETRIES = 3
+PAGE_TIMEOUT = 60_000
+HEADLESS = os.getenv("UDISE_HEADLESS", "1") != "0"  # UDISE_HEADLESS=0 shows the browser
+PORTAL = os.getenv("UDISE_PORTAL", "https://sdms.udiseplus.gov.in").rstrip("/")  # or bench/portal_sim.py
+
+LEAN_ARGS = [
+    "--disable-gpu", "--disable-dev-shm-usage", "--disable-extensions", "--disable-sync",
+    "--disable-default-apps", "--disable-component-update", "--disable-background-networking",
+    "--disable-background-timer-throttling", "--disable-renderer-backgrounding",
+    "--disable-backgrounding-occluded-windows", "--disable-features=Translate,MediaRouter,OptimizationHints",
+    "--no-first-run", "--mute-audio",
+]
+BLOCK = {b.strip() for b in os.getenv("UDISE_BLOCK", "image,font,media,third-party").split(",")} - {"", "0"}
+BLOCK_ALLOW = [w.strip().lower() for w in os.getenv("UDISE_BLOCK_ALLOW", "captcha").split(",") if w.strip()]
+ASSET_CACHE = os.getenv("UDISE_ASSET_CACHE", os.path.join(".udise_cache", "assets"))
+HASHED_ASSET = re.compile(r"[.-][0-9a-f]{8,}\.(js|css)$")  # content-hashed bundle names never change
+
+
+def _site(host):
+    """``sdms.udiseplus.gov.in`` → ``udiseplus.gov.in``; IPs and short hosts as they are."""
+    labels = host.split(".")
+    return host if len(labels) <= 3 or host.replace(".", "").isdigit() else ".".join(labels[1:])
+
+
+SITE = _site(urlsplit(PORTAL).hostname or "")
+
+
+# ---------- network stats ----------
+
+class NetStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = self.blocked = self.cached = self.bytes = 0
+        self.loads = []   # ms from navigation to the load event
+
+    def count(self, field, n=1):
+        with self.lock:
+            setattr(self, field, getattr(self, field) + n)
+
+    def watch(self, page, aio=False):
+        started = {}
+
+        def navigated(frame):
+            if frame == page.main_frame:
+                started["t"] = time.perf_counter()
+
+        def loaded(_page):
+            if "t" in started:
+                with self.lock:
+                    self.loads.append((time.perf_counter() - started.pop("t")) * 1000)
+
+        page.on("framenavigated", navigated)
+        page.on("load", loaded)
+        page.on("request", lambda _req: self.count("requests"))
+        page.on("requestfinished", self._finished_async if aio else self._finished)
+
+    def _finished(self, request):
+        try:
+            sizes = request.sizes()
+        except Exception:
+            return
+        self.count("bytes", sizes["responseBodySize"] + sizes["responseHeadersSize"])
+
+    async def _finished_async(self, request):
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return
+        self.count("bytes", sizes["responseBodySize"] + sizes["responseHeadersSize"])
+
+    def report(self):
+        if not self.requests:
+            return
+        loads = sorted(self.loads)
+        median = loads[len(loads) // 2] if loads else 0
+        print(f"\n–––– NETWORK ––––\n{self.requests} requests, {self.blocked} blocked, "
+              f"{self.cached} from asset cache | {self.bytes / 1024:.0f} KB received | "
+              f"{len(loads)} page loads, median {median:.0f} ms | "
+              f"blocking {','.join(sorted(BLOCK)) or 'off'}")
+
+
+NET = NetStats()  # shared by every browser (and thread) in the process
+atexit.register(NET.report)
+
+
+# ---------- routing ----------
+
+def _cache_paths(url):
+    key = hashlib.sha1(url.encode()).hexdigest()
+    return os.path.join(ASSET_CACHE, key), os.path.join(ASSET_CACHE, key + ".json")
+
+
+def _load_asset(url):
+    """``(headers, body)`` of a cached bundle, or None."""
+    body_path, meta_path = _cache_paths(url)
+    if not (os.path.exists(body_path) and os.path.exists(meta_path)):
+        return None
+    with open(meta_path, encoding="utf-8") as fh:
+        headers = json.load(fh)
+    with open(body_path, "rb") as fh:
+        return headers, fh.read()
+
+
+def _store_asset(url, response, body):
+    body_path, meta_path = _cache_paths(url)
+    os.makedirs(ASSET_CACHE, exist_ok=True)
+    tmp = body_path + f".{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(body)
+    os.replace(tmp, body_path)
+    with open(meta_path, "w", encoding="utf-8") as fh:
+        json.dump({k: v for k, v in response.headers.items() if k.lower() == "content-type"}, fh)
+
+
+def _serve_cached(route, url):
+    cached = _load_asset(url)
+    if cached is not None:
+        route.fulfill(status=200, headers=cached[0], body=cached[1])
+        NET.count("cached")
+        return
+    response = route.fetch()
+    body = response.body()
+    if response.ok:
+        _store_asset(url, response, body)
+    route.fulfill(response=response, body=body)
+
+
+def _action(request):
+    """``"abort"``, ``"cache"`` or ``"continue"`` for one request."""
+    url = request.url
+    if BLOCK and not any(w in url.lower() for w in BLOCK_ALLOW):
+        host = urlsplit(url).hostname or ""
+        third_party = host != SITE and not host.endswith("." + SITE)
+        if request.resource_type in BLOCK or ("third-party" in BLOCK and third_party):
+            NET.count("blocked")
+            return "abort"
+    if ASSET_CACHE != "0" and request.method == "GET" and HASHED_ASSET.search(urlsplit(url).path):
+        return "cache"
+    return "continue"
+
+
+def _route(route):
+    action = _action(route.request)
+    if action == "abort":
+        return route.abort()
+    if action == "cache":
+        return _serve_cached(route, route.request.url)
+    route.continue_()
+
+
+async def _route_async(route):
+    action = _action(route.request)
+    if action == "abort":
+        return await route.abort()
+    if action != "cache":
+        return await route.continue_()
+    url = route.request.url
+    cached = _load_asset(url)
+    if cached is not None:
+        await route.fulfill(status=200, headers=cached[0], body=cached[1])
+        NET.count("cached")
+        return
+    response = await route.fetch()
+    body = await response.body()
+    if response.ok:
+        _store_asset(url, response, body)
+    await route.fulfill(response=response, body=body)
+
+
+def lean_context(ctx):
+    """Install the blocking / asset-cache route and the stats on *ctx*."""
+    if BLOCK or ASSET_CACHE != "0":
+        ctx.route("**/*", _route)
+    ctx.on("page", NET.watch)
+    return ctx
+
+
+async def lean_context_async(ctx):
+    """:func:`lean_context` for an async browser context."""
+    if BLOCK or ASSET_CACHE != "0":
+        await ctx.route("**/*", _route_async)
+    ctx.on("page", lambda page: NET.watch(page, aio=True))
+    return ctx
+
+
+# ---------- launch / close ----------
+
+def launch_pw(headless: bool = HEADLESS):
+    pw = sync_api.sync_playwright().start()
+    browser = pw.chromium.launch(headless=headless, args=LEAN_ARGS)
+    new_context = browser.new_context
+
+    def lean_new_context(**kwargs):
+        kwargs.setdefault("service_workers", "block")  # routes miss what a service worker answers
+        return lean_context(new_context(**kwargs))
+
+    browser.new_context = lean_new_context  # every context of this browser, whoever opens it
+    return pw, browser
+
+
+async def launch_async(headless: bool = HEADLESS):
+    """:func:`launch_pw` with the async API; call from a running event loop."""
+    pw = await async_api.async_playwright().start()
+    browser = await pw.chromium.launch(headless=headless, args=LEAN_ARGS)
+    new_context = browser.new_context
+
+    async def lean_new_context(**kwargs):
+        kwargs.setdefault("service_workers", "block")
+        return await lean_context_async(await new_context(**kwargs))
+
+    browser.new_context = lean_new_context
+    return pw, browser
+
+
+def safe_close(*objs):
+    """Close browsers/contexts and stop a Playwright instance (which has no
+    ``close``), ignoring errors; ``None`` entries are skipped."""
+    for o in objs:
+        if o is None:
+            continue
+        try:
+            o.close() if hasattr(o, "close") else o.stop()
+        except Exception:
+            pass
+
+
+async def safe_close_async(*objs):
+    """:func:`safe_close` for async objects; a Playwright instance is stopped."""
+    for o in objs:
+        try:
+            await (o.close() if hasattr(o, "close") else o.stop())
+        except Exception:
+            pass
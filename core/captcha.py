@@ -0,0 +1,176 @@
+"""Hand the login CAPTCHA to whoever can solve it, so the browser can stay headless.
+
+:func:`core.session.login` screenshots the CAPTCHA image to ``captcha.png``
+and asks the solver picked with ``UDISE_CAPTCHA`` for the text:
+
+    prompt          (default) print where the image is and read the answer
+                    from the terminal
+    file[:DIR]      write DIR/captcha.png and wait for someone (or something)
+                    to write the answer to DIR/captcha.txt
+    http[:PORT]     serve the image and an answer form on
+                    http://127.0.0.1:PORT/<token>/ (default port 8765) – on a
+                    server, reach it through ``ssh -L 8765:127.0.0.1:8765``,
+                    or set ``UDISE_CAPTCHA_BIND=0.0.0.0`` to listen on every
+                    interface.  The token is random, printed to the terminal
+                    and good for one answer; requests without it get a 403.
+    none            no CAPTCHA on the login page (bench/portal_sim.py)
+    static:TEXT     always answer TEXT (tests)
+    pkg.mod:func    any callable ``func(image_path) -> str``
+
+A solver may return ``None`` to mean "already typed into the browser"; the
+prompt solver does that when you just press Enter in a headed browser
+(``UDISE_HEADLESS=0``).  Headless, it asks again until it gets the text.
+
+Only the CAPTCHA needs a person; afterwards the session is saved by
+core.session and reused until the portal expires it.
+"""
+
+import importlib
+import os
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs
+
+from core.browser_utils import HEADLESS
+
+CAPTCHA_FILE = "captcha.png"
+ANSWER_TIMEOUT = 300  # seconds to wait for a file / HTTP answer
+HTTP_PORT = 8765
+HTTP_BIND = os.getenv("UDISE_CAPTCHA_BIND", "127.0.0.1")  # "0.0.0.0" to allow other machines
+
+
+class PromptSolver:
+    def solve(self, image):
+        path = os.path.abspath(image)
+        if HEADLESS:  # there is no browser window to type it into
+            answer = ""
+            while not answer:
+                answer = input(f"CAPTCHA image → {path}\nOpen it and type the text here → ").strip()
+            return answer
+        answer = input(f"CAPTCHA image → {path}\n"
+                       "Type it here (or solve it in the browser and press [Enter]) → ").strip()
+        return answer or None
+
+
+class FileSolver:
+    def __init__(self, folder="."):
+        self.folder = folder
+
+    def solve(self, image):
+        answer_path = os.path.join(self.folder, "captcha.txt")
+        if os.path.exists(answer_path):
+            os.remove(answer_path)
+        if os.path.abspath(image) != os.path.abspath(os.path.join(self.folder, CAPTCHA_FILE)):
+            os.makedirs(self.folder, exist_ok=True)
+            os.replace(image, os.path.join(self.folder, CAPTCHA_FILE))
+        print(f"CAPTCHA waiting: write the answer to {os.path.abspath(answer_path)}")
+        deadline = time.monotonic() + ANSWER_TIMEOUT
+        while time.monotonic() < deadline:
+            if os.path.exists(answer_path):
+                with open(answer_path, encoding="utf-8") as fh:
+                    answer = fh.read().strip()
+                if answer:
+                    os.remove(answer_path)
+                    return answer
+            time.sleep(0.5)
+        raise TimeoutError(f"no CAPTCHA answer in {answer_path} after {ANSWER_TIMEOUT}s")
+
+
+class HttpSolver:
+    def __init__(self, port=HTTP_PORT, bind=HTTP_BIND):
+        self.port = port
+        self.bind = bind
+
+    def solve(self, image):
+        with open(image, "rb") as fh:
+            png = fh.read()
+        answer, done = [], threading.Event()
+        prefix = f"/{secrets.token_urlsafe(16)}/"  # one-time token, only shown in the terminal
+
+        class Handler(BaseHTTPRequestHandler):
+            def _allowed(self):
+                if done.is_set() or not self.path.startswith(prefix):
+                    self.send_error(403)
+                    return False
+                return True
+
+            def do_GET(self):
+                if not self._allowed():
+                    return
+                if self.path.startswith(prefix + "captcha.png"):
+                    body, ctype = png, "image/png"
+                else:
+                    body, ctype = (b"<form method=post><img src='captcha.png'><br>"
+                                   b"<input name=answer autofocus> <button>Log in</button></form>"), "text/html"
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                if not self._allowed():
+                    return
+                length = int(self.headers.get("Content-Length") or 0)
+                form = parse_qs(self.rfile.read(length).decode())
+                text = (form.get("answer") or [""])[0].strip()
+                if not text or done.is_set():
+                    self.send_error(400 if not text else 403)
+                    return
+                answer.append(text)
+                done.set()  # the token is spent
+                self.send_response(200)
+                self.end_headers()
+                self.wfile.write(b"Thanks - logging in.")
+
+            def log_message(self, *args):
+                pass
+
+        srv = HTTPServer((self.bind, self.port), Handler)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        host = "<this machine>" if self.bind in ("", "0.0.0.0", "::") else self.bind
+        print(f"CAPTCHA waiting: open http://{host}:{self.port}{prefix} and type the answer")
+        try:
+            if not done.wait(ANSWER_TIMEOUT):
+                raise TimeoutError(f"no CAPTCHA answer on port {self.port} after {ANSWER_TIMEOUT}s")
+        finally:
+            srv.shutdown()
+            srv.server_close()
+        return answer[0]
+
+
+class StaticSolver:
+    def __init__(self, text):
+        self.text = text
+
+    def solve(self, image):
+        return self.text
+
+
+class CallableSolver:
+    def __init__(self, fn):
+        self.fn = fn
+
+    def solve(self, image):
+        return self.fn(image)
+
+
+def get_solver(spec=None):
+    """Solver for *spec* (default ``UDISE_CAPTCHA``), or None for ``none``."""
+    spec = (spec if spec is not None else os.getenv("UDISE_CAPTCHA", "prompt")).strip()
+    kind, _, arg = spec.partition(":")
+    if kind == "none":
+        return None
+    if kind in ("prompt", "manual", ""):
+        return PromptSolver()
+    if kind == "file":
+        return FileSolver(arg or ".")
+    if kind == "http":
+        return HttpSolver(int(arg) if arg else HTTP_PORT)
+    if kind == "static":
+        return StaticSolver(arg)
+    if arg:
+        return CallableSolver(getattr(importlib.import_module(kind), arg))
+    raise ValueError(f"unknown UDISE_CAPTCHA solver: {spec!r}")
@@ -0,0 +1,77 @@
+"""Date helpers shared by every script.
+
+The portal wants dates as ``DD/MM/YYYY``; the rosters hand them over as
+Excel dates, pandas Timestamps or text in a handful of layouts.
+:func:`normalize_ddmmyyyy` converts one value, :func:`parse_dates` a whole
+column at once; both try the layouts in the same order (``DATE_FMTS``).
+
+Rows checked on the portal carry a :func:`stamp` of when that happened;
+:func:`is_recent` tells which stamps of a column are still within a window.
+"""
+
+import time
+from datetime import datetime
+
+from core.lazy import pd
+
+PORTAL_FMT = "%d/%m/%Y"
+OTHER_FMTS = ("%Y-%m-%d", "%d-%m-%Y", "%m/%d/%Y")
+DATE_FMTS = (PORTAL_FMT, *OTHER_FMTS, "%Y-%m-%d %H:%M:%S")  # the last one: str() of a Timestamp
+STAMP_FMT = "%Y-%m-%d %H:%M:%S"  # *_checked_at columns, local time
+
+
+def is_blank(value):
+    return value is None or (not isinstance(value, str) and bool(pd.isna(value)))
+
+
+def normalize_ddmmyyyy(value):
+    """Return DD/MM/YYYY from mixed inputs; None if can't parse."""
+    if is_blank(value):
+        return None
+    if hasattr(value, "strftime"):
+        return value.strftime(PORTAL_FMT)
+    s = str(value).strip()
+    for fmt in DATE_FMTS:
+        try:
+            return datetime.strptime(s, fmt).strftime(PORTAL_FMT)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_dates(values):
+    """Column of mixed dates → datetime64 Series (``NaT`` where unreadable),
+    one ``to_datetime`` call per layout instead of one parse per row."""
+    s = pd.Series(values, copy=False)
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    text = s.astype("string").str.strip()
+    out = pd.Series(pd.NaT, index=s.index, dtype="datetime64[ns]")
+    for fmt in DATE_FMTS:
+        todo = out.isna() & text.notna()
+        if not todo.any():
+            break
+        out[todo] = pd.to_datetime(text[todo], format=fmt, errors="coerce")
+    return out
+
+
+def stamp(ts=None):
+    """*ts* (seconds since the epoch, default now) as a ``STAMP_FMT`` string."""
+    return time.strftime(STAMP_FMT, time.localtime(ts))
+
+
+def is_recent(values, hours):
+    """Boolean Series: the stamps in *values* are at most *hours* old
+    (False for blanks and junk)."""
+    checked = pd.to_datetime(pd.Series(values, copy=False), errors="coerce")
+    return (pd.Timestamp.now() - checked) <= pd.Timedelta(hours=hours)
+
+
+def get_yob(value):
+    """4-digit year of birth as str (for the Get PEN search), or None."""
+    if is_blank(value):
+        return None
+    if hasattr(value, "year"):
+        return str(value.year)
+    dob = normalize_ddmmyyyy(value)
+    return dob[-4:] if dob else None
@@ -0,0 +1,99 @@
+"""Look each distinct student up once, however often the roster lists them.
+
+Rosters merged from several sections or years repeat the same Aadhaar or
+PEN; every repeat used to cost its own portal search (or a second release
+request).  :class:`DedupIndex` maps each row to a lookup key – the values
+the portal search is made of, e.g. ``aadhaar|yob`` or ``pen|dob`` – and
+keeps the first row of every key as its *leader*:
+
+    dups = DedupIndex(keys)              # keys: Series indexed like the roster
+    todo = dups.leaders(todo)            # only these reach the portal
+    …
+    dups.fan_out(df, ["student_pen"])    # copy the answers to the repeats
+
+Rows whose key is <NA> are never merged.  Rows that only arrive one by one
+(a stream) go through :meth:`DedupIndex.add` instead.
+"""
+
+import threading
+
+from core.lazy import pd
+
+
+def lookup_keys(*parts):
+    """``a|b`` per row from Series of key parts; <NA> where any part is."""
+    parts = [pd.Series(p, copy=False).astype("string").str.strip() for p in parts]
+    keys = parts[0]
+    for p in parts[1:]:
+        keys = keys + "|" + p
+    return keys
+
+
+class DedupIndex:
+    def __init__(self, keys=None):
+        self.first = {}       # key -> leader row
+        self.leader_of = {}   # repeated row -> its leader
+        self.rows = 0
+        self.lock = threading.Lock()
+        if keys is not None and len(keys):
+            keys = pd.Series(keys, copy=False).astype("string")
+            keys = keys[keys.notna()]
+            repeat = keys.duplicated(keep="first")
+            self.first = dict(zip(keys[~repeat].to_numpy(), keys[~repeat].index))
+            self.leader_of = dict(zip(keys[repeat].index, keys[repeat].map(self.first)))
+            self.rows = len(keys)
+
+    def add(self, idx, key):
+        """Register one row; returns its leader, or None when *idx* leads."""
+        if key is None or pd.isna(key):
+            return None
+        with self.lock:
+            self.rows += 1
+            leader = self.first.setdefault(key, idx)
+            if leader == idx:
+                return None
+            self.leader_of[idx] = leader
+            return leader
+
+    def leaders(self, indices):
+        """*indices* without the repeated rows."""
+        return [idx for idx in indices if idx not in self.leader_of]
+
+    def followers(self, leader):
+        return [idx for idx, lead in self.leader_of.items() if lead == leader]
+
+    def groups(self):
+        """``{leader: [repeated rows]}``."""
+        out = {}
+        for idx, lead in self.leader_of.items():
+            out.setdefault(lead, []).append(idx)
+        return out
+
+    def fan(self, on_result):
+        """Wrap ``on_result(idx, fields)`` so it also fires for the leader's
+        repeats (call it with leaders only)."""
+        if on_result is None or not self.leader_of:
+            return on_result
+        groups = self.groups()
+
+        def fanned(idx, fields):
+            on_result(idx, fields)
+            for other in groups.get(idx, ()):
+                on_result(other, fields)
+        return fanned
+
+    def fan_out(self, df, cols):
+        """Copy *cols* of every leader into its repeated rows (in place)."""
+        if not self.leader_of:
+            return
+        cols = [c for c in cols if c in df.columns]
+        repeats = list(self.leader_of)
+        df.loc[repeats, cols] = df.loc[[self.leader_of[i] for i in repeats], cols].to_numpy()
+
+    def line(self):
+        if not self.leader_of:
+            return f"duplicates: none among {self.rows} rows"
+        sizes = pd.Series(list(self.leader_of.values())).value_counts()
+        return (f"duplicates: {len(self.leader_of)} of {self.rows} rows repeat one of "
+                f"{len(sizes)} students (up to {sizes.max() + 1}× each) → "
+                f"{len(self.first)} lookups instead of {self.rows}")
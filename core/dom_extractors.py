@@ -0,0 +1,230 @@
+"""Row-level DOM helpers for the section detail page.
+
+    update_section(page, section)    progress the Pending students of the open section
+
+Progressing a section is done as a batch instead of student by student:
+
+1. one bulk read of the detail table picks the Pending rows;
+2. every row's values (progression status, marks 75–85 %, days attended
+   240–249, section) are decided up front – :func:`plan_updates`;
+3. one ``page.evaluate`` types all of them into the row inputs –
+   :func:`fill_rows`; a row it cannot fill (a control missing or not yet
+   enabled) goes through the per-row flow, :func:`fill_row`;
+4. a single click on the portal's bulk save ("Update All") when the page
+   has one, otherwise each row's own Update button – :func:`save_rows`;
+5. one more bulk read checks which rows are no longer Pending –
+   :func:`verify_updates`.
+
+Opening a section is :func:`core.section_queue.open_section`.
+"""
+
+import random
+from collections import Counter
+from typing import NamedTuple
+
+from core.lazy import sync_api
+from core.popups import resolve
+from core.rate_limit import LIMITER
+from core.selectors import (
+    BULK_SAVE_BTN, DETAIL_COLS, DETAIL_ROWS, POPUP_CONFIRM, ROW_INPUT, ROW_SAVE_BTN, ROW_SELECT,
+)
+from core.table_reader import read_table
+from core.tracing import TRACER
+
+PROMOTED = "Promoted/Passed"     # label of the progression status to pick
+MARKS_RANGE = (75, 85)           # percent
+DAYS_RANGE = (240, 249)          # days attended
+MARKS_HINTS = ("mark", "percent")  # words naming the marks input of a row
+DAYS_HINTS = ("attend", "day")
+
+STATUS_COLS = {k: DETAIL_COLS[k] for k in ("name", "status")}
+
+
+# ---------- batch progression ----------
+
+class RowUpdate(NamedTuple):
+    index: int       # position among DETAIL_ROWS
+    name: str
+    marks: int
+    days: int
+    section: str
+
+
+def pending_rows(page):
+    """``[(index, name)]`` of the Pending students, in one read."""
+    return [
+        (i, r["name"] or "")
+        for i, r in enumerate(read_table(page, DETAIL_ROWS, STATUS_COLS))
+        if (r["status"] or "").strip().lower() == "pending"
+    ]
+
+
+def plan_updates(rows, section, rnd=random):
+    """The values every Pending row gets, decided before touching the page."""
+    return [
+        RowUpdate(i, name, rnd.randint(*MARKS_RANGE), rnd.randint(*DAYS_RANGE), section)
+        for i, name in rows
+    ]
+
+
+# Only the rows (DETAIL_ROWS) and the Update column (ROW_SAVE_BTN) are known
+# locators of the detail table, so a row's controls are found by what they
+# hold: the select offering PROMOTED, the select offering the section, and the
+# text inputs by hint (formcontrolname, name, id, placeholder, cell class),
+# else in order – marks, then days.  Indices are into the row's ROW_SELECT /
+# ROW_INPUT matches, so the per-row flow can address the same controls.
+_CONTROLS_JS = """
+(tr, a, section) => {
+    const option = (select, label) => {
+        const want = label.trim().toLowerCase();
+        const opt = Array.from(select.options).find((o) => o.text.trim().toLowerCase() === want);
+        return opt ? opt.value : null;
+    };
+    const hint = (el) => [el.getAttribute("formcontrolname"), el.name, el.id, el.placeholder,
+                          el.getAttribute("aria-label"), el.closest("td") && el.closest("td").className]
+                         .join(" ").toLowerCase();
+    const selects = Array.from(tr.querySelectorAll(a.select));
+    const inputs = Array.from(tr.querySelectorAll(a.input));
+    const prog = selects.findIndex((s) => option(s, a.promoted) !== null);
+    const sec = selects.findIndex((s, k) => k !== prog && option(s, section) !== null);
+    const pick = (hints, skip) => inputs.findIndex((el, k) => k !== skip && hints.some((h) => hint(el).includes(h)));
+    let marks = pick(a.marksHints, -1);
+    let days = pick(a.daysHints, marks);
+    const free = inputs.map((_, k) => k).filter((k) => k !== marks && k !== days);
+    if (marks < 0) marks = free.length ? free.shift() : -1;
+    if (days < 0) days = free.length ? free.shift() : -1;
+    return {prog, sec, marks, days, selects, inputs, option};
+}
+"""
+
+# Sets each control through the native setter and fires input/change, which
+# is what Angular's form bindings listen to.  Returns the indices of rows it
+# could not fill (a control missing or still disabled).
+_FILL_JS = """
+(args) => {
+    const controls = %s;
+    const rows = document.querySelectorAll(args.rows);
+    const set = (el, value) => {
+        const proto = el.tagName === "SELECT" ? HTMLSelectElement.prototype : HTMLInputElement.prototype;
+        Object.getOwnPropertyDescriptor(proto, "value").set.call(el, value);
+        el.dispatchEvent(new Event("input", {bubbles: true}));
+        el.dispatchEvent(new Event("change", {bubbles: true}));
+    };
+    const missing = [];
+    for (const u of args.updates) {
+        const tr = rows[u.index];
+        const c = tr && controls(tr, args, u.section);
+        if (!c || c.prog < 0 || c.marks < 0 || c.days < 0) { missing.push(u.index); continue; }
+        const prog = c.selects[c.prog], marks = c.inputs[c.marks], days = c.inputs[c.days];
+        if (prog.disabled) { missing.push(u.index); continue; }
+        set(prog, c.option(prog, args.promoted));
+        if (marks.disabled || marks.readOnly || days.disabled || days.readOnly) { missing.push(u.index); continue; }
+        set(marks, String(u.marks));
+        set(days, String(u.days));
+        if (c.sec >= 0 && !c.selects[c.sec].disabled) set(c.selects[c.sec], c.option(c.selects[c.sec], u.section));
+    }
+    return missing;
+}
+""" % _CONTROLS_JS.strip()
+
+_ROW_CONTROLS_JS = """
+(tr, args) => {
+    const c = (%s)(tr, args, args.section);
+    return {prog: c.prog, sec: c.sec, marks: c.marks, days: c.days};
+}
+""" % _CONTROLS_JS.strip()
+
+
+def _control_args(**extra):
+    return {"select": ROW_SELECT, "input": ROW_INPUT, "promoted": PROMOTED,
+            "marksHints": list(MARKS_HINTS), "daysHints": list(DAYS_HINTS), **extra}
+
+
+def fill_rows(page, updates):
+    """Type every planned value into the table in one round-trip; returns
+    the updates that could be filled."""
+    missing = set(page.evaluate(_FILL_JS, _control_args(
+        rows=DETAIL_ROWS, updates=[u._asdict() for u in updates])))
+    return [u for u in updates if u.index not in missing]
+
+
+def fill_row(page, u, timeout_ms=5_000):
+    """The per-row flow for a row :func:`fill_rows` could not fill: the same
+    controls, driven by Playwright, which waits for each to be enabled.
+    Returns False when the row has no such controls."""
+    tr = page.locator(DETAIL_ROWS).nth(u.index)
+    at = tr.evaluate(_ROW_CONTROLS_JS, _control_args(section=u.section))
+    if min(at["prog"], at["marks"], at["days"]) < 0:
+        return False
+    selects, inputs = tr.locator(ROW_SELECT), tr.locator(ROW_INPUT)
+    try:
+        selects.nth(at["prog"]).select_option(label=PROMOTED, timeout=timeout_ms)
+        inputs.nth(at["marks"]).fill(str(u.marks), timeout=timeout_ms)
+        inputs.nth(at["days"]).fill(str(u.days), timeout=timeout_ms)
+    except sync_api.TimeoutError:
+        return False
+    if at["sec"] >= 0:
+        try:
+            selects.nth(at["sec"]).select_option(label=u.section, timeout=timeout_ms)
+        except sync_api.TimeoutError:
+            pass  # the section is only moved when the row offers it
+    return True
+
+
+def _close_popup(page, timeout_ms=10_000):
+    """Wait for the save confirmation and dismiss it; returns its title."""
+    popup = resolve(page, "update", timeout_ms, classes=(POPUP_CONFIRM,))
+    return popup.title if popup else ""
+
+
+@TRACER.traced("update.save")
+def save_rows(page, updates):
+    """Save the filled rows – one bulk save when the page offers it."""
+    if page.locator(BULK_SAVE_BTN).count():
+        with LIMITER.call():
+            page.locator(BULK_SAVE_BTN).first.click()
+            _close_popup(page)
+        return "bulk"
+    rows = page.locator(DETAIL_ROWS)
+    for u in updates:
+        # the table may re-render after each save, so the row is looked up by name
+        index = next((i for i, name in pending_rows(page) if name == u.name), None)
+        if index is None:
+            continue  # no longer Pending; verify_updates has the last word
+        with LIMITER.call():
+            rows.nth(index).locator(ROW_SAVE_BTN).click()
+            _close_popup(page)
+    return "rows"
+
+
+def verify_updates(page, updates):
+    """Names of planned students still Pending after the save, in one read.
+    Rows are matched on the name, not their position, which a re-rendered
+    table does not keep; a name listed twice counts twice."""
+    still = Counter(name for _i, name in pending_rows(page))
+    failed = []
+    for u in updates:
+        if still[u.name]:
+            still[u.name] -= 1
+            failed.append(u.name)
+    return failed
+
+
+def update_section(page, section, rnd=random):
+    """Progress every Pending student of the open detail table.
+
+    Returns ``(updated, unfilled_names, failed_names, mode)``: *unfilled*
+    rows had no controls to fill and were left alone, *failed* rows were
+    saved but are still Pending; *mode* is ``"bulk"``, ``"rows"`` or ``""``
+    when nothing was saved."""
+    updates = plan_updates(pending_rows(page), section, rnd)
+    if not updates:
+        return 0, [], [], ""
+    filled = fill_rows(page, updates)
+    filled += [u for u in updates if u not in filled and fill_row(page, u)]
+    unfilled = [u.name for u in updates if u not in filled]
+    if not filled:
+        return 0, unfilled, [], ""
+    mode = save_rows(page, filled)
+    failed = verify_updates(page, filled)
+    return len(filled) - len(failed), unfilled, failed, mode
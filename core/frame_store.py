@@ -0,0 +1,154 @@
+"""Working storage for the roster DataFrames passed between stages.
+
+Excel is slow to read and write once a roster reaches district size, so the
+stages keep their working copy next to the workbook in a columnar/binary
+format and only touch Excel at the edges:
+
+    load_frame("students_extracted_with_PEN.xlsx")
+        → reads students_extracted_with_PEN.parquet when it is at least as
+          new as the workbook, otherwise imports the workbook (ingest)
+    save_frame(df, "students_extracted_with_PEN.xlsx", excel=False)
+        → writes only students_extracted_with_PEN.parquet
+
+``STORE_FORMAT`` (env ``UDISE_STORE``) is ``parquet`` when pyarrow is
+installed and ``sqlite`` (standard library) otherwise.
+
+Identifier columns are typed on the way in: ``aadharId`` becomes a 12-digit
+string (Excel hands it back as a float) and ``student_pen`` a string, so the
+scripts never round-trip them through ``str(int(...))``.
+"""
+
+import importlib.util
+import os
+import sqlite3
+
+from core.lazy import pd
+from core.tracing import TRACER
+
+# pandas' parquet engine; looked up without importing it (slow) until needed
+HAVE_PARQUET = importlib.util.find_spec("pyarrow") is not None
+
+STORE_FORMAT = os.getenv("UDISE_STORE", "parquet" if HAVE_PARQUET else "sqlite")
+EXTENSIONS = {"parquet": ".parquet", "sqlite": ".sqlite"}
+_TABLE = "frame"
+_DTYPES = "frame_dtypes"
+
+
+# ---------- typed columns ----------
+
+def to_aadhaar(values):
+    """Series of 12-digit strings (``<NA>`` for blanks / 0 / junk).  Spaces
+    and dashes typed between the digit groups ("1234 5678 9012") are dropped."""
+    text = pd.Series(values, copy=False).astype("string").str.replace(r"[\s-]+", "", regex=True)
+    num = pd.to_numeric(text.fillna(""), errors="coerce")
+    digits = num.where((num > 0) & (num % 1 == 0)).astype("Int64").astype("string").str.zfill(12)
+    # values that were already strings with leading zeros keep them
+    return digits.mask(text.str.fullmatch(r"\d{12}", na=False), text)
+
+
+def type_columns(df):
+    """Give identifier columns a stable string dtype (in place)."""
+    if "aadharId" in df.columns:
+        df["aadharId"] = to_aadhaar(df["aadharId"])
+    if "student_pen" in df.columns:
+        pen = df["student_pen"]
+        df["student_pen"] = pen.where(pen.isna(), pen.astype(str).str.replace(r"\.0$", "", regex=True))
+    return df
+
+
+def _portable(df):
+    """Typed copy of *df* every backend can store: object columns holding a
+    mix of dates and text get the portal's DD/MM/YYYY text for their dates."""
+    out = type_columns(df.copy())
+    for col in out.columns:
+        if out[col].dtype != object:
+            continue
+        kinds = {type(v) for v in out[col].dropna()}
+        if len(kinds) > 1:
+            out[col] = out[col].map(
+                lambda v: v.strftime("%d/%m/%Y") if hasattr(v, "strftime")
+                else (None if pd.isna(v) else str(v))
+            )
+    return out
+
+
+# ---------- paths ----------
+
+def work_path(xlsx_path, fmt=None):
+    """``students_x.xlsx`` → ``students_x.parquet`` (or ``.sqlite``)."""
+    return os.path.splitext(xlsx_path)[0] + EXTENSIONS[fmt or STORE_FORMAT]
+
+
+def _mtime(path):
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+
+# ---------- backends ----------
+
+def _write_sqlite(df, path):
+    tmp = path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    with sqlite3.connect(tmp) as db:
+        df.to_sql(_TABLE, db, index=False)
+        pd.DataFrame({"col": df.columns.astype(str), "dtype": df.dtypes.astype(str).values}
+                     ).to_sql(_DTYPES, db, index=False)
+    os.replace(tmp, path)
+
+
+def _read_sqlite(path):
+    with sqlite3.connect(path) as db:
+        dtypes = dict(db.execute(f"SELECT col, dtype FROM {_DTYPES}").fetchall())
+        dates = [c for c, t in dtypes.items() if t.startswith("datetime64")]
+        df = pd.read_sql(f"SELECT * FROM {_TABLE}", db, parse_dates=dates)
+    for col, t in dtypes.items():
+        if t in ("string", "Int64", "boolean"):
+            df[col] = df[col].astype(t)
+    return df
+
+
+def _write_parquet(df, path):
+    tmp = path + ".tmp"
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def write_frame(df, path):
+    """Write *df* to *path*; the format follows the extension."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".parquet":
+        _write_parquet(_portable(df), path)
+    elif ext in (".sqlite", ".db"):
+        _write_sqlite(_portable(df), path)
+    else:
+        df.to_excel(path, index=False)
+
+
+def read_frame(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".parquet":
+        return pd.read_parquet(path)
+    if ext in (".sqlite", ".db"):
+        return _read_sqlite(path)
+    return type_columns(pd.read_excel(path))
+
+
+# ---------- what the scripts call ----------
+
+def load_frame(xlsx_path):
+    """The working copy of *xlsx_path* if it is current, else the workbook."""
+    work = work_path(xlsx_path)
+    w, x = _mtime(work), _mtime(xlsx_path)
+    path = work if w is not None and (x is None or w >= x) else xlsx_path
+    with TRACER.span("io.load", path=path):
+        return type_columns(read_frame(path))
+
+
+def save_frame(df, xlsx_path, excel=True):
+    """Write the working copy of *xlsx_path*; with ``excel=True`` export the
+    workbook first, so the working copy stays the newer of the two."""
+    if excel:
+        with TRACER.span("io.save", path=xlsx_path):
+            write_frame(df, xlsx_path)
+    with TRACER.span("io.save", path=work_path(xlsx_path)):
+        write_frame(df, work_path(xlsx_path))
@@ -0,0 +1,47 @@
+"""Import pandas / Playwright on first use, not at startup.
+
+Importing pandas and Playwright takes most of a second, and every script
+pulled them in before argparse even looked at ``--help``.  Modules now say
+
+    from core.lazy import pd, sync_api
+
+and the real import happens the first time an attribute is touched
+(``pd.DataFrame``, ``sync_api.sync_playwright()``).  Exception classes are
+looked up the same way, only when an exception is being matched:
+
+    except sync_api.TimeoutError:
+"""
+
+import importlib.util
+import sys
+import types
+
+
+def lazy_import(name):
+    """Module *name*, executed on its first attribute access.  A missing
+    module only raises when it is actually used."""
+    if name in sys.modules:
+        return sys.modules[name]
+    try:
+        spec = importlib.util.find_spec(name)
+    except ModuleNotFoundError:
+        spec = None
+    if spec is None:
+        return _Missing(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+class _Missing(types.ModuleType):
+    def __getattr__(self, attr):
+        raise ModuleNotFoundError(f"No module named {self.__name__!r} (needed for {attr})")
+
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+sync_api = lazy_import("playwright.sync_api")
+async_api = lazy_import("playwright.async_api")
@@ -0,0 +1,115 @@
+"""On-disk cache of portal lookups (SQLite).
+
+    pen_lookup     (aadhaar, yob) → pen, dob      NULL pen = "Wrong Aadhaar/YOB"
+    school_lookup  (pen, dob)     → school, prev  NULL school = "Not Found"
+
+Scripts consult the cache before logging in, so a re-run only sends the
+new or expired rows to the portal.  Negative answers are kept for a much
+shorter time than positive ones because they are often typos that get
+fixed in the roster.
+
+A PEN never changes once issued, but a student's school does – they move,
+or get un-tagged – and checking it is the whole point of the status stage.
+School answers are therefore only trusted for ``SCHOOL_TTL_HOURS``.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_FILE = "udise_cache.sqlite"
+TTL_DAYS = 180          # Aadhaar → PEN
+NEGATIVE_TTL_DAYS = 7   # retry "not found" after a week
+SCHOOL_TTL_HOURS = float(os.getenv("UDISE_SCHOOL_TTL_HOURS", 24))  # PEN → school, found or not
+
+MISS = object()  # returned by get_* when there is no usable entry
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pen_lookup (
+    aadhaar TEXT NOT NULL, yob TEXT NOT NULL,
+    pen TEXT, dob TEXT, ts REAL NOT NULL,
+    PRIMARY KEY (aadhaar, yob)
+);
+CREATE TABLE IF NOT EXISTS school_lookup (
+    pen TEXT NOT NULL, dob TEXT NOT NULL,
+    school TEXT, prev_school TEXT, ts REAL NOT NULL,
+    PRIMARY KEY (pen, dob)
+);
+"""
+
+
+class LookupCache:
+    def __init__(self, path=CACHE_FILE, ttl_days=TTL_DAYS, negative_ttl_days=NEGATIVE_TTL_DAYS,
+                 school_ttl_hours=SCHOOL_TTL_HOURS):
+        self.path = path
+        self.ttl = ttl_days * 86_400
+        self.negative_ttl = negative_ttl_days * 86_400
+        self.school_ttl = school_ttl_hours * 3_600
+        # worker-pool threads share one connection; the lock serialises access
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(_SCHEMA)
+        self.lock = threading.Lock()
+        self.stats = {"pen": [0, 0], "school": [0, 0]}  # [hits, misses]
+
+    # ---------- internals ----------
+
+    def _get(self, kind, sql, key, value_col):
+        with self.lock:
+            row = self.db.execute(sql, key).fetchone()
+            hit = False
+            if row is not None:
+                ttl = self.ttl if row[value_col] is not None else self.negative_ttl
+                if kind == "school":
+                    ttl = min(ttl, self.school_ttl)
+                hit = time.time() - row[-1] <= ttl
+            self.stats[kind][0 if hit else 1] += 1
+        return row if hit else MISS
+
+    def _put(self, sql, params):
+        with self.lock:
+            self.db.execute(sql, params)
+            self.db.commit()
+
+    # ---------- Aadhaar + YOB → PEN ----------
+
+    def get_pen(self, aadhaar, yob):
+        """``(pen, dob)``, ``None`` for a cached "not found", or :data:`MISS`."""
+        row = self._get("pen", "SELECT pen, dob, ts FROM pen_lookup WHERE aadhaar=? AND yob=?",
+                        (aadhaar, str(yob)), 0)
+        if row is MISS:
+            return MISS
+        return None if row[0] is None else (row[0], row[1])
+
+    def put_pen(self, aadhaar, yob, result):
+        pen, dob = result if result else (None, None)
+        self._put("INSERT OR REPLACE INTO pen_lookup VALUES (?, ?, ?, ?, ?)",
+                  (aadhaar, str(yob), pen, dob, time.time()))
+
+    # ---------- PEN + DOB → school ----------
+
+    def get_school(self, pen, dob):
+        """``{"school", "prev_school", "ts"}``, ``None`` for "not found", or
+        :data:`MISS`.  ``ts`` is when the portal gave the answer."""
+        row = self._get("school", "SELECT school, prev_school, ts FROM school_lookup WHERE pen=? AND dob=?",
+                        (pen, dob), 0)
+        if row is MISS:
+            return MISS
+        return None if row[0] is None else {"school": row[0], "prev_school": row[1] or "", "ts": row[2]}
+
+    def put_school(self, pen, dob, result):
+        school = result["school"] if result else None
+        prev = result.get("prev_school", "") if result else None
+        self._put("INSERT OR REPLACE INTO school_lookup VALUES (?, ?, ?, ?, ?)",
+                  (pen, dob, school, prev, time.time()))
+
+    # ---------- reporting ----------
+
+    def summary(self):
+        with self.lock:
+            parts = [f"{kind} {h} hit / {m} miss" for kind, (h, m) in self.stats.items() if h or m]
+        return "cache: " + (" | ".join(parts) if parts else "not used")
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,8 @@
+"""Login + land on the Progression Summary (Section Wise) table."""
+
+from core.session import login_and_land_with, land_progression_summary
+
+
+def login_and_land(user: str, pwd: str):
+    """``(pw, browser, page)`` parked on the summary table with View/Update buttons."""
+    return login_and_land_with(user, pwd, land_progression_summary)
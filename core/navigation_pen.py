@@ -0,0 +1,8 @@
+"""Login + land on the Import Module search page (Get PEN & DOB / PEN + DOB search)."""
+
+from core.session import login_and_land_with, land_import_module
+
+
+def login_and_land(user: str, pwd: str):
+    """``(pw, browser, page)`` parked on the Import Module search page."""
+    return login_and_land_with(user, pwd, land_import_module)
@@ -0,0 +1,262 @@
+"""SweetAlert popups, pushed from the page instead of polled.
+
+The scripts used to ``wait_for_selector`` the popup and then ask, label by
+label, which button it had (``locator.count()`` for "Confirm", "Yes",
+"OK", …) – a round-trip each – and a success popup that never came cost
+its whole timeout.  Here one MutationObserver per page (an init script,
+installed by :func:`watch` on first use) notices every swal2 popup that
+opens or closes and pushes it to Python through ``expose_binding`` as
+``{"event", "seq", "icon", "title", "buttons"}``; :data:`POPUPS` keeps the
+count per popup for the report.
+
+Handling a popup is one call, the same in every script:
+
+    popup = resolve(page, "import-confirm", 15_000, press=CONFIRM_LABELS)
+    popup.icon, popup.title, popup.pressed       # None when no popup came
+
+It is a single ``evaluate``: the page waits for the next popup (newer than
+the last one resolved on that page), clicks the first button matching
+*press* (labels), then *classes* (selectors inside the popup), then the
+last button when ``last=True``, and waits until the popup has closed.
+The wait is learned per popup (:class:`core.readiness.AdaptiveTimeout`),
+so a popup that often never comes stops costing its full timeout;
+``required=True`` retries once at the full timeout, as
+:meth:`core.readiness.Readiness.wait_for` does.  :func:`dismiss` presses
+the popup that is open right now, if any, without waiting.
+
+Async pages (:mod:`core.async_pool`) use :func:`resolve_async` /
+:func:`dismiss_async`.
+"""
+
+import json
+import threading
+import time
+import weakref
+from collections import Counter
+from typing import NamedTuple
+
+from core.readiness import READY
+from core.selectors import POPUP_BUTTON, POPUP_SHOWN, POPUP_TITLE
+from core.tracing import TRACER
+
+BINDING = "__udisePopup"
+CLOSE_TIMEOUT = 5_000  # ms for a pressed popup to go away
+CONFIRM_LABELS = ("Confirm", "Yes", "OK", "Okey", "Okay")
+DISMISS_LABELS = ("Okay", "Ok", "Okey", "Close")
+
+# Installed once per document; window.__udiseSwal answers _RESOLVE_JS.
+_OBSERVER_JS = """
+(() => {
+    if (window.__udiseSwal) return;
+    const SHOWN = %(shown)s, TITLE = %(title)s, BUTTON = %(button)s, BINDING = %(binding)s;
+    // seq starts at the clock so it keeps growing across navigations
+    const st = window.__udiseSwal = {seq: Date.now(), open: null, el: null, sig: "", waiters: new Set()};
+    const visible = (b) => b.offsetParent !== null;
+    const buttons = (el) => Array.from(el.querySelectorAll(BUTTON)).filter(visible);
+    const push = (event, popup) => {
+        if (typeof window[BINDING] === "function") window[BINDING]({event, ...popup}).catch(() => {});
+    };
+    const describe = (el) => {
+        const icon = Array.from(el.classList).find((c) => c.startsWith("swal2-icon-"));
+        const title = el.querySelector(TITLE);
+        return {
+            icon: icon ? icon.slice("swal2-icon-".length) : "",
+            title: title ? title.innerText.trim() : "",
+            buttons: buttons(el).map((b) => b.innerText.trim()),
+        };
+    };
+    const check = () => {
+        const el = Array.from(document.querySelectorAll(SHOWN)).pop() || null;
+        if (!el) {
+            if (st.open) {
+                push("close", st.open);
+                st.open = st.el = null;
+                st.sig = "";
+                st.waiters.forEach((w) => w());
+            }
+            return;
+        }
+        const popup = describe(el);
+        const sig = [popup.icon, popup.title, ...popup.buttons].join("\\u0000");
+        if (el === st.el && sig === st.sig) return;
+        if (st.open) push("close", st.open);  // swal2 reuses the element for the next popup
+        st.el = el;
+        st.sig = sig;
+        st.open = {seq: ++st.seq, ...popup};
+        push("open", st.open);
+        st.waiters.forEach((w) => w());
+    };
+    st.until = (test, timeout) => new Promise((resolve) => {
+        const done = (value) => { st.waiters.delete(poke); clearTimeout(timer); resolve(value); };
+        const poke = () => { const value = test(); if (value) done(value); };
+        const timer = setTimeout(() => done(null), timeout);
+        st.waiters.add(poke);
+        poke();
+    });
+    st.press = (labels, classes, last) => {
+        const all = buttons(st.el);
+        let btn = null;
+        for (const label of labels) {
+            const want = label.toLowerCase();
+            btn = all.find((b) => b.innerText.trim().toLowerCase().includes(want));
+            if (btn) break;
+        }
+        for (const cls of classes) {
+            if (btn) break;
+            btn = st.el.querySelector(cls);
+        }
+        if (!btn && last) btn = all[all.length - 1] || null;
+        if (!btn) return "";
+        btn.click();
+        return btn.innerText.trim();
+    };
+    new MutationObserver(check).observe(document, {
+        subtree: true, childList: true, attributes: true, attributeFilter: ["class"],
+    });
+    check();
+})()
+""" % {k: json.dumps(v) for k, v in
+       {"shown": POPUP_SHOWN, "title": POPUP_TITLE, "button": POPUP_BUTTON, "binding": BINDING}.items()}
+
+_RESOLVE_JS = """
+async (a) => {
+    const st = window.__udiseSwal;
+    if (!st) return null;
+    const open = await st.until(() => st.open && st.open.seq > a.after && st.open, a.timeout);
+    if (!open) return null;
+    const popup = {...open, pressed: ""};
+    if (a.labels.length || a.classes.length || a.last) {
+        popup.pressed = st.press(a.labels, a.classes, a.last);
+        if (popup.pressed) await st.until(() => !st.open || st.open.seq !== open.seq, a.close);
+    }
+    return popup;
+}
+"""
+
+
+class Popup(NamedTuple):
+    seq: int
+    icon: str       # "success", "error", "question", … ("" without an icon)
+    title: str
+    buttons: list   # button texts
+    pressed: str    # text of the button clicked ("" when none was)
+
+
+class PopupLog:
+    """Every popup the observers pushed, and how many a script resolved."""
+
+    def __init__(self):
+        self.opened = Counter()   # (icon, title) -> popups
+        self.resolved = 0
+        self.missed = Counter()   # popup name -> waits that saw no popup
+        self.pages = weakref.WeakKeyDictionary()  # page -> seq of the last popup resolved there
+        self.lock = threading.Lock()
+
+    def push(self, _source, event):
+        if event.get("event") == "open":
+            with self.lock:
+                self.opened[(event.get("icon", ""), event.get("title", "")[:60])] += 1
+
+    def handled(self, page, popup):
+        """*popup* (from ``_RESOLVE_JS``) as a :class:`Popup`; later waits
+        on *page* look for a newer one."""
+        if popup is None:
+            return None
+        with self.lock:
+            self.resolved += 1
+            self.pages[page] = max(self.pages.get(page, 0), popup["seq"])
+        return Popup(popup["seq"], popup["icon"], popup["title"], popup["buttons"], popup["pressed"])
+
+    def done(self, page, name, timer, t0, popup):
+        if popup is None:
+            with self.lock:
+                self.missed[name] += 1
+            return None
+        waited = (time.perf_counter() - t0) * 1000
+        timer.observe(waited)
+        READY.record("popup." + name, waited)
+        return self.handled(page, popup)
+
+    def report(self):
+        if not self.opened:
+            return
+        print(f"\n–––– POPUPS ––––\n{sum(self.opened.values())} shown, {self.resolved} handled"
+              + "".join(f" | {name}: {n} never came" for name, n in sorted(self.missed.items())))
+        for (icon, title), n in self.opened.most_common(8):
+            print(f"   {n:>6} {icon or '-':<9} {title}")
+
+
+POPUPS = PopupLog()  # shared by every page (and thread) in the process
+
+
+# ---------- install ----------
+
+def watch(page):
+    """Install the observer on *page* (once); later documents get it from
+    the init script."""
+    with POPUPS.lock:
+        if page in POPUPS.pages:
+            return
+        POPUPS.pages[page] = 0
+    page.expose_binding(BINDING, POPUPS.push)
+    page.add_init_script(_OBSERVER_JS)
+    page.evaluate(_OBSERVER_JS)
+
+
+async def watch_async(page):
+    """:func:`watch` on an async page."""
+    with POPUPS.lock:
+        if page in POPUPS.pages:
+            return
+        POPUPS.pages[page] = 0
+    await page.expose_binding(BINDING, POPUPS.push)
+    await page.add_init_script(_OBSERVER_JS)
+    await page.evaluate(_OBSERVER_JS)
+
+
+# ---------- resolution ----------
+
+def _args(page, timeout_ms, press, classes, last):
+    return {"after": POPUPS.pages.get(page, 0), "timeout": timeout_ms, "labels": list(press),
+            "classes": list(classes), "last": last, "close": CLOSE_TIMEOUT}
+
+
+def resolve(page, name, timeout_ms=10_000, press=(), classes=(), last=False, required=False):
+    """Wait for the next popup on *page*, press a button and wait for it to
+    close (see the module docstring).  Returns a :class:`Popup`, or None
+    when no popup came within the learned timeout."""
+    watch(page)
+    timer = READY.timer("popup." + name, timeout_ms)
+    t0 = time.perf_counter()
+    with TRACER.span("popup." + name):
+        popup = page.evaluate(_RESOLVE_JS, _args(page, timer.value, press, classes, last))
+        if popup is None and required and timer.value < timer.ceiling:
+            popup = page.evaluate(_RESOLVE_JS, _args(page, timer.ceiling, press, classes, last))
+    return POPUPS.done(page, name, timer, t0, popup)
+
+
+async def resolve_async(page, name, timeout_ms=10_000, press=(), classes=(), last=False,
+                        required=False):
+    """:func:`resolve` on an async page."""
+    await watch_async(page)
+    timer = READY.timer("popup." + name, timeout_ms)
+    t0 = time.perf_counter()
+    with TRACER.span("popup." + name):
+        popup = await page.evaluate(_RESOLVE_JS, _args(page, timer.value, press, classes, last))
+        if popup is None and required and timer.value < timer.ceiling:
+            popup = await page.evaluate(_RESOLVE_JS, _args(page, timer.ceiling, press, classes, last))
+    return POPUPS.done(page, name, timer, t0, popup)
+
+
+def dismiss(page, press=(), classes=(), last=True):
+    """Press a button of the popup open on *page* right now; None if there
+    is none."""
+    watch(page)
+    return POPUPS.handled(page, page.evaluate(_RESOLVE_JS, _args(page, 0, press, classes, last)))
+
+
+async def dismiss_async(page, press=(), classes=(), last=True):
+    """:func:`dismiss` on an async page."""
+    await watch_async(page)
+    return POPUPS.handled(page, await page.evaluate(_RESOLVE_JS, _args(page, 0, press, classes, last)))
+
@@ -0,0 +1,167 @@
+"""Shared client-side rate limit for portal calls, adapted AIMD-style.
+
+Every request that makes the portal do work (a search, an import, a release
+request, a direct API call) goes through :data:`LIMITER`:
+
+    with LIMITER.call():
+        page.click("button:has-text('Search')")
+        …wait for the answer…
+
+:meth:`RateLimiter.call` first takes a token from a token bucket, which
+paces the calls of every thread in the process.  It then times the call and
+feeds the result back:
+
+* additive increase – each answer that comes back quickly raises the rate
+  by ``INCREASE`` calls/s
+* multiplicative decrease – a timeout or error multiplies the rate by
+  ``ERROR_FACTOR``; an answer much slower than the usual one multiplies it
+  by ``SLOW_FACTOR``.  At most one decrease happens per ``COOLDOWN`` seconds,
+  so a burst of failures from one slow spell is only counted once.
+
+So the scripts speed up while the portal keeps up and back off as soon as it
+struggles.  Coroutines (:mod:`core.async_pool`) use ``async with
+LIMITER.call_async():``, which waits for its token without blocking the
+event loop.  ``str(LIMITER)`` (e.g. ``1.8/s``) is shown in the progress lines.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from core.tracing import TRACER
+
+START_RATE = float(os.getenv("UDISE_RATE", 2.0))       # calls per second
+MIN_RATE = 0.2
+MAX_RATE = float(os.getenv("UDISE_MAX_RATE", 10.0))
+BURST = 2                # tokens that may pile up while idle
+INCREASE = 0.05          # calls/s added per fast answer
+ERROR_FACTOR = 0.5
+SLOW_FACTOR = 0.8
+SLOW_RATIO = 3.0         # "slow" = this many times the usual latency …
+SLOW_MIN_MS = 1_000      # … and at least this long
+COOLDOWN = 3.0           # seconds between two decreases
+EWMA = 0.2               # weight of the newest sample in the usual latency
+
+BACKOFF_BASE = 2.0       # seconds, doubled per attempt
+BACKOFF_CAP = 60.0
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """Exponential backoff with full jitter for retry *attempt* (1, 2, …)."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class RateLimiter:
+    def __init__(self, rate=START_RATE, min_rate=MIN_RATE, max_rate=MAX_RATE, burst=BURST):
+        self.rate = min(max(rate, min_rate), max_rate)
+        self.min_rate, self.max_rate = min_rate, max_rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.stamp = time.monotonic()
+        self.usual_ms = None      # EWMA of successful latencies
+        self.last_cut = 0.0
+        self.lock = threading.Lock()
+        self.stats = {"calls": 0, "errors": 0, "slow": 0, "cuts": 0, "waited": 0.0,
+                      "low": self.rate, "high": self.rate}
+
+    def __str__(self):
+        return f"{self.rate:.1f}/s"
+
+    # ---------- token bucket ----------
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def _take(self, start):
+        """Take a token; returns None on success, else the seconds to wait."""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                self.stats["waited"] += now - start
+                return None
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """Block until a call may be made; returns the seconds waited."""
+        start = time.monotonic()
+        while True:
+            pause = self._take(start)
+            if pause is None:
+                return time.monotonic() - start
+            time.sleep(pause)
+
+    async def acquire_async(self):
+        """:meth:`acquire` for coroutines – sleeps on the event loop."""
+        start = time.monotonic()
+        while True:
+            pause = self._take(start)
+            if pause is None:
+                return time.monotonic() - start
+            await asyncio.sleep(pause)
+
+    # ---------- AIMD ----------
+
+    def observe(self, latency_ms, ok=True):
+        with self.lock:
+            self.stats["calls"] += 1
+            now = time.monotonic()
+            slow = (ok and self.usual_ms is not None
+                    and latency_ms > max(SLOW_MIN_MS, SLOW_RATIO * self.usual_ms))
+            if ok and not slow:
+                self.usual_ms = latency_ms if self.usual_ms is None else (
+                    (1 - EWMA) * self.usual_ms + EWMA * latency_ms)
+                self.rate = min(self.max_rate, self.rate + INCREASE)
+            else:
+                self.stats["errors" if not ok else "slow"] += 1
+                if now - self.last_cut >= COOLDOWN:
+                    self.rate = max(self.min_rate, self.rate * (ERROR_FACTOR if not ok else SLOW_FACTOR))
+                    self.last_cut = now
+                    self.stats["cuts"] += 1
+            self.stats["low"] = min(self.stats["low"], self.rate)
+            self.stats["high"] = max(self.stats["high"], self.rate)
+
+    def _started(self, waited):
+        t0 = time.perf_counter()
+        if waited > 0.001 and TRACER.enabled:
+            TRACER.add("rate.wait", t0 - waited, waited)
+        return t0
+
+    @contextmanager
+    def call(self):
+        """Rate-limit the enclosed portal call and learn from how it went.
+        Exceptions count as failures and are re-raised."""
+        t0 = self._started(self.acquire())
+        try:
+            yield
+        except BaseException:
+            self.observe((time.perf_counter() - t0) * 1000, ok=False)
+            raise
+        self.observe((time.perf_counter() - t0) * 1000)
+
+    @asynccontextmanager
+    async def call_async(self):
+        """:meth:`call` for coroutines."""
+        t0 = self._started(await self.acquire_async())
+        try:
+            yield
+        except BaseException:
+            self.observe((time.perf_counter() - t0) * 1000, ok=False)
+            raise
+        self.observe((time.perf_counter() - t0) * 1000)
+
+    def report(self):
+        st = self.stats
+        if not st["calls"]:
+            return
+        print(f"\n–––– RATE LIMIT ––––\n{st['calls']} portal calls, now {self}, "
+              f"range {st['low']:.1f}–{st['high']:.1f}/s | {st['errors']} errors, "
+              f"{st['slow']} slow → {st['cuts']} slow-downs | waited {st['waited']:.1f}s for tokens")
+
+
+LIMITER = RateLimiter()  # shared by every script (and worker thread) in the process
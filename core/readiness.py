@@ -0,0 +1,244 @@
+"""Event-driven readiness waits that replace fixed ``sleep`` calls.
+
+Wrap the action that triggers a server round-trip in :meth:`Readiness.step`:
+
+    with READY.step(page, "detail-table", selector=DETAIL_READY, baseline_ms=5_000) as st:
+        if button.count():
+            button.click()
+        else:
+            st.cancel()
+
+On exit we wait for the XHR/fetch response the action triggered and then for
+*selector* — nothing longer.  Any XHR/fetch response on the page after the
+step starts counts: the portal's endpoint URLs are not known here, and the
+*selector* wait is what confirms the right content arrived.  Timeouts are learned per step from observed
+latencies (p95 × margin, clamped), with one retry at the full timeout before
+giving up, so a slow portal day does not turn into false timeouts.
+
+On an async page (:mod:`core.async_pool`) the same step is entered with
+``async with`` and :meth:`Readiness.wait_for_async` replaces
+:meth:`Readiness.wait_for`; both share the learned timeouts.
+
+``baseline_ms`` is the fixed sleep the step replaces; :meth:`Readiness.report`
+prints how much wall-clock time the event waits saved against it.
+"""
+
+import threading
+import time
+
+from core.lazy import async_api, sync_api
+
+from core.browser_utils import PAGE_TIMEOUT
+from core.tracing import TRACER
+
+MIN_TIMEOUT = 2_000
+XHR_TIMEOUT = 10_000
+MAX_XHR_MISSES = 3  # steps that never fire an XHR stop waiting for one
+MARGIN = 3.0
+WINDOW = 50  # latencies remembered per step
+
+
+def _pct(values, p):
+    if not values:
+        return 0.0
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round(p / 100 * (len(s) - 1))))]
+
+
+def _is_xhr(resp):
+    return resp.request.resource_type in ("xhr", "fetch")
+
+
+class AdaptiveTimeout:
+    """Timeout that tracks p95 of recent latencies × MARGIN."""
+
+    def __init__(self, ceiling_ms=PAGE_TIMEOUT, floor_ms=MIN_TIMEOUT):
+        self.ceiling = ceiling_ms
+        self.floor = floor_ms
+        self.samples = []
+
+    def observe(self, ms):
+        self.samples.append(ms)
+        del self.samples[:-WINDOW]
+
+    @property
+    def value(self):
+        if len(self.samples) < 5:
+            return self.ceiling  # not enough data yet
+        return int(min(self.ceiling, max(self.floor, _pct(self.samples, 95) * MARGIN)))
+
+
+class _Step:
+    def __init__(self, ready, page, name, selector, baseline_ms, required, timeout_ms):
+        self.ready, self.page, self.name = ready, page, name
+        self.selector = selector
+        self.baseline_ms, self.required = baseline_ms, required
+        self.timeout_ms = timeout_ms
+        self.cancelled = False
+        self._seen = []
+
+    def cancel(self):
+        """Skip the wait (e.g. the triggering click failed)."""
+        self.cancelled = True
+
+    def _on_response(self, resp):
+        if _is_xhr(resp):
+            self._seen.append(resp)
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        self.page.on("response", self._on_response)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None and not self.cancelled:
+                self._wait()
+        finally:
+            self.page.remove_listener("response", self._on_response)
+        self._record(exc_type)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None and not self.cancelled:
+                await self._wait_async()
+        finally:
+            self.page.remove_listener("response", self._on_response)
+        self._record(exc_type)
+        return False
+
+    def _record(self, exc_type):
+        if exc_type is None and not self.cancelled:
+            elapsed = time.perf_counter() - self.t0
+            self.ready.record(self.name, elapsed * 1000, self.baseline_ms)
+            if TRACER.enabled:
+                TRACER.add("step." + self.name, self.t0, elapsed)
+
+    def _wait(self):
+        ready = self.ready
+        if not self._seen and self.name not in ready.no_xhr:
+            timer = ready.timer(self.name + ":xhr", XHR_TIMEOUT)
+            t0 = time.perf_counter()
+            try:
+                self.page.wait_for_event(
+                    "response", predicate=_is_xhr, timeout=timer.value
+                )
+                timer.observe((time.perf_counter() - t0) * 1000)
+                ready.xhr_misses[self.name] = 0
+            except sync_api.TimeoutError:
+                # served from cache / no XHR needed – the selector decides
+                misses = ready.xhr_misses[self.name] = ready.xhr_misses.get(self.name, 0) + 1
+                if misses >= MAX_XHR_MISSES:
+                    ready.no_xhr.add(self.name)
+        if not self.selector:
+            return
+        try:
+            ready.wait_for(self.page, self.selector, self.name, self.timeout_ms)
+        except sync_api.TimeoutError:
+            if self.required:
+                raise
+
+    async def _wait_async(self):
+        ready = self.ready
+        if not self._seen and self.name not in ready.no_xhr:
+            timer = ready.timer(self.name + ":xhr", XHR_TIMEOUT)
+            t0 = time.perf_counter()
+            try:
+                await self.page.wait_for_event(
+                    "response", predicate=_is_xhr, timeout=timer.value
+                )
+                timer.observe((time.perf_counter() - t0) * 1000)
+                ready.xhr_misses[self.name] = 0
+            except async_api.TimeoutError:
+                misses = ready.xhr_misses[self.name] = ready.xhr_misses.get(self.name, 0) + 1
+                if misses >= MAX_XHR_MISSES:
+                    ready.no_xhr.add(self.name)
+        if not self.selector:
+            return
+        try:
+            await ready.wait_for_async(self.page, self.selector, self.name, self.timeout_ms)
+        except async_api.TimeoutError:
+            if self.required:
+                raise
+
+
+class Readiness:
+    """Per-step adaptive timeouts + savings bookkeeping (thread-safe)."""
+
+    def __init__(self):
+        self.timers = {}
+        self.xhr_misses = {}
+        self.no_xhr = set()
+        self.stats = {}  # step -> {"n", "waited", "baseline", "samples"}
+        self.lock = threading.Lock()
+
+    def timer(self, name, ceiling_ms=PAGE_TIMEOUT):
+        with self.lock:
+            if name not in self.timers:
+                self.timers[name] = AdaptiveTimeout(ceiling_ms)
+            return self.timers[name]
+
+    def record(self, name, waited_ms, baseline_ms=0):
+        with self.lock:
+            st = self.stats.setdefault(name, {"n": 0, "waited": 0.0, "baseline": 0.0, "samples": []})
+            st["n"] += 1
+            st["waited"] += waited_ms
+            st["baseline"] += baseline_ms
+            st["samples"].append(waited_ms)
+
+    def step(self, page, name, selector=None, baseline_ms=0, required=True,
+             timeout_ms=PAGE_TIMEOUT):
+        return _Step(self, page, name, selector, baseline_ms, required, timeout_ms)
+
+    def wait_for(self, page, selector, name, timeout_ms=PAGE_TIMEOUT, state="visible"):
+        """``wait_for_selector`` with the step's learned timeout (never above
+        *timeout_ms*), retried once at *timeout_ms* before the TimeoutError is
+        allowed through."""
+        timer = self.timer(name, timeout_ms)
+        t0 = time.perf_counter()
+        with TRACER.span("wait." + name):
+            try:
+                handle = page.wait_for_selector(selector, state=state, timeout=timer.value)
+            except sync_api.TimeoutError:
+                if timer.value >= timer.ceiling:
+                    raise
+                handle = page.wait_for_selector(selector, state=state, timeout=timer.ceiling)
+        timer.observe((time.perf_counter() - t0) * 1000)
+        return handle
+
+    async def wait_for_async(self, page, selector, name, timeout_ms=PAGE_TIMEOUT, state="visible"):
+        """:meth:`wait_for` on an async page."""
+        timer = self.timer(name, timeout_ms)
+        t0 = time.perf_counter()
+        with TRACER.span("wait." + name):
+            try:
+                handle = await page.wait_for_selector(selector, state=state, timeout=timer.value)
+            except async_api.TimeoutError:
+                if timer.value >= timer.ceiling:
+                    raise
+                handle = await page.wait_for_selector(selector, state=state, timeout=timer.ceiling)
+        timer.observe((time.perf_counter() - t0) * 1000)
+        return handle
+
+    def report(self):
+        if not self.stats:
+            return
+        print("\n–––– WAIT TIMES (event-driven vs old fixed sleeps) ––––")
+        total_saved = 0.0
+        for name, st in sorted(self.stats.items()):
+            saved = st["baseline"] - st["waited"] if st["baseline"] else 0.0
+            total_saved += saved
+            line = (f"{name:<18} n={st['n']:<5} p50={_pct(st['samples'], 50):>6.0f}ms "
+                    f"p95={_pct(st['samples'], 95):>6.0f}ms")
+            if st["baseline"]:
+                line += f"  saved {saved / 1000:>7.1f}s"
+            print(line)
+        if total_saved:
+            print(f"total saved vs fixed sleeps: {total_saved / 1000:.1f}s")
+
+
+READY = Readiness()  # shared by every script in the process
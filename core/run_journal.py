@@ -0,0 +1,84 @@
+"""Append-only JSONL journal so batch scripts can resume after a crash.
+
+Every processed student (or section) is written as one line and fsync'd
+before the script moves on, so at most the in-flight row is lost.  On the
+next start the journal is replayed: finished keys are skipped and their
+recorded columns restored.  The Excel output is written once, at the end,
+instead of rewriting the whole workbook every N rows.
+
+When a run completes, :meth:`RunJournal.finish` appends an end marker; the
+next run then rotates the old journal to ``*.prev`` and starts fresh.
+"""
+
+import json
+import os
+import threading
+import time
+
+
+def journal_path(out_file):
+    """``students_x.xlsx`` → ``students_x.journal.jsonl``"""
+    return os.path.splitext(out_file)[0] + ".journal.jsonl"
+
+
+class RunJournal:
+    def __init__(self, path, fresh=False):
+        self.path = path
+        self.done = {}  # key -> fields (last record wins)
+        self.lock = threading.Lock()
+
+        if os.path.exists(path):
+            finished = self._load()
+            if fresh or finished:
+                self.done.clear()
+                os.replace(path, path + ".prev")
+        if self.done:
+            print(f"↻ resuming: {len(self.done)} entries already done ({path})")
+        self.fh = open(path, "a", encoding="utf-8")
+        if self.fh.tell() and not self._ends_with_newline():
+            self.fh.write("\n")  # seal a torn last line so the next record parses
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as fh:
+            fh.seek(-1, os.SEEK_END)
+            return fh.read(1) == b"\n"
+
+    def _load(self):
+        finished = False
+        with open(self.path, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from a crash
+                if rec.get("finished"):
+                    finished = True
+                    continue
+                finished = False
+                self.done[rec["key"]] = rec["fields"]
+        return finished
+
+    def __contains__(self, key):
+        return key in self.done
+
+    def get(self, key):
+        return self.done.get(key)
+
+    def record(self, key, fields):
+        line = json.dumps({"key": key, "ts": time.time(), "fields": fields},
+                          ensure_ascii=False, default=str)
+        with self.lock:
+            self.fh.write(line + "\n")
+            self.fh.flush()
+            os.fsync(self.fh.fileno())
+            self.done[key] = fields
+
+    def finish(self):
+        with self.lock:
+            self.fh.write(json.dumps({"finished": time.time()}) + "\n")
+            self.fh.flush()
+            os.fsync(self.fh.fileno())
+
+    def close(self):
+        with self.lock:
+            self.fh.close()
@@ -0,0 +1,149 @@
+"""Export the Pending sections of the Progression Summary to one workbook.
+
+    export_pending_sections(xlsx, fresh=False, page=None, incremental=False)
+
+One sheet per section (``<grade>_<section>``), each row a student of its
+detail table.  Every exported section is journaled first, so an interrupted
+run only re-opens what is missing, and the workbook is written at the end.
+With *incremental*, a snapshot of each section's status and student counts
+(``<xlsx>.snapshot.json``) decides which sections are opened at all, and
+only their sheets are rewritten.
+
+``main_extractor.py`` and ``extract_pending.py`` are the command lines.
+"""
+
+import json
+import os
+from core.lazy import pd
+from dotenv import load_dotenv
+from core.browser_utils import safe_close
+from core.navigation import login_and_land
+from core.run_journal import RunJournal, journal_path
+from core.readiness import READY
+from core.tracing import TRACER
+from core.section_queue import run_sections
+from core.table_reader import read_summary, parse_detail_table
+
+OUTPUT_FILE = "UDISE.xlsx"
+
+# NAVIGATION
+# login_and_land: reuses the saved session when possible (core.navigation)
+
+# PARSE STUDENT DETAILS
+# parse_detail_table / read_summary: one page.evaluate per table (core.table_reader)
+# opening each section, retries, going back: core.section_queue
+
+# SUMMARY SNAPSHOT (incremental mode)
+# {sheet: [status, total, pending]} of every Pending section whose sheet in the
+# workbook is up to date; a section is re-opened only when its entry changed.
+def snapshot_path(xlsx):
+    return os.path.splitext(xlsx)[0] + ".snapshot.json"
+
+
+def load_snapshot(xlsx):
+    path = snapshot_path(xlsx)
+    if not (os.path.exists(path) and os.path.exists(xlsx)):
+        return None
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def save_snapshot(xlsx, snapshot):
+    tmp = snapshot_path(xlsx) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(snapshot, fh, indent=1, ensure_ascii=False)
+    os.replace(tmp, snapshot_path(xlsx))
+
+
+def sheet_name(grade, section):
+    return f"{grade}_{section}".replace(" ", "")[:31]
+
+
+def fingerprint(info):
+    """Status and student counts of a summary row, or None – "changed" –
+    when either count cell is missing or not a number (SUMMARY_COLS only
+    guesses where the portal shows them)."""
+    counts = [(c or "").strip() for c in (info.total, info.pending)]
+    if not all(c.isdigit() for c in counts):
+        return None
+    return [info.status, *counts]
+
+
+def write_sheets(xlsx, sheets, keep):
+    """Replace *sheets* ({name: rows}) in *xlsx* and remove every sheet not
+    named in *keep*; the other sheets are left as they are."""
+    with TRACER.span("io.save", path=xlsx, sheets=len(sheets)):
+        from openpyxl import load_workbook
+        if not sheets:
+            wb = load_workbook(xlsx, read_only=True)
+            names = wb.sheetnames
+            wb.close()  # read_only keeps the file open until closed
+            if not set(names) & set(keep):
+                os.remove(xlsx)  # nothing Pending any more
+                return
+        with pd.ExcelWriter(xlsx, engine="openpyxl", mode="a", if_sheet_exists="replace") as writer:
+            for sheet, rows in sheets.items():
+                pd.DataFrame(rows).to_excel(writer, sheet_name=sheet, index=False)
+            for sheet in list(writer.book.sheetnames):
+                if sheet not in keep and sheet not in sheets:
+                    del writer.book[sheet]
+
+
+@TRACER.traced("stage.extract")
+def export_pending_sections(xlsx=OUTPUT_FILE, fresh=False, page=None, incremental=False):
+    """Export every Pending section to *xlsx*, one sheet each.
+
+    With *incremental*, only sections whose status / student counts differ
+    from the snapshot of the last run are opened, and only their sheets are
+    rewritten (sheets of sections no longer Pending are dropped).  Pass
+    *page* (already on the Progression Summary, e.g. from run_pipeline.py)
+    to reuse a browser; it is then left open for the caller."""
+    load_dotenv()
+    user, pwd = os.getenv("SSG_USER"), os.getenv("SSG_PASS")
+    if page is None and not (user and pwd):
+        raise SystemExit("Set SSG_USER & SSG_PASS in .env")
+
+    # one journal entry per exported section; the workbook is built from it at the end
+    journal = RunJournal(journal_path(xlsx), fresh=fresh)
+    processed = {tuple(rec["key"]) for rec in journal.done.values()}
+
+    pw = browser = None
+    try:
+        if page is None:
+            pw, browser, page = login_and_land(user, pwd)
+
+        summary = [r for r in read_summary(page) if r.status == "Pending"]
+        current = {sheet_name(r.grade, r.section): fingerprint(r) for r in summary}
+        snapshot = load_snapshot(xlsx) if incremental else None
+        unchanged = set()
+        if snapshot is not None:
+            unchanged = {sheet for sheet, fp in current.items() if fp is not None and snapshot.get(sheet) == fp}
+            processed |= {r.key for r in summary if sheet_name(r.grade, r.section) in unchanged}
+            print(f"Δ {len(current) - len(unchanged)} of {len(current)} pending sections changed since the last snapshot")
+
+        def export(page, info):
+            sheet = sheet_name(info.grade, info.section)
+            df = parse_detail_table(page)
+            if df is None or df.empty:
+                raise ValueError("parsed 0 rows")
+            journal.record(sheet, {"key": info.key, "rows": df.to_dict("records")})
+            print(f"   ✓ {len(df)} rows saved → {sheet}")
+
+        run = run_sections(page, export, done=processed, pending=summary, name="extract")
+
+        if snapshot is not None:
+            write_sheets(xlsx, {sheet: rec["rows"] for sheet, rec in journal.done.items()}, keep=current)
+        else:
+            with TRACER.span("io.save", path=xlsx), pd.ExcelWriter(xlsx, engine="openpyxl") as writer:
+                for sheet, rec in journal.done.items():
+                    pd.DataFrame(rec["rows"]).to_excel(writer, sheet_name=sheet, index=False)
+        # sections that failed stay out of the snapshot, so they are retried next time
+        save_snapshot(xlsx, {sheet: fp for sheet, fp in current.items()
+                             if fp is not None and (sheet in unchanged or sheet in journal.done)})
+        journal.finish()  # not reached when interrupted: the next run resumes from the journal
+    finally:
+        journal.close()
+        safe_close(browser, pw)
+    print(f"✔ Export done → {xlsx}")
+    run.report()
+    READY.report()
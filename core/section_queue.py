@@ -0,0 +1,128 @@
+"""Work queue over the Pending sections of the Progression Summary.
+
+The scripts used to loop ``while True``: re-scan every summary row, process
+the Pending ones, repeat – and a section that failed was simply skipped,
+so each pass cost a full DOM scan per section.  Here the summary is read
+once, the Pending sections go into a queue, and each one is opened by its
+grade/section text (no element handles, so nothing goes stale when the page
+navigates).  A section that fails goes to the back of the queue until its
+``MAX_ATTEMPTS`` are used up.  The summary is only read again – or the
+page re-landed – when a row can no longer be found after navigating back.
+
+    def work(page, info):            # detail table of *info* is open
+        …
+    run = run_sections(page, work, done=already_done, name="extract")
+    run.report()
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from core.lazy import sync_api
+from core.browser_utils import PAGE_TIMEOUT
+from core.readiness import READY
+from core.selectors import DETAIL_READY, SUMMARY_READY, section_button
+from core.session import land_progression_summary
+from core.table_reader import read_summary
+from core.tracing import TRACER
+
+MAX_ATTEMPTS = 3
+
+
+@dataclass
+class SectionRun:
+    name: str
+    done: list = field(default_factory=list)      # (grade, section) keys
+    failed: list = field(default_factory=list)
+    retries: int = 0
+    rereads: int = 0
+    elapsed: float = 0.0
+
+    def report(self):
+        total = len(self.done) + len(self.failed)
+        if not total:
+            return
+        rate = len(self.done) / self.elapsed * 60 if self.elapsed else 0
+        print(f"\n–––– SECTIONS ({self.name}) ––––\n{len(self.done)}/{total} sections in "
+              f"{self.elapsed:.0f}s ({rate:.1f}/min) | {self.retries} retries, "
+              f"{self.rereads} summary re-reads")
+        for grade, section in self.failed:
+            print(f"   ✗ {grade}_{section} gave up after {MAX_ATTEMPTS} attempts")
+
+
+def back_to_summary(page):
+    """Return from a detail table; re-land on the summary if going back
+    does not bring it up.  Returns True when the page had to be re-landed."""
+    if page.is_visible(SUMMARY_READY):
+        return False  # the detail table never opened
+    try:
+        page.go_back()
+        page.wait_for_selector(SUMMARY_READY, timeout=PAGE_TIMEOUT)
+        return False
+    except sync_api.TimeoutError:
+        land_progression_summary(page)
+        return True
+
+
+def open_section(page, info, baseline_ms=5_000):
+    """Click the section's View/Update and wait for its detail rows."""
+    button = page.locator(section_button(info.grade, info.section)).first
+    if not button.count():
+        raise LookupError(f"{info.grade}_{info.section} not on the summary")
+    with READY.step(page, "detail-table", selector=DETAIL_READY,
+                    baseline_ms=baseline_ms, timeout_ms=PAGE_TIMEOUT):
+        button.scroll_into_view_if_needed()
+        button.click()
+
+
+def run_sections(page, work, done=(), pending=None, name="section", attempts=MAX_ATTEMPTS):
+    """Call ``work(page, info)`` with the detail table of every Pending
+    section open (*page* must be on the summary).  Sections whose key is in
+    *done* are skipped; *pending* overrides the summary read."""
+    run = SectionRun(name)
+    t0 = time.perf_counter()
+    done = set(done)
+    if pending is None:
+        pending = read_summary(page)
+    queue = deque((info, 1) for info in pending if info.status == "Pending" and info.key not in done)
+
+    while queue:
+        info, attempt = queue.popleft()
+        tag = f"{info.grade}_{info.section}"
+        with TRACER.span(f"{name}.section", section=tag, attempt=attempt):
+            ok = False
+            try:
+                open_section(page, info)
+            except LookupError:
+                # the row is not where we expect it: re-read the summary once
+                run.rereads += 1
+                if not page.is_visible(SUMMARY_READY):
+                    land_progression_summary(page)
+                info = {r.key: r for r in read_summary(page)}.get(info.key)
+                if info is None or info.status != "Pending":
+                    continue  # no longer Pending – nothing left to do
+            except Exception as err:
+                print(f"⚠ {tag}: could not open ({err})")
+                if back_to_summary(page):
+                    run.rereads += 1
+            else:
+                print(f"→ {tag} (attempt {attempt})" if attempt > 1 else f"→ {tag}")
+                try:
+                    work(page, info)
+                    ok = True
+                except Exception as err:
+                    print(f"⚠ {tag}: {err}")
+                if back_to_summary(page):
+                    run.rereads += 1
+
+            if ok:
+                run.done.append(info.key)
+            elif attempt < attempts:
+                run.retries += 1
+                queue.append((info, attempt + 1))
+            else:
+                run.failed.append(info.key)
+
+    run.elapsed = time.perf_counter() - t0
+    return run
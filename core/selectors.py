@@ -0,0 +1,119 @@
+"""Every portal selector in one place.
+
+When the portal changes its markup, this is the only file to edit.  The
+names are imported by the modules that use them (``from core.selectors
+import GO_BTN``); :data:`REGISTRY` maps every name to its selector and
+
+    python -m core.selectors
+
+lists them.  :func:`any_of` joins several selectors into one, so a single
+``wait_for_selector`` covers all the ways a step can end (result table or
+error popup, …).
+"""
+
+# ---------- login ----------
+USERNAME_INPUT  = "input[name='username']"
+PASSWORD_INPUT  = "input[name='password']"
+LOGIN_BTN       = "button[type='submit']"
+CAPTCHA_IMG     = "img[alt*='captcha' i], img[src*='captcha' i]"
+CAPTCHA_INPUT   = "input[name*='captcha' i], input[formcontrolname*='captcha' i], input[placeholder*='captcha' i]"
+NOTICE_MODAL    = "div.modal-dialog"
+NOTICE_CLOSE    = "button.btn.btn-danger:has-text('Close')"
+
+# ---------- post-login navigation ----------
+YEAR_BTN        = "div.filter2:has-text('Go to 2025-26')"
+MOVEMENT_MENU   = "span.HideMobile:has-text('Student Movement and Progression')"
+PROGRESSION_MNU = "span.HideMobile:has-text('Progression Activity')"
+SUMMARY_LINK    = "a.AnText:has-text('Progression Summary Section Wise')"
+SUMMARY_READY   = "div.example-container table[mat-table] button.btn-primary"
+IMPORT_MENU     = "span.HideMobile:has-text('Import Module')"
+IMPORT_READY    = "a:has-text('Get PEN & DOB'), ul.SerachBoxus"
+RELEASE_MENU    = "span.HideMobile:has-text('Student Release Request Management')"
+RELEASE_GO_BTN  = "li.cardIcon:has(h2:has-text('Student Release Request Management')) button:has-text('Go')"
+RELEASE_GEN_BTN = "button:has-text('Generate Student Release Request')"
+
+# ---------- progression summary / section detail ----------
+SUMMARY_ROWS    = "div.example-container table[mat-table] tbody tr"
+DETAIL_ROWS     = "table.mat-mdc-table tbody tr"
+DETAIL_READY    = "table.mat-mdc-table td.cdk-column-studentName"  # detail rows rendered
+SUMMARY_COLS = {
+    "grade": "td.cdk-column-className",
+    "section": "td.cdk-column-sectionName",
+    "status": "td.cdk-column-status",
+    "total": "td.cdk-column-totalStudent",      # student counts, not confirmed on the portal;
+    "pending": "td.cdk-column-pendingStudent",  # without them --incremental re-opens the section
+}
+DETAIL_COLS = {
+    "name": "td.cdk-column-studentName span.fw-bold",
+    "status": "td.cdk-column-status",
+    "progressed": "td.cdk-column-updateDetails span.fw-bold",
+}
+# controls of a Pending detail row, looked up inside DETAIL_ROWS; which select
+# and input is which is decided by core.dom_extractors (option labels, hints)
+ROW_SELECT      = "select"
+ROW_INPUT       = "input:not([type='hidden']):not([type='checkbox']):not([type='radio'])"
+ROW_SAVE_BTN    = "td.cdk-column-updateDetails button"
+# optional bulk save; the rows are saved one by one when it matches nothing
+BULK_SAVE_BTN   = "button:has-text('Update All'), button:has-text('Save All')"
+
+
+def section_button(grade, section):
+    """View/Update button of one summary row, matched on the exact cell texts."""
+    return (f"{SUMMARY_ROWS}:has(td.cdk-column-className:text-is('{grade}'))"
+            f":has(td.cdk-column-sectionName:text-is('{section}')) button.btn-primary")
+
+
+# ---------- Import Module: Get PEN & DOB modal ----------
+GET_PEN_LINK    = "a:has-text('Get PEN & DOB')"
+AADHAAR_INPUT   = "input[name='aadhaar']"
+YOB_INPUT       = "input[name='dob']"
+PEN_SEARCH_BTN  = "button:has-text('Search')"
+PEN_CELL        = "table.table tbody tr td:nth-child(1)"
+PEN_DOB_CELL    = "table.table tbody tr td:nth-child(2)"
+
+# ---------- Import Module: PEN + DOB search ----------
+PEN_INPUT_LOC   = "ul.SerachBoxus input.mat-mdc-input-element"   # 1st input
+DOB_INPUT_LOC   = "ul.SerachBoxus input.mat-mdc-input-element"   # 2nd input
+GO_BTN_LOC      = "ul.SerachBoxus button:has-text('Go')"
+# current + previous school name spans (we take the first)
+SCHOOL_NAME_LOC = "li:has(> span.titleUser:has-text('School Name')) span.userValue"
+# import panel (shown only when the student is UN-TAGGED)
+IMPORT_SECTION_SEL = "ul.existingSchool1 li:has(label:has-text('Import Section')) select"
+IMPORT_DATE_SEL    = "ul.existingSchool1 li:has(label:has-text('Date of Admission')) input"
+IMPORT_BTN_SEL     = "ul.existingSchool1 button:has-text('IMPORT')"
+
+# ---------- release request form ----------
+REL_PEN_INPUT    = "input[placeholder='Enter PEN']"
+REL_DOB_INPUT    = "input[placeholder='DD/MM/YYYY']"
+GET_DETAILS_BTN  = "button:has-text('Get Details')"
+SCHOOL_NAME_SPAN = "li:has(span.title:has-text('School Name')) span.vlause"
+REMARK_SELECT    = "div:has(p:has-text('Select Remark')) select.form-select"
+GEN_REQ_BTN      = "button:has-text('Generate Student Release Request')"
+
+# ---------- SweetAlert (read by the observer in core/popups.py) ----------
+POPUP           = "div.swal2-popup"
+POPUP_SHOWN     = "div.swal2-popup.swal2-show"
+POPUP_TITLE     = "h2.swal2-title"          # inside the popup; icon = its swal2-icon-* class
+POPUP_CONFIRM   = "button.swal2-confirm"
+POPUP_CANCEL    = "button.swal2-cancel"
+POPUP_BUTTON    = "button.swal2-styled"
+
+
+def any_of(*selectors):
+    """One selector matching whatever any of *selectors* matches."""
+    return ", ".join(selectors)
+
+
+REGISTRY = {
+    name: value for name, value in dict(globals()).items()
+    if name.isupper() and isinstance(value, (str, dict))
+}
+
+
+if __name__ == "__main__":
+    for name, value in REGISTRY.items():
+        if isinstance(value, dict):
+            for col, sel in value.items():
+                print(f"{name}.{col:<22} {sel}")
+        else:
+            print(f"{name:<28} {value}")
@@ -0,0 +1,235 @@
+"""Log in once, keep the session on disk, land on any module from there.
+
+The portal login needs a human to solve a CAPTCHA, so we only want to do it
+when we must.  The browser stays headless: the CAPTCHA image is handed to the
+solver chosen with ``UDISE_CAPTCHA`` (terminal prompt, file drop, small web
+form, … see core.captcha) and the answer typed in for us.  After a successful login the Playwright ``storage_state``
+(cookies + localStorage) plus sessionStorage and the post-login URL are saved
+to ``udise_session.json``.  :func:`open_session` reuses that file while it is
+fresh (by file age and by the ``exp`` of any JWT found in storage) and falls
+back to a real login when the portal bounces us to the login page.
+
+Landing helpers take an already-authenticated page to one module:
+
+    land_progression_summary(page)   Progression Summary Section Wise table
+    land_import_module(page)         Import Module search (Get PEN / PEN+DOB)
+    land_release_request(page)       Generate Student Release Request form
+"""
+
+import base64
+import json
+import os
+import time
+
+from core.lazy import sync_api
+from core.browser_utils import (
+    launch_pw, safe_close, PAGE_TIMEOUT, MAX_BROWSER_RETRIES, MAX_NAV_RETRIES, PORTAL,
+)
+from core.captcha import CAPTCHA_FILE, get_solver
+from core.readiness import READY
+from core.rate_limit import backoff_delay
+from core.selectors import (  # noqa: F401  (SUMMARY_READY & co. are re-exported)
+    CAPTCHA_IMG, CAPTCHA_INPUT, IMPORT_MENU, IMPORT_READY, LOGIN_BTN, MOVEMENT_MENU,
+    NOTICE_CLOSE, NOTICE_MODAL, PASSWORD_INPUT, PROGRESSION_MNU, RELEASE_GEN_BTN,
+    RELEASE_GO_BTN, RELEASE_MENU, SUMMARY_LINK, SUMMARY_READY, USERNAME_INPUT, YEAR_BTN,
+)
+from core.tracing import TRACER
+from core.worker_pool import open_worker_page, snapshot_session
+
+LOGIN_URL = f"{PORTAL}/p2/v1/login?state-id=124"
+LOGIN_ATTEMPTS = 3      # a wrongly read CAPTCHA just gets a new one
+STATE_FILE = "udise_session.json"
+SESSION_MAX_AGE_H = 8
+
+
+# ---------- login ----------
+
+def solve_captcha(page, solver):
+    """Screenshot the CAPTCHA, ask *solver* and type its answer in."""
+    with TRACER.span("session.captcha"):
+        img = page.locator(CAPTCHA_IMG).first
+        img.wait_for(timeout=10_000)
+        img.screenshot(path=CAPTCHA_FILE)
+        answer = solver.solve(CAPTCHA_FILE)
+    if answer:
+        page.fill(CAPTCHA_INPUT, answer)
+
+
+@TRACER.traced("session.login")
+def login(page, user, pwd, solver=None):
+    """Fill the login form, get the CAPTCHA solved (see core.captcha),
+    submit and pick the academic year."""
+    solver = solver or get_solver()
+    page.goto(LOGIN_URL, timeout=PAGE_TIMEOUT)
+    for attempt in range(1, LOGIN_ATTEMPTS + 1):
+        page.fill(USERNAME_INPUT, user)
+        page.fill(PASSWORD_INPUT, pwd)
+        if solver is not None:
+            solve_captcha(page, solver)
+        page.click(LOGIN_BTN)
+        page.wait_for_load_state("networkidle", timeout=PAGE_TIMEOUT)
+        if not session_rejected(page):
+            break
+        print(f"✗ Login rejected (attempt {attempt}/{LOGIN_ATTEMPTS}) – wrong CAPTCHA?")
+    else:
+        raise RuntimeError(f"login failed {LOGIN_ATTEMPTS} times")
+
+    page.click(YEAR_BTN)
+    if page.is_visible(NOTICE_MODAL):
+        page.click(NOTICE_CLOSE)
+    page.wait_for_load_state("networkidle", timeout=PAGE_TIMEOUT)
+
+
+def session_rejected(page):
+    return "/login" in page.url or page.is_visible(PASSWORD_INPUT)
+
+
+# ---------- storage state on disk ----------
+
+def _jwt_expired(value, now):
+    parts = str(value).split(".")
+    if len(parts) != 3:
+        return False
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(parts[1] + "=" * (-len(parts[1]) % 4)))
+    except Exception:
+        return False
+    return isinstance(payload, dict) and "exp" in payload and payload["exp"] < now
+
+
+def save_state(page, path=STATE_FILE):
+    state = snapshot_session(page)
+    state["saved_at"] = time.time()
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(state, fh)
+    os.replace(tmp, path)
+
+
+def load_state(path=STATE_FILE, max_age_h=SESSION_MAX_AGE_H):
+    """Saved session, or None when missing / too old / carrying an expired JWT."""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as fh:
+        state = json.load(fh)
+    now = time.time()
+    if now - state.get("saved_at", 0) > max_age_h * 3600:
+        return None
+    values = list(state.get("session_storage", {}).values())
+    for origin in state["storage_state"].get("origins", []):
+        values += [item["value"] for item in origin.get("localStorage", [])]
+    if any(_jwt_expired(v, now) for v in values):
+        return None
+    return state
+
+
+@TRACER.traced("session.open")
+def open_session(user, pwd, state_path=STATE_FILE):
+    """``(pw, browser, page)`` signed in to the portal home page.
+
+    Reuses *state_path* when it is still valid; otherwise logs in (CAPTCHA)
+    and saves a new one.
+    """
+    pw, browser = launch_pw()
+    try:
+        state = load_state(state_path)
+        if state is not None:
+            _ctx, page = open_worker_page(browser, state)  # a saved state is a session snapshot
+            if not session_rejected(page):
+                print("✓ Reused saved session (no CAPTCHA needed)")
+                return pw, browser, page
+            print("↻ Saved session rejected – logging in again")
+            page.context.close()
+
+        page = browser.new_context().new_page()
+        login(page, user, pwd)
+        save_state(page, state_path)
+        return pw, browser, page
+    except Exception:
+        safe_close(browser, pw)
+        raise
+
+
+def ensure_session(page, user, pwd, land, state_path=STATE_FILE):
+    """Run ``land(page)``; if the portal rejects the session, log in again on
+    the same page, save the new state and land once more."""
+    try:
+        land(page)
+        return
+    except Exception:
+        if not session_rejected(page):
+            raise
+    print("↻ Session expired – logging in again")
+    login(page, user, pwd)
+    save_state(page, state_path)
+    land(page)
+
+
+# ---------- landing ----------
+
+def _home(page):
+    """Back to the post-login dashboard so every landing starts from the menu."""
+    if page.is_visible(YEAR_BTN):
+        page.click(YEAR_BTN)
+    if session_rejected(page):
+        raise sync_api.TimeoutError("session rejected")
+
+
+@TRACER.traced("nav.progression")
+def land_progression_summary(page):
+    _home(page)
+    page.click(MOVEMENT_MENU)
+    with READY.step(page, "progression-menu", selector=SUMMARY_LINK, baseline_ms=4_000):
+        page.click(PROGRESSION_MNU)
+    for n_try in range(1, MAX_NAV_RETRIES + 1):
+        page.click(SUMMARY_LINK)
+        try:
+            page.wait_for_selector(SUMMARY_READY, timeout=PAGE_TIMEOUT)
+            print(f"✓ Summary ready (nav {n_try})")
+            return
+        except sync_api.TimeoutError:
+            print("↻ retry summary click …")
+    raise sync_api.TimeoutError("View/Update buttons not visible")
+
+
+@TRACER.traced("nav.import")
+def land_import_module(page):
+    _home(page)
+    page.click(MOVEMENT_MENU)
+    with READY.step(page, "import-menu", selector=IMPORT_READY):
+        page.click(IMPORT_MENU)
+
+
+@TRACER.traced("nav.release")
+def land_release_request(page):
+    _home(page)
+    with READY.step(page, "release-menu", selector=RELEASE_GO_BTN, baseline_ms=500):
+        page.click(RELEASE_MENU)
+    page.click(RELEASE_GO_BTN)
+    page.wait_for_load_state("networkidle")
+    page.click(RELEASE_GEN_BTN)
+    page.wait_for_load_state("networkidle")
+
+
+# ---------- one-call entry used by the standalone scripts ----------
+
+def login_and_land_with(user, pwd, land):
+    """Open a (possibly reused) session and land with *land*, retrying the
+    whole thing in a fresh browser up to MAX_BROWSER_RETRIES times with
+    exponential backoff in between."""
+    last_err = None
+    for b_try in range(1, MAX_BROWSER_RETRIES + 1):
+        pw = browser = None
+        try:
+            pw, browser, page = open_session(user, pwd)
+            ensure_session(page, user, pwd, land)
+            return pw, browser, page
+        except Exception as err:
+            last_err = err
+            print(f"✗ browser launch {b_try} failed: {err}")
+            safe_close(browser, pw)
+            if b_try < MAX_BROWSER_RETRIES:
+                delay = backoff_delay(b_try)
+                print(f"   ↳ retrying in {delay:.0f}s")
+                time.sleep(delay)
+    raise RuntimeError(f"All launches failed → {last_err}")
@@ -0,0 +1,112 @@
+"""Hand rows from one stage to the next while the first is still running.
+
+The producer (e.g. the PEN lookup on the main page) calls :meth:`Handoff.put`
+for every finished row.  A consumer thread with its own browser, restored
+from the producer's session (:func:`core.worker_pool.open_worker_page`),
+iterates the same :class:`Handoff` and works on each row as it arrives, so
+the two stages overlap instead of running back to back.
+
+The queue is bounded: a slow consumer makes the producer wait instead of
+letting rows pile up.  :meth:`Handoff.line` reports how deep the queue got
+and how long each side spent waiting on the other.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.browser_utils import launch_pw, safe_close
+from core.worker_pool import open_worker_page
+
+QUEUE_SIZE = 20
+_DONE = object()
+
+
+class Handoff:
+    """Bounded, thread-safe row queue between a producer and one consumer."""
+
+    def __init__(self, maxsize=QUEUE_SIZE):
+        self.q = queue.Queue(maxsize)
+        self.maxsize = maxsize
+        self.aborted = threading.Event()
+        self.lock = threading.Lock()
+        self.items = 0
+        self.depth_sum = 0
+        self.max_depth = 0
+        self.full_puts = 0   # puts that had to wait for room
+        self.blocked = 0.0   # seconds the producer waited on a full queue
+        self.idle = 0.0      # seconds the consumer waited on an empty queue
+
+    def put(self, idx, fields):
+        """Hand one finished row to the consumer; blocks while the queue is full.
+        Rows are dropped once the consumer has stopped."""
+        waited = self._put((idx, fields))
+        with self.lock:
+            depth = self.q.qsize()
+            self.items += 1
+            self.depth_sum += depth
+            self.max_depth = max(self.max_depth, depth)
+            if waited > 0.001:
+                self.full_puts += 1
+                self.blocked += waited
+
+    def _put(self, item):
+        t0 = time.perf_counter()
+        while not self.aborted.is_set():
+            try:
+                self.q.put(item, timeout=1)
+                break
+            except queue.Full:
+                continue
+        return time.perf_counter() - t0
+
+    def close(self):
+        """No more rows; the consumer's loop ends once the queue is drained."""
+        self._put(_DONE)
+
+    def abort(self):
+        self.aborted.set()
+
+    def __iter__(self):
+        while True:
+            t0 = time.perf_counter()
+            item = self.q.get()
+            with self.lock:
+                self.idle += time.perf_counter() - t0
+            if item is _DONE:
+                return
+            yield item
+
+    def line(self):
+        avg = self.depth_sum / self.items if self.items else 0.0
+        return (f"stream: {self.items} rows, queue max {self.max_depth}/{self.maxsize} "
+                f"(avg {avg:.1f}) | producer blocked {self.full_puts}× for {self.blocked:.1f}s "
+                f"| consumer idle {self.idle:.1f}s")
+
+
+def start_consumer(session, handoff, work_fn, prepare=None):
+    """Run ``work_fn(page)`` in a new thread on its own browser restored from
+    *session* (see :func:`core.worker_pool.snapshot_session`).
+
+    *work_fn* is expected to iterate *handoff*.  Returns a future whose
+    ``result()`` is *work_fn*'s return value (or re-raises its error).  If the
+    consumer stops early the handoff is aborted so the producer never blocks
+    on a queue nobody reads.
+    """
+    def _run():
+        pw = browser = None
+        try:
+            pw, browser = launch_pw()
+            _ctx, page = open_worker_page(browser, session)
+            if prepare:
+                prepare(page)
+            return work_fn(page)
+        finally:
+            handoff.abort()
+            safe_close(browser, pw)
+
+    ex = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stream-consumer")
+    future = ex.submit(_run)
+    ex.shutdown(wait=False)
+    return future
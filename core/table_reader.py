@@ -0,0 +1,78 @@
+"""Read a whole mat-table in one ``page.evaluate`` round-trip.
+
+The old readers did ``query_selector`` + ``inner_text`` per cell, i.e.
+rows × columns IPC calls to the browser.  Here the browser walks the table
+itself and hands back plain rows, so the cost is one call per table no
+matter how many students it holds.
+"""
+
+from typing import NamedTuple
+
+from core.lazy import pd
+from core.selectors import DETAIL_COLS, DETAIL_ROWS, SUMMARY_COLS, SUMMARY_ROWS  # noqa: F401
+
+_READ_TABLE_JS = """
+(args) => Array.from(document.querySelectorAll(args.rows)).map((tr) => {
+    const out = {};
+    for (const [name, sel] of Object.entries(args.cols)) {
+        const el = tr.querySelector(sel);
+        out[name] = el ? el.innerText.trim() : null;
+    }
+    return out;
+})
+"""
+
+
+class SummaryRow(NamedTuple):
+    index: int      # position among SUMMARY_ROWS, for clicking the row's button
+    grade: str
+    section: str
+    status: str
+    total: str = None
+    pending: str = None
+
+    @property
+    def key(self):
+        return self.grade, self.section
+
+
+class DetailRow(NamedTuple):
+    index: int
+    name: str
+    status: str
+    progressed: str
+
+
+def read_table(page, rows_selector, cols):
+    """``[{col: text or None}, …]`` for every row matching *rows_selector*."""
+    return page.evaluate(_READ_TABLE_JS, {"rows": rows_selector, "cols": cols})
+
+
+def read_summary(page):
+    """Every row of the Progression Summary table (rows without a status
+    cell, e.g. group headers, are skipped)."""
+    return [
+        SummaryRow(i, r["grade"] or "", r["section"] or "", r["status"], r["total"], r["pending"])
+        for i, r in enumerate(read_table(page, SUMMARY_ROWS, SUMMARY_COLS))
+        if r["status"] is not None
+    ]
+
+
+def read_detail(page):
+    """Every fully populated row of a section's student table."""
+    return [
+        DetailRow(i, r["name"], r["status"], r["progressed"])
+        for i, r in enumerate(read_table(page, DETAIL_ROWS, DETAIL_COLS))
+        if None not in r.values()
+    ]
+
+
+def parse_detail_table(page):
+    """Detail table as a DataFrame (Student Name / Status / Progressed On), or None."""
+    rows = read_detail(page)
+    if not rows:
+        return None
+    return pd.DataFrame(
+        [(r.name, r.status, r.progressed) for r in rows],
+        columns=["Student Name", "Status", "Progressed On"],
+    )
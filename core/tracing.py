@@ -0,0 +1,156 @@
+"""Lightweight spans around each step of a run, with a timing report.
+
+    with TRACER.span("pen.student", aadhaar=key):
+        …
+
+    @TRACER.traced("popup.release")
+    def handle_popup(page): …
+
+Spans cost nothing until tracing is switched on, with ``--trace`` on any
+script or ``UDISE_TRACE=1`` in the environment.  When it is on, the script
+prints a p50/p95/p99 table per span name when it exits and writes:
+
+    <prefix>.timing.json   the same statistics
+    <prefix>.spans.csv     one row per span
+    <prefix>.trace.json    Chrome trace format – open in chrome://tracing
+                           or https://ui.perfetto.dev
+
+Span names are dotted: ``stage.*`` is a whole script/stage, ``*.student``
+one roster row, ``step.*`` / ``wait.*`` readiness waits, ``popup.*``
+SweetAlert handling, ``io.*`` workbook/working-copy reads and writes.
+"""
+
+import atexit
+import csv
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+def _pct(values, p):
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round(p / 100 * (len(s) - 1))))] if s else 0.0
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.prefix = None
+        self.spans = []  # (name, start_s, dur_s, thread_id, thread_name, attrs)
+        self.lock = threading.Lock()
+        self.t0 = time.perf_counter()
+
+    def enable(self, prefix=None):
+        """Start recording; results are reported and written at exit."""
+        if not self.enabled:
+            atexit.register(self.finish)
+        self.enabled = True
+        self.prefix = prefix or os.path.splitext(os.path.basename(sys.argv[0] or "run"))[0]
+
+    # ---------- recording ----------
+
+    def add(self, name, start, dur, attrs=None):
+        th = threading.current_thread()
+        with self.lock:
+            self.spans.append((name, start - self.t0, dur, th.ident, th.name, attrs or {}))
+
+    @contextmanager
+    def span(self, name, **attrs):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as err:
+            attrs["error"] = type(err).__name__
+            raise
+        finally:
+            self.add(name, start, time.perf_counter() - start, attrs)
+
+    def traced(self, name):
+        """Decorator: run the function inside ``span(name)``."""
+        def deco(fn):
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def awrapper(*args, **kwargs):
+                    with self.span(name):
+                        return await fn(*args, **kwargs)
+                return awrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return deco
+
+    # ---------- output ----------
+
+    def stats(self):
+        by_name = {}
+        with self.lock:
+            for name, _start, dur, *_ in self.spans:
+                by_name.setdefault(name, []).append(dur * 1000)
+        return {
+            name: {"n": len(ms), "total_s": round(sum(ms) / 1000, 3),
+                   "p50_ms": round(_pct(ms, 50), 1), "p95_ms": round(_pct(ms, 95), 1),
+                   "p99_ms": round(_pct(ms, 99), 1), "max_ms": round(max(ms), 1)}
+            for name, ms in sorted(by_name.items())
+        }
+
+    def report(self):
+        stats = self.stats()
+        if not stats:
+            return
+        print("\n–––– TIMING (spans) ––––")
+        print(f"{'span':<26} {'n':>6} {'total':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+        for name, st in stats.items():
+            print(f"{name:<26} {st['n']:>6} {st['total_s']:>8.1f}s {st['p50_ms']:>7.0f}ms "
+                  f"{st['p95_ms']:>7.0f}ms {st['p99_ms']:>7.0f}ms")
+
+    def chrome_trace(self):
+        pid = os.getpid()
+        events, threads = [], {}
+        with self.lock:
+            spans = list(self.spans)
+        for name, start, dur, tid, tname, attrs in spans:
+            threads[tid] = tname
+            events.append({"name": name, "cat": name.split(".")[0], "ph": "X", "pid": pid, "tid": tid,
+                           "ts": round(start * 1e6), "dur": round(dur * 1e6),
+                           "args": {k: str(v) for k, v in attrs.items()}})
+        events += [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": tname}}
+                   for tid, tname in threads.items()]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write(self, prefix):
+        with open(prefix + ".timing.json", "w", encoding="utf-8") as fh:
+            json.dump(self.stats(), fh, indent=2)
+        with open(prefix + ".trace.json", "w", encoding="utf-8") as fh:
+            json.dump(self.chrome_trace(), fh)
+        with self.lock:
+            spans = list(self.spans)
+        with open(prefix + ".spans.csv", "w", newline="", encoding="utf-8") as fh:
+            w = csv.writer(fh)
+            w.writerow(["name", "start_s", "dur_ms", "thread", "attrs"])
+            for name, start, dur, _tid, tname, attrs in spans:
+                w.writerow([name, f"{start:.4f}", f"{dur * 1000:.1f}", tname,
+                            json.dumps(attrs, ensure_ascii=False, default=str)])
+
+    def finish(self):
+        if not (self.enabled and self.spans):
+            return
+        self.report()
+        self.write(self.prefix)
+        print(f"trace → {self.prefix}.trace.json (chrome://tracing), {self.prefix}.timing.json, "
+              f"{self.prefix}.spans.csv")
+
+
+TRACER = Tracer()  # shared by every script in the process
+if os.getenv("UDISE_TRACE", "").strip().lower() not in ("", "0", "false", "no", "off"):
+    TRACER.enable()
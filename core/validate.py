@@ -0,0 +1,158 @@
+"""Check a roster before any portal call, a whole column at a time.
+
+A row whose Aadhaar fails its checksum or whose date of birth cannot be
+read used to cost a full search round-trip before ending as "Wrong
+Aadhaar/YOB" / "Bad DOB".  The checks here run once over the DataFrame:
+
+* Aadhaar – 12 digits, not starting with 0 or 1, valid Verhoeff check
+  digit (the last digit UIDAI appends);
+* PEN – the portal's 11 digits (this also drops the failure markers
+  Get_PEN.py writes instead of a PEN);
+* date of birth – readable (:func:`core.dates.parse_dates`) and not in the
+  future.
+
+    check = check_aadhaar_roster(df)
+    check.good       index of the rows worth sending to the portal
+    check.rejects    the other rows plus a ``reason`` column
+    check.dob        DD/MM/YYYY per row (<NA> where unreadable)
+
+:func:`report` prints the counts per reason and writes the rejects next to
+the stage's workbook (``<output>.rejects.csv``).
+"""
+
+import os
+import re
+from typing import NamedTuple
+
+from core.dates import PORTAL_FMT, is_blank, parse_dates
+from core.lazy import np, pd
+
+PEN_PATTERN = r"\d{11}"
+AADHAAR_PATTERN = r"[2-9]\d{11}"
+
+# Verhoeff: multiplication table of the dihedral group D5 and the position permutation
+_D = [
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9], [1, 2, 3, 4, 0, 6, 7, 8, 9, 5],
+    [2, 3, 4, 0, 1, 7, 8, 9, 5, 6], [3, 4, 0, 1, 2, 8, 9, 5, 6, 7],
+    [4, 0, 1, 2, 3, 9, 5, 6, 7, 8], [5, 9, 8, 7, 6, 0, 4, 3, 2, 1],
+    [6, 5, 9, 8, 7, 1, 0, 4, 3, 2], [7, 6, 5, 9, 8, 2, 1, 0, 4, 3],
+    [8, 7, 6, 5, 9, 3, 2, 1, 0, 4], [9, 8, 7, 6, 5, 4, 3, 2, 1, 0],
+]
+_P = [
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9], [1, 5, 7, 6, 2, 8, 3, 0, 9, 4],
+    [5, 8, 0, 3, 7, 9, 6, 1, 4, 2], [8, 9, 1, 6, 0, 4, 3, 5, 2, 7],
+    [9, 4, 5, 3, 1, 2, 7, 6, 8, 0], [4, 2, 8, 6, 5, 7, 3, 9, 0, 1],
+    [2, 7, 9, 3, 8, 0, 6, 4, 1, 5], [7, 0, 4, 6, 9, 1, 3, 2, 5, 8],
+]
+_INV = [0, 4, 3, 2, 1, 5, 6, 7, 8, 9]
+
+
+# ---------- checksums / formats ----------
+
+def verhoeff_digit(digits):
+    """Check digit to append to the digit string *digits*."""
+    c = 0
+    for i, ch in enumerate(reversed(digits)):
+        c = _D[c][_P[(i + 1) % 8][int(ch)]]
+    return str(_INV[c])
+
+
+def verhoeff_valid(values):
+    """Boolean Series: *values* are digit strings of one length whose last
+    digit is their Verhoeff check digit.  Vectorised over the rows: one
+    table lookup per digit position, not per value."""
+    s = pd.Series(values, copy=False).astype("string")
+    ok = s.str.fullmatch(r"\d+", na=False)
+    out = pd.Series(False, index=s.index)
+    if not ok.any():
+        return out
+    width = s[ok].str.len()
+    d, p = np.array(_D), np.array(_P)
+    for n in width.unique():
+        rows = width.index[width == n]
+        digits = np.frombuffer("".join(s[rows]).encode("ascii"), dtype=np.uint8).reshape(-1, n) - 48
+        c = np.zeros(len(rows), dtype=np.intp)
+        for i in range(n):
+            c = d[c, p[i % 8, digits[:, n - 1 - i]]]
+        out[rows] = c == 0
+    return out
+
+
+def aadhaar_valid(values):
+    s = pd.Series(values, copy=False).astype("string")
+    return s.str.fullmatch(AADHAAR_PATTERN, na=False) & verhoeff_valid(s)
+
+
+def pen_valid(values):
+    return pd.Series(values, copy=False).astype("string").str.strip().str.fullmatch(PEN_PATTERN, na=False)
+
+
+def is_pen(value):
+    """:func:`pen_valid` for one value (rows that arrive one by one)."""
+    return not is_blank(value) and re.fullmatch(PEN_PATTERN, str(value).strip()) is not None
+
+
+# ---------- roster checks ----------
+
+class Check(NamedTuple):
+    good: object       # pandas Index
+    rejects: object    # DataFrame: rejected rows + "reason"
+    dob: object        # Series of DD/MM/YYYY (<NA> where unreadable)
+
+
+def _dob_problems(df, col):
+    dates = parse_dates(df[col]) if col in df.columns else pd.Series(pd.NaT, index=df.index)
+    today = pd.Timestamp.today().normalize()
+    return dates, [
+        (dates.isna(), "DOB unreadable"),
+        (dates > today, "DOB in the future"),
+    ]
+
+
+def _check(df, problems, dates):
+    """Each row gets the reason of the first problem that applies to it."""
+    reason = pd.Series(pd.NA, index=df.index, dtype="string")
+    for mask, why in problems:
+        reason[mask.fillna(False).astype(bool) & reason.isna()] = why
+    bad = reason.notna()
+    dob = dates.dt.strftime(PORTAL_FMT).astype("string")
+    return Check(df.index[~bad], df[bad].assign(reason=reason[bad]), dob)
+
+
+def check_aadhaar_roster(df, dob_col="TxtDateOfBirth"):
+    """Rows for the Aadhaar + YOB search.  The DOB is checked first, as the
+    row-by-row loop did (such rows are reported as "Bad DOB")."""
+    dates, problems = _dob_problems(df, dob_col)
+    problems.append((df["aadharId"].isna(), "Aadhaar missing/unreadable"))
+    problems.append((~aadhaar_valid(df["aadharId"]), "Aadhaar checksum"))
+    return _check(df, problems, dates)
+
+
+def check_pen_roster(df, dob_col="TxtDateOfBirth"):
+    """Rows for the PEN + DOB searches.  The PEN is checked first."""
+    dates, problems = _dob_problems(df, dob_col)
+    problems.insert(0, (~pen_valid(df["student_pen"]), "PEN format"))
+    return _check(df, problems, dates)
+
+
+def is_dob_reason(reason):
+    return str(reason).startswith("DOB")
+
+
+def rejects_path(xlsx):
+    return os.path.splitext(xlsx)[0] + ".rejects.csv"
+
+
+def report(check, xlsx, label="rows"):
+    """Print the counts per reason and write (or clear) ``<xlsx>.rejects.csv``."""
+    path = rejects_path(xlsx)
+    n_bad = len(check.rejects)
+    print(f"\n–––– PRE-VALIDATION ––––\n{len(check.good) + n_bad} {label}: "
+          f"{len(check.good)} to the portal, {n_bad} rejected" + (f" → {path}" if n_bad else ""))
+    if not n_bad:
+        if os.path.exists(path):
+            os.remove(path)  # from an earlier run
+        return
+    for why, n in check.rejects["reason"].value_counts().items():
+        print(f"   {n:>6} {why}")
+    check.rejects.to_csv(path, index_label="row", encoding="utf-8-sig")
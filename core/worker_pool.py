@@ -0,0 +1,123 @@
+"""Fan a per-row lookup out over N browser workers that share one login.
+
+The caller logs in once (CAPTCHA and all) and hands us a snapshot of the
+authenticated page.  Every worker runs in its own thread with its own
+Playwright instance + browser, opens a context seeded with the same cookies,
+localStorage and sessionStorage, lands on the same URL and then works through
+its shard of row indices.  Results come back as ``{idx: {column: value}}`` so
+the caller can merge them into its DataFrame on the main thread.
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from core.browser_utils import launch_pw, safe_close, PAGE_TIMEOUT
+
+DEFAULT_WORKERS = 1
+MAX_WORKERS = 8  # conservative default cap on concurrent sessions; not a measured portal limit
+
+
+# ---------- session hand-off ----------
+
+def snapshot_session(page):
+    """Capture everything a fresh context needs to skip the login page."""
+    session_storage = page.evaluate("() => Object.assign({}, window.sessionStorage)")
+    return {
+        "storage_state": page.context.storage_state(),
+        "session_storage": session_storage,
+        "url": page.url,
+    }
+
+
+def session_script(session):
+    """Init script that replays the snapshot's sessionStorage before the app
+    boots (storage_state() does not carry it), or None."""
+    if not session.get("session_storage"):
+        return None
+    return ("(s => { for (const k in s) if (sessionStorage.getItem(k) === null)"
+            " sessionStorage.setItem(k, s[k]); })(%s)" % json.dumps(session["session_storage"]))
+
+
+def open_worker_page(browser, session):
+    """New context in *browser* restored from :func:`snapshot_session`."""
+    ctx = browser.new_context(storage_state=session["storage_state"])
+    script = session_script(session)
+    if script:
+        ctx.add_init_script(script)
+    page = ctx.new_page()
+    page.goto(session["url"], timeout=PAGE_TIMEOUT)
+    page.wait_for_load_state("networkidle", timeout=PAGE_TIMEOUT)
+    return ctx, page
+
+
+# ---------- sharding + stats ----------
+
+def shard_rows(indices, n):
+    """Round-robin *indices* into at most *n* non-empty shards."""
+    indices = list(indices)
+    n = max(1, min(n, len(indices)))
+    return [indices[i::n] for i in range(n)]
+
+
+@dataclass
+class WorkerStats:
+    worker: int
+    rows: int = 0
+    counts: dict = field(default_factory=dict)
+    elapsed: float = 0.0
+    errors: list = field(default_factory=list)
+
+    @property
+    def per_minute(self):
+        return self.rows / self.elapsed * 60 if self.elapsed else 0.0
+
+    def line(self):
+        detail = ", ".join(f"{v} {k}" for k, v in sorted(self.counts.items()))
+        return (f"worker {self.worker}: {self.rows} rows ({detail}) "
+                f"in {self.elapsed:.0f}s → {self.per_minute:.1f}/min")
+
+
+# ---------- pool ----------
+
+def run_pool(session, shards, work_fn, prepare=None, max_workers=MAX_WORKERS):
+    """Run ``work_fn(page, idx, tag) -> (status, fields)`` over every shard.
+
+    ``prepare(page)`` is called once per worker after landing (e.g. to wait for
+    the module's search form).  At most *max_workers* browsers run at a time;
+    extra shards queue behind them.
+    """
+    results = {}
+    lock = threading.Lock()
+
+    def _worker(n, shard):
+        stats = WorkerStats(worker=n)
+        tag = f"[w{n}] "
+        pw = browser = None
+        t0 = time.perf_counter()
+        try:
+            pw, browser = launch_pw()
+            _ctx, page = open_worker_page(browser, session)
+            if prepare:
+                prepare(page)
+            for idx in shard:
+                status, fields = work_fn(page, idx, tag)
+                with lock:
+                    results[idx] = fields
+                stats.rows += 1
+                stats.counts[status] = stats.counts.get(status, 0) + 1
+        except Exception as err:
+            stats.errors.append(str(err))
+            print(f"‼ {tag}worker died → {err}")
+        finally:
+            stats.elapsed = time.perf_counter() - t0
+            safe_close(browser, pw)
+        return stats
+
+    limit = max(1, min(max_workers, len(shards)))
+    with ThreadPoolExecutor(max_workers=limit, thread_name_prefix="pen-worker") as ex:
+        futures = [ex.submit(_worker, n, shard) for n, shard in enumerate(shards, start=1)]
+        all_stats = [f.result() for f in futures]
+    return results, all_stats
@@ -0,0 +1,199 @@
+"""Run run_pipeline.py for many schools at once, one process per school.
+
+The manifest is a JSON list with one entry per school account:
+
+    [
+      {"id": "24070101234",
+       "user": "24070101234",
+       "password_env": "PASS_24070101234",
+       "target_school": "SMT. SAROJINI NAIDU GIRLS HIGH SCHOOL",
+       "roster": "rosters/24070101234.xlsx"}
+    ]
+
+``password`` may be given instead of ``password_env``; ``roster`` is copied
+in as the school's ``students_extracted.xlsx``.
+
+Every school gets its own folder ``schools/<id>/`` that serves as the working
+directory of its run, so its saved session, journals, caches and result
+workbooks never mix with another school's.  The run's output goes to
+``schools/<id>/pipeline.log``.
+
+Logging in needs a CAPTCHA, so schools without a usable saved session are
+first logged in one after another in the foreground (``--login-only``).
+After that, at most ``--jobs`` pipelines run in parallel, each with its own
+browser, and the per-school ``pipeline_summary.json`` files are merged into
+one block-level table (also written to ``schools/summary.json``).
+
+    python fanout.py schools.json --jobs 4
+    python fanout.py schools.json --only 24070101234 --stages pen status
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from core.session import STATE_FILE, load_state
+from run_pipeline import STAGES, SUMMARY_FILE
+
+SCHOOLS_DIR = "schools"
+LOG_FILE = "pipeline.log"
+ROSTER_FILE = "students_extracted.xlsx"
+DEFAULT_JOBS = max(1, min(4, (os.cpu_count() or 2) // 2))  # each job is a full browser
+PIPELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "run_pipeline.py")
+
+
+# ---------- manifest ----------
+
+def load_manifest(path):
+    with open(path, encoding="utf-8") as fh:
+        schools = json.load(fh)
+    ids = [s["id"] for s in schools]
+    if len(set(ids)) != len(ids):
+        raise SystemExit(f"{path}: duplicate school ids")
+    for s in schools:
+        if "password" not in s and not os.getenv(s.get("password_env", "")):
+            raise SystemExit(f"{path}: no password for {s['id']} (set 'password' or {s.get('password_env')})")
+    return schools
+
+
+def school_dir(school):
+    return os.path.join(SCHOOLS_DIR, str(school["id"]))
+
+
+def school_env(school):
+    env = dict(os.environ)
+    env["SSG_USER"] = school["user"]
+    env["SSG_PASS"] = school.get("password") or os.environ[school["password_env"]]
+    if school.get("target_school"):
+        env["UDISE_TARGET_SCHOOL"] = school["target_school"]
+    env["PYTHONUNBUFFERED"] = "1"
+    env["PYTHONIOENCODING"] = "utf-8"  # emoji progress lines into the log file
+    return env
+
+
+def prepare_dir(school):
+    """Create the school's folder and copy its roster in when it changed."""
+    folder = school_dir(school)
+    os.makedirs(folder, exist_ok=True)
+    src = school.get("roster")
+    if src:
+        dst = os.path.join(folder, ROSTER_FILE)
+        if not os.path.exists(dst) or os.path.getmtime(src) > os.path.getmtime(dst):
+            shutil.copy2(src, dst)
+    return folder
+
+
+# ---------- runs ----------
+
+def login_missing(schools):
+    """Interactive, one at a time: log in every school without a usable session."""
+    for school in schools:
+        folder = school_dir(school)
+        if load_state(os.path.join(folder, STATE_FILE)) is not None:
+            continue
+        print(f"\n🔑 {school['id']}: login needed")
+        subprocess.run([sys.executable, PIPELINE, "--login-only"],
+                       cwd=folder, env=school_env(school), check=False)
+
+
+def run_school(school, stages, flags=()):
+    """One pipeline in its own process; returns ``(id, seconds, summary|None)``."""
+    folder = school_dir(school)
+    cmd = [sys.executable, PIPELINE, "--stages", *stages, *flags]
+    summary_path = os.path.join(folder, SUMMARY_FILE)
+    if os.path.exists(summary_path):
+        os.remove(summary_path)
+
+    t0 = time.perf_counter()
+    with open(os.path.join(folder, LOG_FILE), "w", encoding="utf-8") as log:
+        proc = subprocess.run(cmd, cwd=folder, env=school_env(school),
+                              stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT)
+    elapsed = time.perf_counter() - t0
+    summary = None
+    if os.path.exists(summary_path):
+        with open(summary_path, encoding="utf-8") as fh:
+            summary = json.load(fh)
+    if proc.returncode and summary is not None:
+        summary["ok"] = False
+    return school["id"], elapsed, summary
+
+
+# ---------- summary ----------
+
+def _result(summary):
+    if summary is None:
+        return "CRASHED (see log)"
+    if summary["ok"]:
+        return "ok"
+    failed = [s for s in summary["stages"] if s["result"] != "ok"]
+    return f"{failed[0]['name']} {failed[0]['result']}" if failed else "FAILED"
+
+
+def report(results, wall, path=os.path.join(SCHOOLS_DIR, "summary.json")):
+    cols = ("students", "pen_found", "imported", "released")
+    totals = dict.fromkeys(cols, 0)
+    print("\n–––– BLOCK SUMMARY ––––")
+    print(f"{'school':<14} {'time':>8} " + " ".join(f"{c:>9}" for c in cols) + "  result")
+    for sid, elapsed, summary in sorted(results, key=lambda r: str(r[0])):
+        counts = (summary or {}).get("counts", {})
+        for c in cols:
+            totals[c] += counts.get(c, 0)
+        cells = " ".join(f"{counts.get(c, '-'):>9}" for c in cols)
+        print(f"{str(sid):<14} {elapsed:>7.0f}s {cells}  {_result(summary)}")
+    ok = sum(1 for *_, s in results if s and s["ok"])
+    print(f"{'total':<14} {wall:>7.0f}s " + " ".join(f"{totals[c]:>9}" for c in cols)
+          + f"  {ok}/{len(results)} ok")
+    serial = sum(elapsed for _, elapsed, _ in results)
+    if wall:
+        print(f"wall clock {wall:.0f}s vs {serial:.0f}s one after another ({serial / wall:.1f}x)")
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({"wall": round(wall, 1), "totals": totals,
+                   "schools": {str(sid): {"seconds": round(e, 1), "summary": s} for sid, e, s in results}},
+                  fh, indent=2, ensure_ascii=False)
+
+
+def fanout(manifest, jobs=DEFAULT_JOBS, only=None, stages=tuple(STAGES), flags=()):
+    """Run every school in *manifest* (or just the ids in *only*); *flags*
+    are passed through to run_pipeline.py."""
+    schools = load_manifest(manifest)
+    if only:
+        schools = [s for s in schools if str(s["id"]) in only]
+    for school in schools:
+        prepare_dir(school)
+    login_missing(schools)
+
+    print(f"\n▶ {len(schools)} schools, {jobs} at a time")
+    results = []
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, jobs), thread_name_prefix="school") as ex:
+        futures = [ex.submit(run_school, s, stages, flags) for s in schools]
+        for fut in as_completed(futures):
+            sid, elapsed, summary = fut.result()
+            results.append((sid, elapsed, summary))
+            print(f"{'✓' if summary and summary['ok'] else '✗'} {sid} finished in {elapsed:.0f}s "
+                  f"→ {_result(summary)}")
+    report(results, time.perf_counter() - t0)
+    return results
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("manifest", help="JSON list of school accounts")
+    ap.add_argument("--jobs", type=int, default=DEFAULT_JOBS,
+                    help="schools running at the same time (each is one browser process)")
+    ap.add_argument("--only", nargs="+", help="run just these school ids")
+    ap.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    ap.add_argument("--stream", action="store_true", help="passed on to run_pipeline.py")
+    ap.add_argument("--save-intermediate", action="store_true", help="passed on to run_pipeline.py")
+    ap.add_argument("--trace", action="store_true", help="passed on to run_pipeline.py")
+    args = ap.parse_args()
+    flags = [f for f, on in (("--stream", args.stream), ("--save-intermediate", args.save_intermediate),
+                             ("--trace", args.trace)) if on]
+    fanout(args.manifest, jobs=args.jobs, only=args.only, stages=args.stages, flags=flags)
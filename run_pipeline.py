@@ -0,0 +1,232 @@
+"""Run the UDISE+ stages back to back on one browser with a single login.
+
+    extract  → export every Pending section to UDISE.xlsx        (extract_pending.py)
+    update   → progress the Pending students                      (Update_Pending.py)
+    pen      → Aadhaar + YOB → PEN                                (Get_PEN.py)
+    status   → PEN + DOB → current school, import UN-TAGGED       (Get_Student_School_Status.py)
+    release  → release requests for students of other schools     (Get_Student_School_Request.py)
+
+The session is saved to disk after login (core.session), so the CAPTCHA is
+only needed again when the portal rejects it.  For each stage we report the
+time-to-first-work (landing on the module) and the total stage time.
+
+The stages form a small DAG (``needs`` below).  The pen → status → release
+chain hands its DataFrame from one stage to the next in memory, so only the
+last stage that ran exports its workbook; ``--save-intermediate`` also saves
+the others' working copies (Parquet / SQLite, see core.frame_store).  A stage
+whose upstream is not selected loads the upstream's saved output instead.
+
+    python run_pipeline.py                        # all stages
+    python run_pipeline.py --stages status pen    # run in dependency order
+    python run_pipeline.py --save-intermediate    # also save every stage's output
+    python run_pipeline.py --stream               # overlap pen and status
+    python run_pipeline.py --pages 4              # pen/status/release on 4 async pages
+    python run_pipeline.py --login-only           # just refresh udise_session.json
+    python run_pipeline.py --trace                # + timing report and run_pipeline.trace.json
+
+With ``--stream`` the school lookup does not wait for the PEN stage to finish:
+each PEN goes onto a bounded queue as soon as it is found and a second
+browser, restored from the same session, looks up its school and imports
+UN-TAGGED students meanwhile (core.streaming).  The two stages then take
+about as long as the slower of them rather than both added together.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import time
+from typing import NamedTuple
+
+from dotenv import load_dotenv
+
+from core.async_pool import DEFAULT_PAGES, MAX_PAGES
+from core.browser_utils import safe_close, PAGE_TIMEOUT
+from core.streaming import Handoff, start_consumer
+from core.tracing import TRACER
+from core.worker_pool import snapshot_session
+from core.session import (
+    open_session, ensure_session,
+    land_progression_summary, land_import_module, land_release_request,
+)
+
+
+SUMMARY_FILE = "pipeline_summary.json"  # read by fanout.py
+
+
+class Stage(NamedTuple):
+    land: object            # core.session landing helper
+    module: str
+    func: str
+    needs: tuple = ()       # stages that must run first
+    frame_in: str = None    # kwarg that takes the upstream DataFrame
+    pages: bool = False     # takes ``pages`` (core.async_pool)
+
+
+STAGES = {
+    "extract": Stage(land_progression_summary, "extract_pending", "export_pending_sections"),
+    "update":  Stage(land_progression_summary, "Update_Pending", "open_pending_detail_pages",
+                     needs=("extract",)),
+    "pen":     Stage(land_import_module, "Get_PEN", "open_and_get_student_pen",
+                     frame_in="roster", pages=True),
+    "status":  Stage(land_import_module, "Get_Student_School_Status", "get_school_by_pen",
+                     needs=("pen",), frame_in="df", pages=True),
+    "release": Stage(land_release_request, "Get_Student_School_Request", "get_student_school_request",
+                     needs=("status",), frame_in="df", pages=True),
+}
+
+
+def plan(selected):
+    """*selected* in dependency order (only the selected stages are run)."""
+    order, seen = [], set()
+
+    def visit(name):
+        if name in seen:
+            return
+        seen.add(name)
+        for dep in STAGES[name].needs:
+            if dep in selected:
+                visit(dep)
+        order.append(name)
+
+    for name in STAGES:
+        if name in selected:
+            visit(name)
+    return order
+
+
+def _kwargs(name, order, frames, save_intermediate, pages=DEFAULT_PAGES):
+    """Upstream frame + whether this stage should write its own workbook."""
+    stage = STAGES[name]
+    kwargs = {"pages": pages} if stage.pages and pages > 1 else {}
+    if stage.frame_in is None:
+        return kwargs
+    upstream = [frames[dep] for dep in stage.needs if frames.get(dep) is not None]
+    if upstream:
+        kwargs[stage.frame_in] = upstream[0]
+    downstream = any(name in STAGES[other].needs for other in order)
+    kwargs["write"] = save_intermediate or not downstream
+    kwargs["excel"] = not downstream
+    return kwargs
+
+
+def run_streamed(page, order, save_intermediate, pages=DEFAULT_PAGES):
+    """pen and status at the same time: PEN results are handed to a second
+    browser over a bounded queue.  Returns ``(pen_df, school_df)``."""
+    pen = importlib.import_module("Get_PEN")
+    status = importlib.import_module("Get_Student_School_Status")
+    roster = pen.load_roster()
+    handoff = Handoff()
+    consumer = start_consumer(
+        snapshot_session(page), handoff,
+        lambda p: status.get_school_by_pen(
+            page=p, df=roster, stream=handoff,
+            write=save_intermediate or "release" not in order,
+            excel="release" not in order, pages=pages,
+        ),
+        prepare=lambda p: p.wait_for_selector(status.GO_BTN_LOC, timeout=PAGE_TIMEOUT),
+    )
+    try:
+        pen_df = pen.open_and_get_student_pen(
+            page=page, roster=roster, write=save_intermediate, excel=False,
+            on_result=handoff.put, pages=pages,
+        )
+    finally:
+        handoff.close()
+    school_df = consumer.result()
+    print("\n–––– STREAM ––––")
+    print(handoff.line())
+    return pen_df, school_df
+
+
+def tally(frames):
+    """Headline counts from the frames the stages returned."""
+    out = {}
+    if frames.get("pen") is not None:
+        out["students"] = len(frames["pen"])
+        out["pen_found"] = int(frames["pen"]["student_pen"].astype(str).str.fullmatch(r"\d+").sum())
+    if frames.get("status") is not None:
+        out["imported"] = int(frames["status"]["import_status"].astype(str).str.startswith("Imported").sum())
+    if frames.get("release") is not None:
+        out["released"] = int(frames["release"]["release_status"].astype(str)
+                              .str.startswith("Request Raised").sum())
+    return out
+
+
+def write_summary(timings, frames, wall, path=SUMMARY_FILE):
+    summary = {
+        "ok": all(result == "ok" for *_, result in timings),
+        "wall": round(wall, 1),
+        "stages": [{"name": n, "first_work": t and round(t, 1), "total": round(total, 1), "result": r}
+                   for n, t, total, r in timings],
+        "counts": tally(frames),
+    }
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(summary, fh, indent=2, ensure_ascii=False)
+
+
+def run_pipeline(stages=tuple(STAGES), save_intermediate=False, stream=False, pages=DEFAULT_PAGES):
+    load_dotenv()
+    user, pwd = os.getenv("SSG_USER"), os.getenv("SSG_PASS")
+    if not (user and pwd):
+        raise SystemExit("Set SSG_USER & SSG_PASS in .env")
+
+    order = plan(set(stages))
+    stream = stream and "pen" in order and "status" in order
+    steps = [name for name in order if not (stream and name == "status")]
+    print("▶ stages: " + " → ".join("pen+status" if stream and n == "pen" else n for n in steps))
+    frames = {}  # stage -> DataFrame it returned
+    timings = []
+    t_start = time.perf_counter()
+    pw, browser, page = open_session(user, pwd)
+    print(f"✓ Logged in after {time.perf_counter() - t_start:.1f}s")
+    try:
+        for name in steps:
+            stage = STAGES[name]
+            if stream and name == "pen":
+                name = "pen+status"
+            print(f"\n════ {name} ════")
+            t0 = time.perf_counter()
+            try:
+                ensure_session(page, user, pwd, stage.land)
+                ttfw = time.perf_counter() - t0
+                if name == "pen+status":
+                    frames["pen"], frames["status"] = run_streamed(page, order, save_intermediate, pages)
+                else:
+                    func = getattr(importlib.import_module(stage.module), stage.func)
+                    frames[name] = func(page=page, **_kwargs(name, order, frames, save_intermediate, pages))
+            except Exception as err:
+                timings.append((name, None, time.perf_counter() - t0, f"FAILED: {err}"))
+                print(f"‼ stage {name} failed → {err}")
+                break
+            timings.append((name, ttfw, time.perf_counter() - t0, "ok"))
+    finally:
+        safe_close(browser, pw)
+        print("\n–––– PIPELINE SUMMARY ––––")
+        print(f"{'stage':<10} {'first work':>11} {'total':>9}  result")
+        for name, ttfw, total, result in timings:
+            first = f"{ttfw:.1f}s" if ttfw is not None else "-"
+            print(f"{name:<10} {first:>11} {total:>8.1f}s  {result}")
+        print(f"wall clock: {time.perf_counter() - t_start:.1f}s")
+        write_summary(timings, frames, time.perf_counter() - t_start)
+    return frames
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    ap.add_argument("--save-intermediate", action="store_true",
+                    help="also save the working copy of stages whose output is handed on in memory")
+    ap.add_argument("--stream", action="store_true",
+                    help="look up schools while PENs are still being fetched (second browser)")
+    ap.add_argument("--pages", type=int, default=int(os.getenv("UDISE_PAGES", DEFAULT_PAGES)),
+                    help=f"concurrent pages per lookup stage, in one async browser (capped at {MAX_PAGES})")
+    ap.add_argument("--login-only", action="store_true",
+                    help="log in (or reuse the saved session) and stop")
+    ap.add_argument("--trace", action="store_true", help="write a timing report + Chrome trace")
+    args = ap.parse_args()
+    if args.trace:
+        TRACER.enable()
+    run_pipeline(() if args.login_only else args.stages,
+                 save_intermediate=args.save_intermediate, stream=args.stream,
+                 pages=max(1, min(args.pages, MAX_PAGES)))